@@ -0,0 +1,13 @@
+"""
+Modules inside the package import each other relative to prod_assistant/ (`from utils...`),
+the ETL through the `prod_assistant.` package. Importing the package puts its directory on
+sys.path, so entry points run as modules from the project root:
+
+    python -m prod_assistant.benchmarks.run --sizes 100
+"""
+import sys
+from pathlib import Path
+
+_PACKAGE_ROOT = str(Path(__file__).resolve().parent)
+if _PACKAGE_ROOT not in sys.path:
+    sys.path.insert(0, _PACKAGE_ROOT)
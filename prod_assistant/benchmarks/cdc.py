@@ -0,0 +1,251 @@
+"""
+Incremental ingestion from the scraper's change queue, with the local index backend and the
+offline fakes. After a full ingest of --catalog-size products, a producer stands in for
+FlipkartScraper.emit and queues --rate records/s for --duration seconds:
+
+  new        products not in the index yet
+  modified   indexed products whose reviews changed
+  unchanged  re-scrapes identical to what is indexed
+
+while an IngestionWorker consumes the queue and a Retriever follows the index pointer. A probe
+searches every new / modified product by its text until the retriever returns it, which gives
+the scrape -> searchable lag as users see it (the worker's own metric stops at the upsert).
+
+Before the producer starts, two failures are injected on the first records:
+  - a worker leases a batch and dies: the lease (--lease seconds) expires and it is redelivered
+  - a worker upserts a batch and dies before acknowledging it: it is redelivered and upserted
+    again under the same ids
+
+and at the end the index must hold every product exactly once.
+
+    python -m prod_assistant.benchmarks.cdc --catalog-size 2000 --rate 20 --duration 20
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import yaml
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+PACKAGE_ROOT = PROJECT_ROOT / "prod_assistant"
+
+SOURCE_CSV = PROJECT_ROOT / "data" / "product_reviews.csv"
+KINDS = ("new", "modified", "unchanged")
+
+
+def write_config(workdir: Path, args) -> Path:
+    """config.yaml with the local backend and the queue in `workdir`, no LLM filter."""
+    with open(PACKAGE_ROOT / "config" / "config.yaml", encoding="utf-8") as f:
+        config = yaml.safe_load(f)
+    config["snapshot"] = {**config.get("snapshot", {}), "dir": str(workdir / "snapshots")}
+    config["index"] = {**config.get("index", {}), "backend": "local", "poll_seconds": args.poll, "warm_seconds": 0}
+    config["cdc"] = {**config.get("cdc", {}), "queue_path": str(workdir / "changes.sqlite"), "poll_seconds": args.worker_poll,
+                     "lease_seconds": args.lease, "metrics_port": None}
+    config["retriever"] = {**config["retriever"], "llm_filter": False}
+    path = workdir / "config.yaml"
+    path.write_text(yaml.safe_dump(config, allow_unicode=True))
+    return path
+
+
+class Probe:
+    """Searches pending products by their text until the retriever's live store returns them."""
+
+    def __init__(self, retriever, interval: float = 0.05):
+        self.retriever = retriever
+        self.interval = interval
+        self.pending = {}  # doc_id -> (text, scraped_at, kind)
+        self.lags = {kind: [] for kind in KINDS}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+
+    def watch(self, doc_id: str, text: str, scraped_at: float, kind: str):
+        with self._lock:
+            self.pending[doc_id] = (text, scraped_at, kind)
+
+    def _loop(self):
+        from utils.index_versions import document_id
+
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                pending = list(self.pending.items())
+            for doc_id, (text, scraped_at, kind) in pending:
+                hits = self.retriever.load_vstore().similarity_search(text, k=3)
+                if any(document_id(d) == doc_id and d.page_content == text for d in hits):
+                    with self._lock:
+                        if self.pending.get(doc_id, (None,))[0] == text:
+                            del self.pending[doc_id]
+                            self.lags[kind].append(time.time() - scraped_at)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+
+class AckFailsOnce:
+    """ChangeQueue proxy whose first ack raises, as if the worker died between upsert and ack."""
+
+    def __init__(self, queue):
+        self._queue = queue
+        self.failed = False
+
+    def __getattr__(self, name):
+        return getattr(self._queue, name)
+
+    def ack(self, *args, **kwargs):
+        if not self.failed:
+            self.failed = True
+            raise RuntimeError("worker died before acknowledging")
+        return self._queue.ack(*args, **kwargs)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Incremental ingestion from the change queue (local backend)")
+    parser.add_argument("--catalog-size", type=int, default=2000)
+    parser.add_argument("--rate", type=float, default=20.0, help="Records queued per second")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds of producer traffic")
+    parser.add_argument("--mix", default="0.3,0.3,0.4", help="Shares of new,modified,unchanged records")
+    parser.add_argument("--embed-latency", type=float, default=0.05, help="Seconds per fake embedding call")
+    parser.add_argument("--poll", type=float, default=0.5, help="index.poll_seconds for the retriever")
+    parser.add_argument("--worker-poll", type=float, default=1.0, help="cdc.poll_seconds for the worker")
+    parser.add_argument("--lease", type=float, default=3.0, help="cdc.lease_seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    from benchmarks.offline_env import use_offline_environment
+    use_offline_environment()
+    workdir = Path(tempfile.mkdtemp(prefix="cdc-"))
+    os.environ["CONFIG_PATH"] = str(write_config(workdir, args))  # before anything loads the config
+
+    from prometheus_client import REGISTRY
+    from benchmarks.fakes import OfflineModelLoader, synthetic_catalog
+    from benchmarks.metrics import percentile
+    from prod_assistant.etl.change_queue import ChangeQueue
+    from prod_assistant.etl.data_ingestion import DataIngestion, record_to_document
+    from prod_assistant.etl.ingestion_worker import IngestionWorker
+    from retriever.retrieval import Retriever
+    from utils.config_loader import load_config
+    from utils.index_versions import document_id, open_index
+    from utils.snapshot import CatalogSnapshot
+
+    def embedded_texts() -> float:
+        return REGISTRY.get_sample_value("prod_assistant_embedding_texts_total", {"kind": "documents"}) or 0.0
+
+    loader = OfflineModelLoader(embed_latency_s=args.embed_latency)
+    rng = random.Random(args.seed)
+    pool = synthetic_catalog(args.catalog_size * 2, SOURCE_CSV, seed=args.seed)
+    indexed = pool.iloc[: args.catalog_size].to_dict("records")
+    fresh = pool.iloc[args.catalog_size:].to_dict("records")
+
+    t = time.perf_counter()
+    csv_path = workdir / "catalog.csv"
+    pool.iloc[: args.catalog_size].to_csv(csv_path, index=False)
+    with contextlib.redirect_stdout(io.StringIO()):
+        ingestion = DataIngestion(model_loader=loader, csv_path=str(csv_path))
+        ingestion.reindex(ingestion.transform_data())
+    print(f"full ingest of {args.catalog_size} products: {time.perf_counter() - t:.1f}s", flush=True)
+
+    config = load_config()
+    queue = ChangeQueue.from_config(config)
+    index = open_index(config)
+    retriever = Retriever(model_loader=loader)
+    with contextlib.redirect_stdout(io.StringIO()):
+        retriever.load_retriever()
+    probe = Probe(retriever)
+    probe.start()
+    emitted = {kind: 0 for kind in KINDS}
+    expected = {document_id(record_to_document(r)) for r in indexed}
+
+    def emit(record: dict, kind: str):
+        record = {**record, "scraped_at": time.time()}
+        queue.put([record])
+        emitted[kind] += 1
+        doc = record_to_document(record)
+        expected.add(document_id(doc))
+        if kind != "unchanged":
+            probe.watch(document_id(doc), doc.page_content, record["scraped_at"], kind)
+
+    def next_record(kind: str) -> dict:
+        if kind == "new":
+            # Synthetic copies reuse the sample's reviews; give a new listing reviews of its own
+            record = fresh.pop()
+            record = {**record, "top_reviews": f"{record['top_reviews']} || First review {rng.random():.6f}"}
+            indexed.append(record)
+            return record
+        i = rng.randrange(len(indexed))
+        if kind == "modified":
+            indexed[i] = {**indexed[i], "top_reviews": f"{indexed[i]['top_reviews']} || Update {rng.random():.6f}: still good"}
+        return indexed[i]
+
+    # Failure injection on the first records
+    for kind in ("new", "modified"):
+        for _ in range(5):
+            emit(next_record(kind), kind)
+    abandoned = queue.lease(5, args.lease)  # leased by a worker that died; redelivered after the lease
+    embedded_before = embedded_texts()
+    crashing = IngestionWorker.from_config(config, index, loader.load_embeddings(), queue=AckFailsOnce(queue))
+    with contextlib.redirect_stdout(io.StringIO()):
+        crashing.run_once()  # upserts the other 5, then "dies" before the ack: released for redelivery
+    print(f"injected: {len(abandoned)} records leased and abandoned, 5 upserted but not acknowledged "
+          f"(texts embedded: {embedded_texts() - embedded_before:.0f})", flush=True)
+
+    worker = IngestionWorker.from_config(config, index, loader.load_embeddings(), queue=queue)
+    consumer = threading.Thread(target=worker.run, daemon=True)
+    embedded_before = embedded_texts()
+    versions_before = index.pointer()["current"]
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        consumer.start()
+        weights = [float(w) for w in args.mix.split(",")]
+        for n in range(int(args.rate * args.duration)):
+            kind = rng.choices(KINDS, weights)[0]
+            emit(next_record(kind), kind)
+            time.sleep(max(0.0, started + (n + 1) / args.rate - time.perf_counter()))
+        deadline = time.perf_counter() + args.lease + 30
+        while (queue.stats()["pending"] or probe.pending) and time.perf_counter() < deadline:
+            time.sleep(0.1)
+        worker.stop()
+        consumer.join()
+        probe.stop()
+    drained_s = time.perf_counter() - started
+
+    total = sum(emitted.values())
+    embedded = embedded_texts() - embedded_before
+    print(f"\nqueued {total} records {emitted} in {args.duration:.0f}s at {args.rate:.0f}/s; "
+          f"queue drained {drained_s - args.duration:.1f}s after the last one")
+    print(f"texts embedded by the worker: {embedded:.0f} (a full re-index per scrape would embed "
+          f"~{args.catalog_size + emitted['new']} every time)")
+    count_lag = REGISTRY.get_sample_value("prod_assistant_ingest_freshness_seconds_count") or 0
+    sum_lag = REGISTRY.get_sample_value("prod_assistant_ingest_freshness_seconds_sum") or 0
+    print(f"worker freshness metric: {count_lag:.0f} upserts, mean {sum_lag / count_lag if count_lag else 0:.2f}s "
+          "scrape -> upserted")
+    print(f"\n{'searchable':10} {'products':>8} {'p50 s':>6} {'p95 s':>6} {'max s':>6}")
+    for kind in ("new", "modified"):
+        lags = sorted(probe.lags[kind])
+        if lags:
+            print(f"{kind:10} {len(lags):8d} {percentile(lags, 0.5):6.2f} {percentile(lags, 0.95):6.2f} {lags[-1]:6.2f}")
+    print(f"never searchable: {len(probe.pending)}")
+
+    live = index.pointer()["current"]
+    snapshot = CatalogSnapshot(index.root / live)
+    ids = [document_id(snapshot.document(i)) for i in range(len(snapshot))]
+    stats = queue.stats()
+    print(f"index {versions_before} -> {live}: {len(ids)} rows, {len(set(ids))} distinct ids, "
+          f"{len(expected)} products expected; queue pending {stats['pending']}, dead {stats['dead']}")
+    shutil.rmtree(workdir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+import json
+import random
+import re
+import tempfile
+import time
+import zlib
+from pathlib import Path
+
+import pandas as pd
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import InMemoryVectorStore
+
+from observability.instrumentation import InstrumentedEmbeddings
+from utils.fake_llm import FakeProviderChatModel
+from utils.model_loader import ModelLoader
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+# Canned answers per llm_tasks entry; the filter/grader answers keep every document
+TASK_RESPONSES = {
+    "doc_filter": "YES",
+    "grader": "yes",
+    "rewriter": "iphone 15 price and reviews",
+    "assistant": "Hello! Ask me about any phone in the catalog.",
+    "testset_generator": json.dumps([
+        {"question": "What do buyers say about the camera and battery?",
+         "answer": "Reviewers praise the camera; battery life is rated good for a full day."},
+        {"question": "Is it worth the price?", "answer": "Most buyers rate it 4.5/5 or higher and call it worth the money."},
+    ]),
+    "generator": (
+        "The Apple iPhone 15 is priced at ₹69,999 and buyers rate it 4.6/5, praising the camera "
+        "and battery life. The Pro variant costs more but adds a titanium frame."
+    ),
+}
+
+
+class HashingEmbeddings(Embeddings):
+    """
+    Deterministic offline embeddings: signed feature hashing of lower-cased words into
+    `dims` buckets, L2-normalised, so lexically similar texts land close together.
+    Each call sleeps `latency_s` to stand in for the embedding API round trip.
+    """
+
+    def __init__(self, dims: int = 256, latency_s: float = 0.0):
+        self.dims = dims
+        self.latency_s = latency_s
+
+    def _embed(self, text: str) -> list[float]:
+        vector = [0.0] * self.dims
+        for word in _WORD.findall((text or "").lower()):
+            h = zlib.crc32(word.encode("utf-8"))
+            vector[h % self.dims] += 1.0 if h & 0x80000000 else -1.0
+        norm = sum(v * v for v in vector) ** 0.5 or 1.0
+        return [v / norm for v in vector]
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        time.sleep(self.latency_s)
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        time.sleep(self.latency_s)
+        return self._embed(text)
+
+
+class OfflineModelLoader(ModelLoader):
+    """ModelLoader returning fakes: no API keys, no network, fixed per-call latency."""
+
+    def __init__(self, llm_latency_s: float = 0.0, embed_latency_s: float = 0.0, seed: int = 0):
+        self.llm_latency_s = llm_latency_s
+        self.embed_latency_s = embed_latency_s
+        self.seed = seed
+
+    def load_embeddings(self):
+        return InstrumentedEmbeddings(HashingEmbeddings(latency_s=self.embed_latency_s))
+
+    def load_llm(self, task: str | None = None):
+        return FakeProviderChatModel(
+            response=TASK_RESPONSES.get(task, "ok"),
+            latency_s=self.llm_latency_s,
+            seed=self.seed,
+            model_name=f"fake-{task or 'default'}",
+        )
+
+
+def disable_inline_ragas():
+    """The Generator scores answers with RAGAS, which needs a real judge LLM; leave it out offline."""
+    import evaluation.ragas_eval as ragas_eval
+
+    ragas_eval.evaluate_context_precision = ragas_eval.evaluate_response_relevancy = lambda *args: 0.0
+
+
+def in_memory_vector_store(model_loader: ModelLoader) -> InMemoryVectorStore:
+    """Empty in-process vector store (supports the MMR search the retriever uses)."""
+    return InMemoryVectorStore(embedding=model_loader.load_embeddings())
+
+
+def synthetic_catalog(size: int, source_csv: str | Path, seed: int = 0) -> pd.DataFrame:
+    """
+    `size` products built by cycling the scraped sample: copies get a batch suffix in
+    id and title and a shuffled review order, so review hashes stay distinct.
+    """
+    source = pd.read_csv(source_csv)
+    rng = random.Random(seed)
+    rows = []
+    for i in range(size):
+        row = source.iloc[i % len(source)].to_dict()
+        batch = i // len(source)
+        if batch:
+            reviews = str(row["top_reviews"]).split("||")
+            rng.shuffle(reviews)
+            row.update(
+                product_id=f"{row['product_id']}-{batch}",
+                product_title=f"{row['product_title']} [batch {batch}]",
+                top_reviews="||".join(reviews),
+            )
+        rows.append(row)
+    return pd.DataFrame(rows, columns=source.columns)
+
+
+def populated_vector_store(model_loader: ModelLoader, size: int, source_csv: str | Path) -> InMemoryVectorStore:
+    """In-memory store holding a synthetic catalog of `size` products, ingested through DataIngestion."""
+    from prod_assistant.etl.data_ingestion import DataIngestion
+
+    vstore = in_memory_vector_store(model_loader)
+    with tempfile.TemporaryDirectory() as workdir:
+        csv_path = Path(workdir) / "catalog.csv"
+        synthetic_catalog(size, source_csv).to_csv(csv_path, index=False)
+        ingestion = DataIngestion(model_loader=model_loader, csv_path=str(csv_path), vector_store=vstore)
+        ingestion.store_in_vector_db(ingestion.transform_data())
+    return vstore
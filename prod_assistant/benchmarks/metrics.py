@@ -0,0 +1,26 @@
+from observability.instrumentation import LLM_LATENCY, NODE_LATENCY
+
+
+def stage_totals() -> dict[str, float]:
+    """Cumulative seconds per workflow node and per node's LLM calls, from the Prometheus histograms."""
+    totals: dict[str, float] = {}
+    for prefix, histogram in (("node", NODE_LATENCY), ("llm", LLM_LATENCY)):
+        for metric in histogram.collect():
+            for sample in metric.samples:
+                if sample.name.endswith("_sum"):
+                    key = f"{prefix}:{sample.labels['workflow']}/{sample.labels['node']}"
+                    totals[key] = totals.get(key, 0.0) + sample.value
+    return totals
+
+
+def stage_deltas_ms(before: dict[str, float], after: dict[str, float], runs: int) -> dict[str, float]:
+    """Milliseconds per run spent in each stage between two `stage_totals()` snapshots."""
+    return {
+        key: round((after[key] - before.get(key, 0.0)) / runs * 1000, 3)
+        for key in sorted(after)
+        if runs and after[key] - before.get(key, 0.0) > 0
+    }
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, round(q * (len(sorted_values) - 1)))]
@@ -0,0 +1,13 @@
+import os
+
+# Constructors check these are set; the offline fakes never use them
+_CREDENTIALS = ("GOOGLE_API_KEY", "GROQ_API_KEY", "ASTRA_DB_API_ENDPOINT", "ASTRA_DB_APPLICATION_TOKEN", "ASTRA_DB_KEYSPACE")
+
+
+def use_offline_environment():
+    """Placeholder credentials, no .env (so real keys are never picked up) and quiet logs.
+    Call before importing project modules: the logger reads LOG_LEVEL on first import."""
+    for var in _CREDENTIALS:
+        os.environ.setdefault(var, "offline-benchmark")
+    os.environ.setdefault("ENV", "production")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
@@ -0,0 +1,206 @@
+"""
+Blue/green re-index under load, with the local index backend (catalog snapshots searched in
+process, no AstraDB) and the offline fakes. Closed-loop users query a Retriever that follows
+the index pointer while this script:
+
+  1. re-ingests a larger catalog as a new version: build, validate, stage (retrievers warm it),
+     promote; the users should switch without errors or empty results
+  2. tries to promote a broken version (random vectors): validation must reject it and the
+     live version keep serving
+  3. rolls back to the first version
+
+and reports latency per phase, errors, which versions answered, and the promote -> first
+answer from the new version lag.
+
+    python -m prod_assistant.benchmarks.reindex --catalog-size 2000 --concurrency 8
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import yaml
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+PACKAGE_ROOT = PROJECT_ROOT / "prod_assistant"
+
+SOURCE_CSV = PROJECT_ROOT / "data" / "product_reviews.csv"
+
+
+def write_config(workdir: Path, args) -> Path:
+    """config.yaml with the local backend in `workdir` and no LLM filter (retrieval only)."""
+    with open(PACKAGE_ROOT / "config" / "config.yaml", encoding="utf-8") as f:
+        config = yaml.safe_load(f)
+    config["snapshot"] = {**config.get("snapshot", {}), "dir": str(workdir / "snapshots")}
+    config["index"] = {**config.get("index", {}), "backend": "local", "poll_seconds": args.poll,
+                       "warm_seconds": args.warm}
+    config["cdc"] = {**config.get("cdc", {}), "queue_path": str(workdir / "changes.sqlite")}
+    config["retriever"] = {**config["retriever"], "llm_filter": False}
+    path = workdir / "config.yaml"
+    path.write_text(yaml.safe_dump(config, allow_unicode=True))
+    return path
+
+
+class Users:
+    """Closed-loop users calling Retriever.load_retriever().invoke(); records every answer."""
+
+    def __init__(self, retriever, concurrency: int, queries):
+        self.retriever = retriever
+        self.concurrency = concurrency
+        self.queries = queries
+        self.records = []  # (started, latency, version or None, error or None, hits)
+        self._stop = threading.Event()
+        self._threads = []
+
+    def _user(self, seed: int):
+        rng = random.Random(seed)
+        while not self._stop.is_set():
+            started = time.perf_counter()
+            version, error, hits = None, None, 0
+            try:
+                retriever = self.retriever.load_retriever()
+                version = retriever.vectorstore.snapshot.version
+                hits = len(retriever.invoke(rng.choice(self.queries)))
+            except Exception as e:
+                error = type(e).__name__
+            self.records.append((started, time.perf_counter() - started, version, error, hits))
+
+    def start(self):
+        self._threads = [threading.Thread(target=self._user, args=(i,), daemon=True) for i in range(self.concurrency)]
+        for t in self._threads:
+            t.start()
+
+    def stop(self):
+        self._stop.set()
+        for t in self._threads:
+            t.join()
+
+
+def phase_stats(records, start: float, end: float) -> dict:
+    from benchmarks.metrics import percentile
+
+    rows = [r for r in records if start <= r[0] < end]
+    ok = sorted(r[1] for r in rows if r[3] is None)
+    versions = {}
+    for r in rows:
+        versions[r[2]] = versions.get(r[2], 0) + 1
+    return {
+        "requests": len(rows),
+        "errors": sum(1 for r in rows if r[3] is not None),
+        "empty": sum(1 for r in rows if r[3] is None and r[4] == 0),
+        "p50_ms": round(percentile(ok, 0.5) * 1000, 1) if ok else None,
+        "p95_ms": round(percentile(ok, 0.95) * 1000, 1) if ok else None,
+        "versions": versions,
+    }
+
+
+def first_answer_from(records, version: str, after: float) -> float | None:
+    done = [r[0] + r[1] for r in records if r[2] == version and r[3] is None and r[0] + r[1] >= after]
+    return min(done) - after if done else None
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Blue/green re-index under load (local backend)")
+    parser.add_argument("--catalog-size", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--steady", type=float, default=5.0, help="Seconds of load between steps")
+    parser.add_argument("--embed-latency", type=float, default=0.01, help="Seconds per fake embedding call")
+    parser.add_argument("--poll", type=float, default=0.5, help="index.poll_seconds for the retriever")
+    parser.add_argument("--warm", type=float, default=2.0, help="index.warm_seconds before the flip")
+    args = parser.parse_args(argv)
+
+    from benchmarks.offline_env import use_offline_environment
+    use_offline_environment()
+    workdir = Path(tempfile.mkdtemp(prefix="reindex-"))
+    os.environ["CONFIG_PATH"] = str(write_config(workdir, args))  # before anything loads the config
+
+    import numpy as np
+    from benchmarks.fakes import OfflineModelLoader, synthetic_catalog
+    from benchmarks.replay import DEFAULT_QUERIES
+    from prod_assistant.etl.data_ingestion import DataIngestion
+    from retriever.retrieval import Retriever
+    from utils.config_loader import load_config
+    from utils.index_versions import IndexValidationError, Reindexer, open_index
+
+    loader = OfflineModelLoader(embed_latency_s=args.embed_latency)
+
+    def ingest(size: int):
+        csv_path = workdir / f"catalog-{size}.csv"
+        synthetic_catalog(size, SOURCE_CSV).to_csv(csv_path, index=False)
+        with contextlib.redirect_stdout(io.StringIO()):
+            ingestion = DataIngestion(model_loader=loader, csv_path=str(csv_path))
+            documents = ingestion.transform_data()
+            ingestion.reindex(documents)
+        return documents
+
+    t = time.perf_counter()
+    ingest(args.catalog_size)
+    print(f"v0001: {args.catalog_size} products live after {time.perf_counter() - t:.1f}s", flush=True)
+
+    retriever = Retriever(model_loader=loader)
+    with contextlib.redirect_stdout(io.StringIO()):
+        retriever.load_retriever()
+    users = Users(retriever, args.concurrency, DEFAULT_QUERIES)
+    marks = {"start": time.perf_counter()}
+    with contextlib.redirect_stdout(io.StringIO()):
+        users.start()
+        time.sleep(args.steady)
+
+        marks["reindex"] = time.perf_counter()
+        documents = ingest(int(args.catalog_size * 1.5))
+        marks["promoted"] = time.perf_counter()
+        time.sleep(args.steady)
+
+        marks["broken"] = time.perf_counter()
+        reindexer = Reindexer.from_config(load_config(), loader.load_embeddings(), index=open_index(load_config()))
+        rng = np.random.default_rng(0)
+        try:
+            reindexer.run(documents, rng.standard_normal((len(documents), 256)))
+            rejected = None
+        except IndexValidationError as e:
+            rejected = str(e)
+        marks["rejected"] = time.perf_counter()
+        time.sleep(args.steady)
+
+        marks["rollback"] = time.perf_counter()
+        rolled_to = reindexer.rollback()
+        time.sleep(args.steady)
+        marks["end"] = time.perf_counter()
+        users.stop()
+
+    records = users.records
+    phases = [
+        ("steady v0001", marks["start"], marks["reindex"]),
+        ("building v0002", marks["reindex"], marks["promoted"]),
+        ("after promote", marks["promoted"], marks["broken"]),
+        ("broken v0003", marks["broken"], marks["rejected"]),
+        ("after reject", marks["rejected"], marks["rollback"]),
+        ("after rollback", marks["rollback"], marks["end"]),
+    ]
+    print(f"\n{'phase':16} {'requests':>8} {'errors':>6} {'empty':>5} {'p50 ms':>7} {'p95 ms':>7}  versions answering")
+    for name, start, end in phases:
+        s = phase_stats(records, start, end)
+        print(f"{name:16} {s['requests']:8d} {s['errors']:6d} {s['empty']:5d} {s['p50_ms'] or 0:7.1f} "
+              f"{s['p95_ms'] or 0:7.1f}  {s['versions']}")
+    build_s = marks["promoted"] - marks["reindex"]
+    lag = first_answer_from(records, "v0002", marks["promoted"])
+    print(f"\nv0002 ({len(documents)} products): build+validate+warm+promote {build_s:.1f}s; "
+          f"first answer from v0002 {lag if lag is None else round(lag, 2)}s after the promote "
+          f"(poll {args.poll}s, warmed while staged)")
+    print(f"broken v0003: {'rejected: ' + rejected if rejected else 'NOT rejected'}; "
+          f"on disk afterwards: {open_index(load_config()).versions()}")
+    rolled_lag = first_answer_from(records, rolled_to, marks["rollback"])
+    print(f"rollback to {rolled_to}: first answer {rolled_lag if rolled_lag is None else round(rolled_lag, 2)}s later")
+    shutil.rmtree(workdir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
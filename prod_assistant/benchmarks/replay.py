@@ -0,0 +1,321 @@
+"""
+Replay a recorded query log against the chat stack and report throughput, latency, error
+rates and per-node time, e.g. to size the k8 deployment (replicas: 2) on a laptop.
+
+Query log: JSONL, one request per line with a "query" (or "msg" / "question") field and an
+optional "session"; other lines are skipped. Without --log a built-in query mix is used.
+
+Targets:
+  agent   AgenticRAG.run_with_metadata in-process; --replicas independent agents, each with
+          its own pool of --workers threads, picked round robin like the k8 Service
+  http    POST /get on router.main.app in-process (admission control and 429s included),
+          or on a running server / port-forwarded Service with --url
+Backends for in-process targets: "fake" (offline fakes from benchmarks.fakes) or "live".
+Modes:
+  open    Poisson arrivals at --rate requests/s, independent of completions
+  closed  --concurrency users, each sending its next query after the previous response
+          plus an exponential think time with mean --think-time seconds
+
+    python -m prod_assistant.benchmarks.replay --mode open --rate 20 --requests 400 --replicas 2
+    python -m prod_assistant.benchmarks.replay --target http --mode closed --concurrency 16 --think-time 1
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import itertools
+import json
+import random
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+SOURCE_CSV = PROJECT_ROOT / "data" / "product_reviews.csv"
+SESSION_COOKIE = "session_id"  # router.main.SESSION_COOKIE
+HISTOGRAM_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, float("inf"))
+DEFAULT_QUERIES = (
+    "What is the price of iPhone 15?",
+    "Samsung Galaxy S24 reviews",
+    "Is the iPhone 15 Plus camera good?",
+    "price of iphone 15 pro max 256 GB",
+    "Compare Samsung S25 Ultra and S25 Plus",
+    "best phone with good battery life under 80000",
+    "hi, what can you do?",
+)
+
+
+@dataclass
+class Outcome:
+    started: float  # seconds after the replay started
+    latency: float
+    status: str  # "ok", "http_<code>" or the exception class name
+    coalesced: bool = False
+    llm_calls: int | None = None  # from the request budget; None when unknown
+
+
+def load_query_log(path: str | Path) -> list[dict]:
+    entries, skipped = [], 0
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                skipped += 1
+                continue
+            query = record.get("query") or record.get("msg") or record.get("question")
+            if not isinstance(query, str) or not query.strip():
+                skipped += 1
+                continue
+            entries.append({"query": query, "session": record.get("session")})
+    if skipped:
+        print(f"skipped {skipped} log lines without a query")
+    return entries
+
+
+# ---------- Targets ----------
+class AgentTarget:
+    """Calls AgenticRAG.run_with_metadata directly, round robin over independent replicas."""
+
+    def __init__(self, agents: list, workers: int):
+        self.agents = agents
+        self.pools = [ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"replica-{i}") for i in range(len(agents))]
+        self._next = itertools.count()
+
+    async def send(self, query: str, session: str) -> tuple[str, dict]:
+        i = next(self._next) % len(self.agents)
+        result = await asyncio.get_running_loop().run_in_executor(
+            self.pools[i], self.agents[i].run_with_metadata, query, session
+        )
+        return "ok", result["budget"]
+
+    async def close(self):
+        for pool in self.pools:
+            pool.shutdown(wait=False)
+
+
+class HttpTarget:
+    """POSTs to /get through the in-process ASGI app, or to a running server at `url`."""
+
+    def __init__(self, app=None, url: str | None = None, timeout: float = 120.0):
+        import httpx
+
+        transport = httpx.ASGITransport(app=app) if app is not None else None
+        self.client = httpx.AsyncClient(transport=transport, base_url=url or "http://replay", timeout=timeout)
+
+    async def send(self, query: str, session: str) -> tuple[str, dict]:
+        resp = await self.client.post("/get", data={"msg": query}, headers={"Cookie": f"{SESSION_COOKIE}={session}"})
+        if resp.status_code != 200:
+            return f"http_{resp.status_code}", {}
+        return "ok", json.loads(resp.headers.get("X-Request-Budget") or "{}")
+
+    async def close(self):
+        await self.client.aclose()
+
+
+def build_agents(replicas: int, backend: str, catalog_size: int, llm_latency_s: float, embed_latency_s: float) -> list:
+    from workflow.agentic_rag_workflow import AgenticRAG
+
+    if backend == "live":
+        return [AgenticRAG() for _ in range(replicas)]
+
+    from benchmarks.fakes import OfflineModelLoader, disable_inline_ragas, populated_vector_store
+    from retriever.retrieval import Retriever
+
+    disable_inline_ragas()
+    loader = OfflineModelLoader(llm_latency_s=llm_latency_s, embed_latency_s=embed_latency_s)
+    with contextlib.redirect_stdout(io.StringIO()):
+        # Replicas share one (read-only) catalog, like pods sharing the AstraDB collection
+        vstore = populated_vector_store(loader, catalog_size, SOURCE_CSV)
+    return [
+        AgenticRAG(retriever=Retriever(model_loader=loader, vstore=vstore), model_loader=loader)
+        for _ in range(replicas)
+    ]
+
+
+# ---------- Load drivers ----------
+async def _timed(target, query: str, session: str, t0: float, outcomes: list[Outcome]):
+    started = time.perf_counter()
+    try:
+        status, budget = await target.send(query, session)
+    except Exception as e:
+        status, budget = type(e).__name__, {}
+    outcomes.append(Outcome(started - t0, time.perf_counter() - started, status,
+                            bool(budget.get("coalesced")), budget.get("llm_calls")))
+
+
+async def run_open(target, entries: list[dict], rate: float, rng: random.Random) -> list[Outcome]:
+    """Open loop: Poisson arrivals at `rate`/s; arrivals never wait for completions."""
+    outcomes: list[Outcome] = []
+    t0 = time.perf_counter()
+    next_at = 0.0
+    tasks = []
+    for i, entry in enumerate(entries):
+        delay = next_at - (time.perf_counter() - t0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        session = entry["session"] or f"replay-{i}"
+        tasks.append(asyncio.create_task(_timed(target, entry["query"], session, t0, outcomes)))
+        next_at += rng.expovariate(rate)
+    await asyncio.gather(*tasks)
+    return outcomes
+
+
+async def run_closed(target, entries: list[dict], concurrency: int, think_time: float, rng: random.Random) -> list[Outcome]:
+    """Closed loop: `concurrency` users, each with one request in flight at a time."""
+    outcomes: list[Outcome] = []
+    t0 = time.perf_counter()
+    remaining = iter(entries)
+
+    async def user(u: int):
+        for entry in remaining:
+            await _timed(target, entry["query"], entry["session"] or f"replay-user-{u}", t0, outcomes)
+            if think_time > 0:
+                await asyncio.sleep(rng.expovariate(1.0 / think_time))
+
+    await asyncio.gather(*(user(u) for u in range(concurrency)))
+    return outcomes
+
+
+# ---------- Report ----------
+def summarize(outcomes: list[Outcome], wall_s: float, stages_ms: dict[str, float]) -> dict:
+    from benchmarks.metrics import percentile
+
+    ok = sorted(o.latency for o in outcomes if o.status == "ok")
+    statuses = Counter(o.status for o in outcomes)
+    histogram, lower = [], 0.0
+    for upper in HISTOGRAM_BUCKETS:
+        histogram.append({"le": upper, "count": sum(1 for v in ok if lower < v <= upper)})
+        lower = upper
+    latency = {}
+    if ok:
+        latency = {
+            "mean": round(sum(ok) / len(ok) * 1000, 1),
+            **{f"p{int(q * 100)}": round(percentile(ok, q) * 1000, 1) for q in (0.5, 0.9, 0.95, 0.99)},
+            "max": round(ok[-1] * 1000, 1),
+        }
+    last_arrival = max((o.started for o in outcomes), default=0.0)
+    # Answered by a fast path (catalog lookup) in their own run; coalesced followers are counted apart
+    llm_free = sum(1 for o in outcomes if o.status == "ok" and o.llm_calls == 0 and not o.coalesced)
+    return {
+        "requests": len(outcomes),
+        "ok": len(ok),
+        "wall_s": round(wall_s, 3),
+        "offered_rps": round(len(outcomes) / last_arrival, 2) if last_arrival else None,
+        "throughput_rps": round(len(ok) / wall_s, 2) if wall_s else 0.0,
+        "error_rate": round(1 - len(ok) / len(outcomes), 4) if outcomes else 0.0,
+        "statuses": dict(statuses),
+        "coalesced": sum(o.coalesced for o in outcomes),
+        "without_llm_call": llm_free,
+        "without_llm_call_share": round(llm_free / len(ok), 4) if ok else 0.0,
+        "latency_ms": latency,
+        "histogram": [{"le": "+Inf" if b["le"] == float("inf") else b["le"], "count": b["count"]} for b in histogram],
+        "stages_ms_per_request": stages_ms,
+    }
+
+
+def print_report(summary: dict, replicas: int | None):
+    print(f"\nrequests {summary['requests']}  ok {summary['ok']}  statuses {summary['statuses']}  "
+          f"coalesced {summary['coalesced']}  without an LLM call {summary['without_llm_call']} "
+          f"({summary['without_llm_call_share']:.1%} of ok)")
+    print(f"wall {summary['wall_s']}s  offered {summary['offered_rps']} req/s  "
+          f"throughput {summary['throughput_rps']} req/s  error rate {summary['error_rate']:.1%}")
+    if replicas:
+        print(f"per replica: {summary['throughput_rps'] / replicas:.2f} req/s over {replicas} replica(s)")
+    if summary["latency_ms"]:
+        print("latency ms: " + "  ".join(f"{k}={v}" for k, v in summary["latency_ms"].items()))
+        peak = max(b["count"] for b in summary["histogram"]) or 1
+        for b in summary["histogram"]:
+            bound = b["le"] if b["le"] == "+Inf" else f"{b['le']}s"
+            print(f"  <= {bound:>6} {b['count']:6d} {'#' * round(40 * b['count'] / peak)}")
+    if summary["stages_ms_per_request"]:
+        print("per-node ms/request (llm: rows sum every call, so parallel filter calls can exceed the node):")
+        for stage, ms in sorted(summary["stages_ms_per_request"].items(), key=lambda kv: -kv[1]):
+            print(f"  {stage:45} {ms:10.1f}")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Replay a query log against AgenticRAG or /get")
+    parser.add_argument("--log", help="JSONL query log (default: built-in query mix)")
+    parser.add_argument("--requests", type=int, help="Requests to send; the log is cycled (default: log length, or 200)")
+    parser.add_argument("--target", choices=("agent", "http"), default="agent")
+    parser.add_argument("--url", help="Base URL of a running server (http target); default is the in-process app")
+    parser.add_argument("--backend", choices=("fake", "live"), default="fake", help="Backends for in-process targets")
+    parser.add_argument("--mode", choices=("open", "closed"), default="open")
+    parser.add_argument("--rate", type=float, default=10.0, help="Open loop: mean arrivals per second")
+    parser.add_argument("--concurrency", type=int, default=8, help="Closed loop: simultaneous users")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Closed loop: mean seconds between a user's requests")
+    parser.add_argument("--replicas", type=int, default=1, help="Agent target: independent workers (k8 replicas)")
+    parser.add_argument("--workers", type=int, default=40, help="Agent target: threads per replica (uvicorn threadpool size)")
+    parser.add_argument("--catalog-size", type=int, default=1000, help="Fake backend: products in the in-memory store")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="Fake backend: seconds per LLM call")
+    parser.add_argument("--embed-latency", type=float, default=0.05, help="Fake backend: seconds per embedding call")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="Write the summary as JSON")
+    args = parser.parse_args(argv)
+
+    in_process = not args.url
+    if in_process and args.backend == "fake":
+        from benchmarks.offline_env import use_offline_environment
+        use_offline_environment()
+    if args.target == "http" and in_process and args.replicas != 1:
+        parser.error("--replicas > 1 needs --target agent (the in-process app is a single worker)")
+
+    entries = load_query_log(args.log) if args.log else [{"query": q, "session": None} for q in DEFAULT_QUERIES]
+    if not entries:
+        parser.error(f"no queries found in {args.log}")
+    count = args.requests or (len(entries) if args.log else 200)
+    entries = list(itertools.islice(itertools.cycle(entries), count))
+
+    if args.target == "agent":
+        target = AgentTarget(
+            build_agents(args.replicas, args.backend, args.catalog_size, args.llm_latency, args.embed_latency),
+            workers=args.workers,
+        )
+    elif in_process:
+        import router.main as api
+        api._rag_agent = build_agents(1, args.backend, args.catalog_size, args.llm_latency, args.embed_latency)[0]
+        target = HttpTarget(app=api.app)
+    else:
+        target = HttpTarget(url=args.url)
+
+    from benchmarks.metrics import stage_deltas_ms, stage_totals
+
+    rng = random.Random(args.seed)
+
+    async def drive():
+        try:
+            if args.mode == "open":
+                return await run_open(target, entries, args.rate, rng)
+            return await run_closed(target, entries, args.concurrency, args.think_time, rng)
+        finally:
+            await target.close()
+
+    print(f"replaying {count} requests: target={args.target} mode={args.mode} "
+          + (f"rate={args.rate}/s" if args.mode == "open" else f"concurrency={args.concurrency} think={args.think_time}s"),
+          flush=True)
+    before = stage_totals() if in_process else {}
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        outcomes = asyncio.run(drive())
+    wall_s = time.perf_counter() - started
+    stages = stage_deltas_ms(before, stage_totals(), len(outcomes)) if in_process else {}
+
+    summary = summarize(outcomes, wall_s, stages)
+    summary["config"] = {k: (str(v) if isinstance(v, Path) else v) for k, v in vars(args).items()}
+    print_report(summary, args.replicas if args.target == "agent" else None)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(summary, indent=2))
+        print(f"\nsummary written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
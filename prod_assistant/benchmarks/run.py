@@ -0,0 +1,252 @@
+"""
+Offline benchmark of the RAG stack: fake LLMs, hashing embeddings and an in-memory vector
+store are injected through ModelLoader / Retriever / DataIngestion, so runs need no API keys
+or network and are comparable across commits.
+
+For each catalog size it ingests a synthetic catalog with DataIngestion.run_pipeline, then
+times AgenticRAG.run, normal_generation_workflow.invoke_chain and the MCP get_product_info
+tool against it. Per-stage times come from the node / LLM latency histograms.
+
+    python -m prod_assistant.benchmarks.run --sizes 100 1000 5000 --iterations 20
+    python -m prod_assistant.benchmarks.run --compare bench_results/<old>.json bench_results/<new>.json
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+from benchmarks.offline_env import use_offline_environment
+
+use_offline_environment()
+
+from benchmarks.fakes import OfflineModelLoader, disable_inline_ragas, in_memory_vector_store, synthetic_catalog
+from benchmarks.metrics import percentile, stage_deltas_ms, stage_totals
+from retriever.retrieval import Retriever
+
+DEFAULT_SIZES = (100, 1000, 5000)
+SOURCE_CSV = PROJECT_ROOT / "data" / "product_reviews.csv"
+RESULTS_DIR = PROJECT_ROOT / "bench_results"
+QUERIES = (
+    "What is the price of iPhone 15?",
+    "Samsung Galaxy S24 reviews",
+    "Is the iPhone 15 Plus camera good?",
+    "price of iphone 15 pro max 256 GB",
+)
+
+
+# ---------- Measurement helpers ----------
+def _summary(samples: list[float], before: dict[str, float], after: dict[str, float]) -> dict:
+    ordered = sorted(samples)
+    return {
+        "runs": len(samples),
+        "mean_ms": round(sum(samples) / len(samples) * 1000, 3),
+        "p50_ms": round(percentile(ordered, 0.5) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 0.95) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+        "stages_ms": stage_deltas_ms(before, after, len(samples)),
+    }
+
+
+def _measure(fn, iterations: int) -> dict:
+    """Warm up once, then time `fn(i)` over `iterations` calls with workflow prints silenced."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        fn(-1)
+        before = stage_totals()
+        samples = []
+        for i in range(iterations):
+            started = time.perf_counter()
+            fn(i)
+            samples.append(time.perf_counter() - started)
+        after = stage_totals()
+    return _summary(samples, before, after)
+
+
+# ---------- Scenarios ----------
+def bench_ingestion(size: int, loader: OfflineModelLoader, workdir: Path):
+    """DataIngestion.run_pipeline over a synthetic catalog; returns (result, populated vector store)."""
+    from prod_assistant.etl.data_ingestion import DataIngestion
+
+    csv_path = workdir / f"catalog_{size}.csv"
+    synthetic_catalog(size, SOURCE_CSV).to_csv(csv_path, index=False)
+    vstore = in_memory_vector_store(loader)
+    stages: dict[str, float] = {}
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        started = time.perf_counter()
+        ingestion = DataIngestion(model_loader=loader, csv_path=str(csv_path), vector_store=vstore)
+        stages["load_csv"] = time.perf_counter() - started
+        for name in ("transform_data", "store_in_vector_db"):
+            method = getattr(ingestion, name)
+
+            def timed(*args, _method=method, _name=name, **kwargs):
+                t0 = time.perf_counter()
+                try:
+                    return _method(*args, **kwargs)
+                finally:
+                    stages[_name] = time.perf_counter() - t0
+
+            setattr(ingestion, name, timed)
+        ingestion.run_pipeline()
+        elapsed = time.perf_counter() - started
+
+    stages["sample_search"] = elapsed - sum(stages.values())
+    result = {
+        "runs": 1,
+        "total_ms": round(elapsed * 1000, 3),
+        "docs_per_s": round(size / elapsed, 1),
+        "stages_ms": {k: round(v * 1000, 3) for k, v in stages.items()},
+    }
+    return result, vstore
+
+
+def load_queries(path: str | Path) -> tuple[str, ...]:
+    """Query texts from a JSONL golden set or synthetic testset ("query" or "question" per line)."""
+    with open(path, encoding="utf-8") as f:
+        items = [json.loads(line) for line in f if line.strip()]
+    return tuple(item.get("query") or item["question"] for item in items)
+
+
+def bench_agentic_rag(retriever: Retriever, loader: OfflineModelLoader, iterations: int) -> dict:
+    from workflow.agentic_rag_workflow import AgenticRAG
+
+    agent = AgenticRAG(retriever=retriever, model_loader=loader)
+    # A fresh thread per call keeps history (and its trimming) out of the numbers
+    return _measure(lambda i: agent.run(QUERIES[i % len(QUERIES)], thread_id=f"bench-{i}"), iterations)
+
+
+def bench_invoke_chain(retriever: Retriever, loader: OfflineModelLoader, iterations: int) -> dict:
+    import workflow.normal_generation_workflow as normal_generation
+
+    normal_generation.retriever_obj = retriever
+    normal_generation.model_loader = loader
+    normal_generation.reset_chain()
+    return _measure(lambda i: normal_generation.invoke_chain(QUERIES[i % len(QUERIES)]), iterations)
+
+
+def bench_mcp_get_product_info(retriever: Retriever, iterations: int) -> dict:
+    import mcp_servers.product_search_server as server
+    from observability.instrumentation import METRICS_CALLBACK
+
+    server.get_retriever = lambda: retriever
+    server.exported_callbacks = lambda: [METRICS_CALLBACK]  # in-process: this registry is the one reported
+    loop = asyncio.new_event_loop()
+    try:
+        return _measure(lambda i: loop.run_until_complete(server.get_product_info(QUERIES[i % len(QUERIES)])), iterations)
+    finally:
+        loop.close()
+
+
+def run(sizes: list[int], iterations: int, llm_latency_s: float, embed_latency_s: float,
+        queries: str | None = None) -> dict:
+    global QUERIES
+    if queries:
+        QUERIES = load_queries(queries)
+    disable_inline_ragas()
+    loader = OfflineModelLoader(llm_latency_s=llm_latency_s, embed_latency_s=embed_latency_s)
+    results: dict[str, dict] = {"ingestion": {}, "agentic_rag": {}, "invoke_chain": {}, "mcp_get_product_info": {}}
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in sizes:
+            print(f"catalog size {size}: ingesting ...", flush=True)
+            results["ingestion"][str(size)], vstore = bench_ingestion(size, loader, Path(workdir))
+            retriever = Retriever(model_loader=loader, vstore=vstore)
+            print(f"catalog size {size}: querying ...", flush=True)
+            results["agentic_rag"][str(size)] = bench_agentic_rag(retriever, loader, iterations)
+            results["invoke_chain"][str(size)] = bench_invoke_chain(retriever, loader, iterations)
+            results["mcp_get_product_info"][str(size)] = bench_mcp_get_product_info(retriever, iterations)
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "sizes": sizes,
+            "iterations": iterations,
+            "llm_latency_s": llm_latency_s,
+            "embed_latency_s": embed_latency_s,
+            "queries": queries or "builtin",
+            "inline_ragas": False,
+        },
+        "results": results,
+    }
+
+
+def _git_commit() -> str:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT, capture_output=True, text=True)
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=PROJECT_ROOT,
+                               capture_output=True, text=True).stdout.strip()
+        return out.stdout.strip() + ("-dirty" if dirty else "") if out.returncode == 0 else "unknown"
+    except OSError:
+        return "unknown"
+
+
+# ---------- Reporting ----------
+def _headline_ms(entry: dict) -> float:
+    return entry.get("p50_ms", entry.get("total_ms"))
+
+
+def print_report(report: dict):
+    print(f"\n{'scenario':22} {'size':>6} {'p50 ms':>10} {'p95 ms':>10}  top stages (ms/run)")
+    for scenario, by_size in report["results"].items():
+        for size, entry in by_size.items():
+            top = sorted(entry["stages_ms"].items(), key=lambda kv: -kv[1])[:3]
+            stages = ", ".join(f"{k}={v:.1f}" for k, v in top)
+            p95 = f"{entry['p95_ms']:.2f}" if "p95_ms" in entry else "-"
+            print(f"{scenario:22} {size:>6} {_headline_ms(entry):10.2f} {p95:>10}  {stages}")
+
+
+def compare(old_path: str, new_path: str, threshold: float) -> int:
+    """Print per-scenario p50 (ingestion: total) ratios; non-zero exit if any regressed beyond `threshold`."""
+    old, new = (json.loads(Path(p).read_text()) for p in (old_path, new_path))
+    print(f"{old['meta']['commit']} -> {new['meta']['commit']} (regression threshold +{threshold:.0%})")
+    print(f"{'scenario':22} {'size':>6} {'old ms':>10} {'new ms':>10} {'change':>8}")
+    regressions = 0
+    for scenario, by_size in new["results"].items():
+        for size, entry in by_size.items():
+            previous = old["results"].get(scenario, {}).get(size)
+            if not previous:
+                continue
+            before, after = _headline_ms(previous), _headline_ms(entry)
+            change = after / before - 1 if before else 0.0
+            flag = "  REGRESSION" if change > threshold else ""
+            regressions += bool(flag)
+            print(f"{scenario:22} {size:>6} {before:10.2f} {after:10.2f} {change:+8.1%}{flag}")
+    return 1 if regressions else 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Offline RAG stack benchmark (fake LLM / embeddings / vector store)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="Catalog sizes to ingest and query")
+    parser.add_argument("--iterations", type=int, default=20, help="Timed calls per scenario and size")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Seconds each fake LLM call sleeps")
+    parser.add_argument("--embed-latency", type=float, default=0.0, help="Seconds each fake embedding call sleeps")
+    parser.add_argument("--queries", help="JSONL of queries to cycle through (golden set or synthetic testset)")
+    parser.add_argument("--output", type=Path, help="JSON path (default: bench_results/<timestamp>-<commit>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="Compare two result files instead of running")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative p50 slowdown counted as a regression")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        return compare(*args.compare, threshold=args.threshold)
+
+    report = run(args.sizes, args.iterations, args.llm_latency, args.embed_latency, args.queries)
+    output = args.output or RESULTS_DIR / f"{datetime.now():%Y%m%d-%H%M%S}-{report['meta']['commit']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print_report(report)
+    print(f"\nresults written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,177 @@
+"""
+Throughput vs gunicorn workers for the production serving profile (router/gunicorn_conf.py)
+with the offline fakes (benchmarks/serving_app.py): for each worker count it starts gunicorn
+on a local port, drives POST /get with a closed loop of --concurrency users, then measures
+memory (RSS, and PSS, which splits pages shared copy-on-write between processes) and the
+SIGTERM drain time.
+
+Each request gets a unique query so coalescing does not merge them. The fake LLM sleeps
+(--llm-latency), so one worker already overlaps that wait across its threadpool; extra workers
+add throughput for the CPU-bound part (graph, retrieval, context building), which needs as
+many cores as workers.
+
+    python -m prod_assistant.benchmarks.serving --workers 1 2 4 --concurrency 32 --requests 400
+    python -m prod_assistant.benchmarks.serving --workers 4 --no-preload   # memory without preload
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+from datetime import datetime
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+PACKAGE_ROOT = PROJECT_ROOT / "prod_assistant"
+
+GUNICORN_CONF = PACKAGE_ROOT / "router" / "gunicorn_conf.py"
+RESULTS_DIR = PROJECT_ROOT / "bench_results"
+
+
+def _children(pid: int) -> list[int]:
+    try:
+        return [int(p) for p in Path(f"/proc/{pid}/task/{pid}/children").read_text().split()]
+    except OSError:
+        return []
+
+
+def start_server(workers: int, port: int, preload: bool, args) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "WEB_CONCURRENCY": str(workers),
+        "BIND": f"127.0.0.1:{port}",
+        "PRELOAD": "true" if preload else "false",
+        "BENCH_CATALOG_SIZE": str(args.catalog_size),
+        "BENCH_LLM_LATENCY": str(args.llm_latency),
+        "BENCH_EMBED_LATENCY": str(args.embed_latency),
+    }
+    env.pop("PROMETHEUS_MULTIPROC_DIR", None)  # fresh metrics directory per run
+    cmd = [sys.executable, "-m", "gunicorn", "-c", str(GUNICORN_CONF), "--access-logfile", "/dev/null",
+           "benchmarks.serving_app:app"]
+    # Workflow prints and JSON logs would dominate the terminal; keep them for debugging
+    log_file = open(RESULTS_DIR / f"serving-{workers}w.log", "w")
+    return subprocess.Popen(cmd, cwd=PROJECT_ROOT, env=env, stdout=log_file, stderr=subprocess.STDOUT)
+
+
+def wait_ready(proc: subprocess.Popen, url: str, workers: int, timeout: float) -> float:
+    """Seconds until all workers are forked and /healthz answers."""
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        if proc.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with {proc.returncode}; see bench_results/serving-{workers}w.log")
+        if len(_children(proc.pid)) >= workers:
+            try:
+                with urllib.request.urlopen(f"{url}/healthz", timeout=2) as resp:
+                    if resp.status == 200:
+                        return time.perf_counter() - started
+            except OSError:
+                pass
+        time.sleep(0.2)
+    raise TimeoutError(f"server not ready after {timeout}s")
+
+
+def memory(pid: int) -> dict:
+    from router.serving import pss_mb, rss_mb
+
+    workers = _children(pid)
+    return {
+        "master_rss_mb": round(rss_mb(pid), 1),
+        "worker_rss_mb": round(sum(rss_mb(w) for w in workers) / max(1, len(workers)), 1),
+        "total_pss_mb": round(pss_mb(pid) + sum(pss_mb(w) for w in workers), 1),
+    }
+
+
+async def drive(url: str, concurrency: int, requests: int) -> tuple[list, float]:
+    from benchmarks.replay import DEFAULT_QUERIES, HttpTarget, run_closed
+
+    entries = [{"query": f"{DEFAULT_QUERIES[i % len(DEFAULT_QUERIES)]} (request {i})", "session": None}
+               for i in range(requests)]
+    target = HttpTarget(url=url)
+    started = time.perf_counter()
+    try:
+        outcomes = await run_closed(target, entries, concurrency, 0.0, random.Random(0))
+    finally:
+        await target.close()
+    return outcomes, time.perf_counter() - started
+
+
+def bench(workers: int, args) -> dict:
+    from benchmarks.replay import summarize
+
+    url = f"http://127.0.0.1:{args.port}"
+    proc = start_server(workers, args.port, not args.no_preload, args)
+    try:
+        boot_s = wait_ready(proc, url, workers, args.boot_timeout)
+        asyncio.run(drive(url, args.concurrency, min(args.requests, 4 * args.concurrency)))  # warm-up
+        outcomes, wall_s = asyncio.run(drive(url, args.concurrency, args.requests))
+        mem = memory(proc.pid)
+        drain_started = time.perf_counter()
+        proc.send_signal(signal.SIGTERM)
+        proc.wait(timeout=120)
+        drain_s = time.perf_counter() - drain_started
+    finally:
+        if proc.poll() is None:
+            for pid in _children(proc.pid):  # workers outlive a SIGKILLed master
+                os.kill(pid, signal.SIGKILL)
+            proc.kill()
+            proc.wait()
+    summary = summarize(outcomes, wall_s, {})
+    return {
+        "workers": workers,
+        "boot_s": round(boot_s, 2),
+        "throughput_rps": summary["throughput_rps"],
+        "latency_ms": summary["latency_ms"],
+        "statuses": summary["statuses"],
+        "memory": mem,
+        "sigterm_exit_s": round(drain_s, 2),
+        "exit_code": proc.returncode,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Throughput vs gunicorn workers with the offline fakes")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--concurrency", type=int, default=32, help="Closed-loop users")
+    parser.add_argument("--requests", type=int, default=400, help="Timed requests per worker count")
+    parser.add_argument("--catalog-size", type=int, default=1000)
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Seconds each fake LLM call sleeps")
+    parser.add_argument("--embed-latency", type=float, default=0.0)
+    parser.add_argument("--no-preload", action="store_true", help="Each worker imports the app itself")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--boot-timeout", type=float, default=120.0)
+    parser.add_argument("--output", type=Path, help="JSON path (default: bench_results/serving-<timestamp>.json)")
+    args = parser.parse_args(argv)
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)  # one INFO line per request otherwise
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    cores = os.cpu_count()
+    print(f"{cores} CPU core(s); preload={'off' if args.no_preload else 'on'} "
+          f"concurrency={args.concurrency} requests={args.requests} llm_latency={args.llm_latency}s", flush=True)
+    results = []
+    for workers in args.workers:
+        print(f"{workers} worker(s) ...", flush=True)
+        results.append(bench(workers, args))
+
+    base = results[0]["throughput_rps"] or 1.0
+    print(f"\n{'workers':>7} {'req/s':>8} {'speedup':>8} {'p50 ms':>8} {'p95 ms':>8} {'worker RSS':>11} "
+          f"{'total PSS':>10} {'SIGTERM->exit':>14}  statuses")
+    for r in results:
+        lat = r["latency_ms"]
+        print(f"{r['workers']:>7} {r['throughput_rps']:8.2f} {r['throughput_rps'] / base:7.2f}x "
+              f"{lat.get('p50', 0):8.1f} {lat.get('p95', 0):8.1f} {r['memory']['worker_rss_mb']:9.1f}MB "
+              f"{r['memory']['total_pss_mb']:8.1f}MB {r['sigterm_exit_s']:13.2f}s  {r['statuses']}")
+    output = args.output or RESULTS_DIR / f"serving-{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.write_text(json.dumps({"cpu_count": cores, "args": {k: str(v) for k, v in vars(args).items()},
+                                  "results": results}, indent=2))
+    print(f"\nresults written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,46 @@
+"""
+router.main:app with the offline fakes, for serving benchmarks under gunicorn:
+
+    gunicorn -c prod_assistant/router/gunicorn_conf.py benchmarks.serving_app:app
+
+BENCH_CATALOG_SIZE, BENCH_LLM_LATENCY and BENCH_EMBED_LATENCY size the fake backend. The fake
+models and the in-memory catalog are built at import, i.e. once in the gunicorn master when the
+app is preloaded, and shared by the forked workers; each worker builds its own agent (and
+checkpointer connection) after the fork, like router.main.get_rag_agent.
+"""
+import contextlib
+import io
+import os
+import threading
+
+from benchmarks.offline_env import use_offline_environment
+
+use_offline_environment()
+
+import router.main as api  # noqa: E402
+from benchmarks.fakes import OfflineModelLoader, disable_inline_ragas, populated_vector_store  # noqa: E402
+from benchmarks.replay import SOURCE_CSV  # noqa: E402
+
+disable_inline_ragas()
+_loader = OfflineModelLoader(
+    llm_latency_s=float(os.getenv("BENCH_LLM_LATENCY", "0.05")),
+    embed_latency_s=float(os.getenv("BENCH_EMBED_LATENCY", "0.0")),
+)
+with contextlib.redirect_stdout(io.StringIO()):
+    _vstore = populated_vector_store(_loader, int(os.getenv("BENCH_CATALOG_SIZE", "1000")), SOURCE_CSV)
+_agent_lock = threading.Lock()
+
+
+def get_rag_agent():
+    with _agent_lock:
+        if api._rag_agent is None:
+            from retriever.retrieval import Retriever
+            from workflow.agentic_rag_workflow import AgenticRAG
+
+            api._rag_agent = AgenticRAG(retriever=Retriever(model_loader=_loader, vstore=_vstore),
+                                        model_loader=_loader)
+    return api._rag_agent
+
+
+api.get_rag_agent = get_rag_agent
+app = api.app
@@ -0,0 +1,170 @@
+"""
+Worker startup time and memory with the catalog snapshot (utils/snapshot.py) vs the CSV.
+
+A synthetic catalog of --catalog-size products (benchmarks.fakes, --dim dimensional offline
+embeddings) is ingested once into a temporary snapshot; then, for each mode, --workers
+processes start side by side like gunicorn workers and report their startup time, and the
+parent reads each worker's RSS, PSS (shared pages split between the workers) and private memory:
+
+  csv       ProductCatalog.from_csv on the scraper CSV; retrieval stays remote (AstraDB), so the
+            worker holds no vectors
+  snapshot  CatalogSnapshot + ProductCatalog.from_snapshot + SnapshotVectorStore, with one
+            search so the whole embedding matrix is paged in
+  in-ram    the same, with the embedding matrix copied into process memory instead of mapped
+            (what a per-worker in-process vector store costs)
+
+    python -m prod_assistant.benchmarks.snapshot --catalog-size 20000 --dim 768 --workers 4
+"""
+import argparse
+import contextlib
+import io
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+SOURCE_CSV = PROJECT_ROOT / "data" / "product_reviews.csv"
+MODES = ("csv", "snapshot", "in-ram")
+
+
+def private_mb(pid: int) -> float:
+    """Private_Clean + Private_Dirty in MiB: what this process alone keeps resident."""
+    total = 0
+    for line in Path(f"/proc/{pid}/smaps_rollup").read_text().splitlines():
+        if line.startswith(("Private_Clean:", "Private_Dirty:")):
+            total += int(line.split()[1])
+    return total / 1024
+
+
+def build(workdir: Path, size: int, dim: int) -> tuple[Path, Path]:
+    """Synthetic catalog CSV plus its snapshot, written through DataIngestion."""
+    from benchmarks.fakes import HashingEmbeddings, OfflineModelLoader, synthetic_catalog
+    from observability.instrumentation import InstrumentedEmbeddings
+    from prod_assistant.etl.data_ingestion import DataIngestion
+
+    class Loader(OfflineModelLoader):
+        def load_embeddings(self):
+            return InstrumentedEmbeddings(HashingEmbeddings(dims=dim))
+
+    csv_path = workdir / "catalog.csv"
+    synthetic_catalog(size, SOURCE_CSV).to_csv(csv_path, index=False)
+    with contextlib.redirect_stdout(io.StringIO()):
+        ingestion = DataIngestion(model_loader=Loader(), csv_path=str(csv_path))
+        ingestion.config = {**ingestion.config, "snapshot": {"dir": str(workdir / "snapshots"), "keep": 1}}
+        ingestion.write_snapshot(ingestion.transform_data())
+    return csv_path, workdir / "snapshots"
+
+
+def probe(mode: str, csv_path: str, snapshot_root: str, dim: int):
+    """Runs in a worker process: start up like the app would, report, wait for the parent."""
+    started = time.perf_counter()
+    from benchmarks.fakes import HashingEmbeddings
+    from retriever.catalog import ProductCatalog
+    from retriever.snapshot_store import SnapshotVectorStore
+    from utils.snapshot import CatalogSnapshot
+    imported = time.perf_counter()
+
+    if mode == "csv":
+        catalog = ProductCatalog.from_csv(csv_path)
+        search_ms = None
+    else:
+        snapshot = CatalogSnapshot.open(snapshot_root)
+        if mode == "in-ram":
+            snapshot.embeddings = snapshot.embeddings.copy()
+        catalog = ProductCatalog.from_snapshot(snapshot)
+        store = SnapshotVectorStore(snapshot, HashingEmbeddings(dims=dim))
+        t = time.perf_counter()
+        store.similarity_search("iphone 15 pro camera", k=4)
+        search_ms = (time.perf_counter() - t) * 1000
+    ready = time.perf_counter()
+    assert catalog.answer("price of iphone 15 pro max 256 GB")
+    print(json.dumps({
+        "import_s": round(imported - started, 3),
+        "load_s": round(ready - imported, 3),
+        "search_ms": None if search_ms is None else round(search_ms, 1),
+        "products": len(catalog),
+    }), flush=True)
+    sys.stdin.readline()  # hold the mappings while the parent measures
+
+
+def _report(proc: subprocess.Popen) -> dict:
+    for line in proc.stdout:  # skip the structured log lines
+        if line.startswith('{"import_s"'):
+            return json.loads(line)
+    raise RuntimeError(f"probe exited with {proc.wait()}")
+
+
+def run_mode(mode: str, args, csv_path: Path, snapshot_root: Path) -> dict:
+    from router.serving import pss_mb, rss_mb
+
+    cmd = [sys.executable, "-m", "prod_assistant.benchmarks.snapshot", "--probe", mode, "--csv", str(csv_path),
+           "--snapshot-dir", str(snapshot_root), "--dim", str(args.dim)]
+    procs = [subprocess.Popen(cmd, cwd=PROJECT_ROOT, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                              stderr=subprocess.DEVNULL, text=True)
+             for _ in range(args.workers)]
+    try:
+        reports = [_report(p) for p in procs]
+        memory = [(rss_mb(p.pid), pss_mb(p.pid), private_mb(p.pid)) for p in procs]
+    finally:
+        for p in procs:
+            p.stdin.close()
+            p.wait()
+    n = len(procs)
+    return {
+        "mode": mode,
+        "workers": n,
+        "import_s": round(sum(r["import_s"] for r in reports) / n, 3),
+        "load_s": round(sum(r["load_s"] for r in reports) / n, 3),
+        "search_ms": reports[0]["search_ms"],
+        "rss_mb": round(sum(m[0] for m in memory) / n, 1),
+        "pss_mb": round(sum(m[1] for m in memory) / n, 1),
+        "private_mb": round(sum(m[2] for m in memory) / n, 1),
+        "total_pss_mb": round(sum(m[1] for m in memory), 1),
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Worker startup and memory: catalog snapshot vs CSV")
+    parser.add_argument("--catalog-size", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=768, help="Embedding dimension (text-embedding-004: 768)")
+    parser.add_argument("--workers", type=int, default=4, help="Worker processes per mode, started side by side")
+    parser.add_argument("--output", type=Path, help="Write the results as JSON")
+    parser.add_argument("--probe", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--csv", help=argparse.SUPPRESS)
+    parser.add_argument("--snapshot-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.probe:
+        probe(args.probe, args.csv, args.snapshot_dir, args.dim)
+        return 0
+
+    from benchmarks.offline_env import use_offline_environment
+    use_offline_environment()
+    with tempfile.TemporaryDirectory() as workdir:
+        t = time.perf_counter()
+        csv_path, snapshot_root = build(Path(workdir), args.catalog_size, args.dim)
+        files = {p.name: round(p.stat().st_size / 2**20, 1) for p in [csv_path, *next(snapshot_root.glob("v*")).iterdir()]}
+        print(f"built {args.catalog_size} products x {args.dim} dims in {time.perf_counter() - t:.1f}s; "
+              f"file MiB: {files}", flush=True)
+        results = [run_mode(mode, args, csv_path, snapshot_root) for mode in MODES]
+
+    print(f"\n{'mode':>8} {'import s':>9} {'load s':>7} {'search ms':>10} {'RSS/worker':>11} "
+          f"{'PSS/worker':>11} {'private':>8} {'total PSS':>10}")
+    for r in results:
+        search = "-" if r["search_ms"] is None else f"{r['search_ms']:.1f}"
+        print(f"{r['mode']:>8} {r['import_s']:9.2f} {r['load_s']:7.3f} {search:>10} {r['rss_mb']:9.1f}MB "
+              f"{r['pss_mb']:9.1f}MB {r['private_mb']:6.1f}MB {r['total_pss_mb']:8.1f}MB")
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps({"args": {k: str(v) for k, v in vars(args).items()}, "files_mb": files,
+                                           "results": results}, indent=2))
+        print(f"\nresults written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,150 @@
+"""
+Durable queue of scraped product records between FlipkartScraper and the ingestion worker
+(etl/ingestion_worker.py), in one local SQLite file (WAL mode, so the scraper can append while
+the worker reads):
+
+  changes  one row per emitted record. A worker leases a batch (leased_until), and the rows are
+           deleted only when the batch is searchable (ack). A crashed worker's lease expires
+           and the batch is delivered again: at-least-once, so applying a batch must be idempotent.
+           Records failing `max_attempts` deliveries stay behind as dead letters.
+  indexed  content hash per document id as last upserted (or as built by a full re-index), so
+           unchanged re-scrapes are not embedded again; written in the same transaction as the ack.
+  meta     the index version `indexed` describes; a different live version (full re-index,
+           rollback) invalidates the hashes.
+"""
+import contextlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import NamedTuple
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+
+class Change(NamedTuple):
+    seq: int
+    record: dict
+    scraped_at: float
+    attempts: int
+
+
+class ChangeQueue:
+    """SQLite-backed change queue; safe to share between threads and processes."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS changes (seq INTEGER PRIMARY KEY AUTOINCREMENT, payload TEXT NOT NULL, "
+            "scraped_at REAL NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, leased_until REAL NOT NULL DEFAULT 0, "
+            "error TEXT)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS indexed (doc_id TEXT PRIMARY KEY, content_hash TEXT NOT NULL, "
+            "indexed_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+
+    @classmethod
+    def from_config(cls, config: dict) -> "ChangeQueue":
+        path = Path(config.get("cdc", {}).get("queue_path", "data/cdc/changes.sqlite"))
+        return cls(path if path.is_absolute() else PROJECT_ROOT / path)
+
+    def close(self):
+        self._db.close()
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._db
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+
+    # ---------- Producer ----------
+    def put(self, records: list[dict]) -> int:
+        """Append records (scraper rows as dicts); `scraped_at` defaults to now. Returns the count."""
+        now = time.time()
+        rows = [(json.dumps(r, ensure_ascii=False, default=str), float(r.get("scraped_at") or now)) for r in records]
+        with self._transaction() as db:
+            db.executemany("INSERT INTO changes (payload, scraped_at) VALUES (?, ?)", rows)
+        return len(rows)
+
+    # ---------- Consumer ----------
+    def lease(self, limit: int, lease_seconds: float, max_attempts: int = 5) -> list[Change]:
+        """Claim up to `limit` of the oldest records that are not leased (or whose lease expired)."""
+        now = time.time()
+        with self._transaction() as db:
+            rows = db.execute(
+                "SELECT seq, payload, scraped_at, attempts FROM changes "
+                "WHERE leased_until < ? AND attempts < ? ORDER BY seq LIMIT ?",
+                (now, max_attempts, limit),
+            ).fetchall()
+            db.executemany(
+                "UPDATE changes SET leased_until = ?, attempts = attempts + 1 WHERE seq = ?",
+                [(now + lease_seconds, seq) for seq, *_ in rows],
+            )
+        return [Change(seq, json.loads(payload), scraped_at, attempts + 1) for seq, payload, scraped_at, attempts in rows]
+
+    def ack(self, seqs: list[int], indexed: dict[str, str] | None = None, version: str | None = None):
+        """Delete a processed batch and record the content hashes it upserted, atomically."""
+        now = time.time()
+        with self._transaction() as db:
+            db.executemany(
+                "INSERT OR REPLACE INTO indexed (doc_id, content_hash, indexed_at) VALUES (?, ?, ?)",
+                [(doc_id, digest, now) for doc_id, digest in (indexed or {}).items()],
+            )
+            db.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('version', ?)", (version,))
+            db.executemany("DELETE FROM changes WHERE seq = ?", [(s,) for s in seqs])
+
+    def release(self, seqs: list[int], error: str = ""):
+        """Give a failed batch back for redelivery (its attempts were counted at lease time)."""
+        with self._transaction() as db:
+            db.executemany("UPDATE changes SET leased_until = 0, error = ? WHERE seq = ?", [(error[:500], s) for s in seqs])
+
+    # ---------- Change detection ----------
+    def indexed_hashes(self, doc_ids: list[str]) -> dict[str, str]:
+        found = {}
+        with self._lock:
+            for start in range(0, len(doc_ids), 500):  # stay below SQLite's bound-parameter limit
+                chunk = doc_ids[start:start + 500]
+                found.update(self._db.execute(
+                    f"SELECT doc_id, content_hash FROM indexed WHERE doc_id IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall())
+        return found
+
+    def indexed_version(self) -> str | None:
+        with self._lock:
+            row = self._db.execute("SELECT value FROM meta WHERE name = 'version'").fetchone()
+        return row[0] if row else None
+
+    def reset_indexed(self, version: str | None, indexed: dict[str, str] | None = None) -> int:
+        """Replace all content hashes with `indexed`, now describing `version`; returns how many were dropped."""
+        now = time.time()
+        with self._transaction() as db:
+            removed = db.execute("DELETE FROM indexed").rowcount
+            db.executemany(
+                "INSERT INTO indexed (doc_id, content_hash, indexed_at) VALUES (?, ?, ?)",
+                [(doc_id, digest, now) for doc_id, digest in (indexed or {}).items()],
+            )
+            db.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('version', ?)", (version,))
+        return removed
+
+    # ---------- Monitoring ----------
+    def stats(self, max_attempts: int = 5) -> dict:
+        """Pending records, dead letters and the age of the oldest pending record."""
+        with self._lock:
+            pending, oldest = self._db.execute(
+                "SELECT COUNT(*), MIN(scraped_at) FROM changes WHERE attempts < ?", (max_attempts,)
+            ).fetchone()
+            dead = self._db.execute("SELECT COUNT(*) FROM changes WHERE attempts >= ?", (max_attempts,)).fetchone()[0]
+        return {"pending": pending, "dead": dead, "oldest_pending_s": time.time() - oldest if oldest else 0.0}
@@ -1,27 +1,55 @@
+import hashlib
+import json
 import os
 import pandas as pd
 from dotenv import load_dotenv
 from typing import List
 from langchain_core.documents import Document
-from langchain_astradb import AstraDBVectorStore
 from prod_assistant.utils.model_loader import ModelLoader
 from prod_assistant.utils.config_loader import load_config
+from prod_assistant.utils.context_builder import clean_review_text, reviews_hash
+from prod_assistant.utils.snapshot import PrecomputedEmbeddings, snapshot_dir, write_snapshot
+from prod_assistant.utils.index_versions import Reindexer, document_id, open_index
+from prod_assistant.etl.change_queue import ChangeQueue
+
+RECORD_FIELDS = ("product_id", "product_title", "rating", "total_reviews", "price", "top_reviews")
+
+
+def record_to_document(record: dict) -> Document:
+    """One scraped product row (CSV row or queued record) as the Document that gets embedded."""
+    # Strip scraper boilerplate (READ MORE / Certified Buyer / Permalink Report Abuse) before embedding
+    reviews = clean_review_text(record["top_reviews"]) or "No reviews found"
+    metadata = {name: record[name] for name in RECORD_FIELDS if name != "top_reviews"}
+    # Storage/colour variants share identical reviews; the context builder merges them on this
+    metadata["reviews_hash"] = reviews_hash(reviews)
+    return Document(page_content=reviews, metadata=metadata)
+
+
+def content_hash(doc: Document) -> str:
+    """Hash of what gets embedded and stored; values as text, so CSV and scraper rows of the same product match."""
+    payload = {"text": doc.page_content, "metadata": {k: str(v) for k, v in (doc.metadata or {}).items()}}
+    return hashlib.sha1(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
 
 class DataIngestion:
     """
     Class to handle data transformation and ingestion into AstraDB vector store.
     """
 
-    def __init__(self):
+    def __init__(self, model_loader: ModelLoader | None = None, csv_path: str | None = None, vector_store=None):
         """
         Initialize environment variables, embedding model, and set CSV file path.
+        `model_loader`, `csv_path` and `vector_store` may be injected (e.g. offline benchmarks);
+        by default the configured embeddings, data/product_reviews.csv and AstraDB are used.
         """
         print("Initializing DataIngestion pipeline ...")
-        self.model_loader=ModelLoader()
+        self.model_loader = model_loader or ModelLoader()
         self._load_env_variables()
-        self.csv_path = self._get_csv_path()
+        self.vector_store = vector_store
+        self.csv_path = csv_path or self._get_csv_path()
         self.product_data = self._load_csv()
         self.config = load_config()
+        self.embeddings = None  # set by write_snapshot so the vector store reuses its vectors
 
     def _load_env_variables(self):
         """
@@ -58,7 +86,7 @@ class DataIngestion:
         Load product data from CSV.
         """
         df = pd.read_csv(self.csv_path)
-        expected_columns = {'product_id', 'product_title', 'rating', 'total_reviews', 'price', 'top_reviews'}
+        expected_columns = set(RECORD_FIELDS)
 
         if not expected_columns.issubset(set(df.columns)):
             raise ValueError(f"CSV must contain columns: {expected_columns}")
@@ -69,57 +97,79 @@ class DataIngestion:
         """
         Transform product data into list of LangChain Document objects.
         """
-        product_list = []
-
-        for _, row in self.product_data.iterrows():
-            product_entry = {
-                "product_id": row["product_id"],
-                "product_title": row["product_title"],
-                "rating": row["rating"],
-                "total_reviews": row["total_reviews"],
-                "price": row["price"],
-                "top_reviews": row["top_reviews"]
-            } 
-            product_list.append(product_entry)
-
-        documents = []
-        for entry in product_list:
-            metadata = {
-                "product_id": entry["product_id"],
-                "product_title": entry["product_title"],
-                "rating": entry["rating"],
-                "total_reviews": entry["total_reviews"],
-                "price": entry["price"]
-            }
-            doc = Document(page_content=entry["top_reviews"], metadata=metadata)
-            documents.append(doc)
-
+        documents = [record_to_document(row) for row in self.product_data.to_dict("records")]
         print(f"Transformed {len(documents)} documents.")
         return documents
     
     def store_in_vector_db(self, documents: List[Document]):
         """
-        Store documents into AstraDB vector store.
+        Store documents into AstraDB vector store (or the injected vector store).
         """
-        collection_name = self.config["astra_db"]["collection_name"]
-        vstore = AstraDBVectorStore(
-            embedding = self.model_loader.load_embeddings(),
-            collection_name = collection_name,
-            api_endpoint = self.db_api_endpoint,
-            token = self.db_application_token,
-            namespace = self.db_keyspace,
-        ) 
+        vstore = self.vector_store
+        if vstore is None:
+            from langchain_astradb import AstraDBVectorStore
+
+            collection_name = self.config["astra_db"]["collection_name"]
+            vstore = AstraDBVectorStore(
+                embedding = self.embeddings or self.model_loader.load_embeddings(),
+                collection_name = collection_name,
+                api_endpoint = self.db_api_endpoint,
+                token = self.db_application_token,
+                namespace = self.db_keyspace,
+            )
 
         inserted_ids = vstore.add_documents(documents)
-        print(f"Successfully inserted {len(inserted_ids)} documents into AstraDB")
+        print(f"Successfully inserted {len(inserted_ids)} documents into {type(vstore).__name__}")
         return vstore, inserted_ids
     
+    def write_snapshot(self, documents: List[Document]):
+        """
+        Embed the documents once and write them as the next catalog snapshot version
+        (Arrow metadata + .npy embeddings, see utils/snapshot.py) that the retriever, the
+        MCP server and the catalog cache memory-map.
+        """
+        block = self.config.get("snapshot", {})
+        embeddings = self.model_loader.load_embeddings()
+        texts = [d.page_content for d in documents]
+        vectors = embeddings.embed_documents(texts)
+        path = write_snapshot(
+            documents, vectors, snapshot_dir(self.config),
+            embedding_model=self.config["embedding_model"]["model_name"],
+            source=self.csv_path, keep=block.get("keep", 3),
+        )
+        self.embeddings = PrecomputedEmbeddings(texts, vectors, fallback=embeddings)
+        print(f"Snapshot {path.name} written to {path}")
+        return path
+
+    def reindex(self, documents: List[Document]):
+        """
+        Blue/green re-index: embed once, build the next index version next to the live one
+        (snapshot + AstraDB collection, or the snapshot alone with `index.backend: local`),
+        validate it, let retrievers warm it, then flip the live pointer. Returns the live store.
+        """
+        embeddings = self.model_loader.load_embeddings()
+        vectors = embeddings.embed_documents([d.page_content for d in documents])
+        index = open_index(self.config, self.db_api_endpoint, self.db_application_token, self.db_keyspace)
+        reindexer = Reindexer.from_config(self.config, embeddings, index=index)
+        version = reindexer.run(documents, vectors, embedding_model=self.config["embedding_model"]["model_name"],
+                                source=self.csv_path)
+        print(f"Index version {version} is live ({index.backend})")
+        # The ingestion worker then skips re-scrapes identical to what this version holds
+        ChangeQueue.from_config(self.config).reset_indexed(
+            version, {document_id(d): content_hash(d) for d in documents}
+        )
+        return index.open_store(version, embeddings)
+
     def run_pipeline(self):
         """
-        Run the full data ingestion pipeline: transform data and store into vector DB.
+        Run the full data ingestion pipeline: transform data, then build and promote a new
+        index version (or fill the injected vector store directly).
         """
         documents = self.transform_data()
-        vstore, _ = self.store_in_vector_db(documents)
+        if self.vector_store is not None:
+            vstore, _ = self.store_in_vector_db(documents)
+        else:
+            vstore = self.reindex(documents)
 
         # Optionally do a quick search
         query = "Can you tell me the low budget iphone?"
@@ -9,11 +9,24 @@ from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.common.action_chains import ActionChains
 
 
+RECORD_FIELDS = ["product_id", "product_title", "rating", "total_reviews", "price", "top_reviews"]
+
+
 class FlipkartScraper:
-    def __init__(self, output_dir="data"):
+    def __init__(self, output_dir="data", queue=None):
+        """
+        `queue` (etl/change_queue.ChangeQueue, optional): every scraped product is emitted to it
+        as soon as it is scraped, for the ingestion worker to make searchable.
+        """
         self.output_dir = output_dir
+        self.queue = queue
         os.makedirs(self.output_dir, exist_ok=True)
 
+    def emit(self, row):
+        """Queue one scraped product row, stamped with the scrape time (freshness lag starts here)."""
+        if self.queue is not None:
+            self.queue.put([{**dict(zip(RECORD_FIELDS, row)), "scraped_at": time.time()}])
+
     def get_top_reviews(self, product_url, count=2):
         """Get the top reviews for a product.
         """
@@ -97,6 +110,7 @@ class FlipkartScraper:
 
             top_reviews=self.get_top_reviews(product_link,count=review_count) if "flipkart.com" in product_link else "Invalid product URL"
             products.append([product_id, title, rating, total_reviews, price, top_reviews])
+            self.emit(products[-1])
 
         driver.quit()
         return products
@@ -116,6 +130,6 @@ class FlipkartScraper:
 
         with open(path, "w", newline="", encoding="utf-8") as f:
             writer = csv.writer(f)
-            writer.writerow(["product_id", "product_title", "rating", "total_reviews", "price", "top_reviews"])
+            writer.writerow(RECORD_FIELDS)
             writer.writerows(data)
 
@@ -0,0 +1,157 @@
+"""
+Continuous ingestion from the scraper's change queue (etl/change_queue.py) into the live index
+version (utils/index_versions.py):
+
+    python -m prod_assistant.etl.ingestion_worker            # run until SIGTERM / Ctrl-C
+    python -m prod_assistant.etl.ingestion_worker --drain    # apply what is queued, then exit
+
+Each leased batch is collapsed to the newest record per product, compared with the content
+hash last upserted for it, and only changed products are embedded and upserted by document_id.
+The batch is acknowledged after the upsert: a crash in between redelivers it, and the
+redelivery overwrites the same ids. Scrape -> searchable lag is observed per upserted product
+(prod_assistant_ingest_freshness_seconds).
+"""
+import argparse
+import os
+import signal
+import sys
+import threading
+import time
+
+from logger import GLOBAL_LOGGER as log
+from observability.instrumentation import (
+    INGEST_FRESHNESS, INGEST_OLDEST_PENDING, INGEST_QUEUE_DEPTH, INGEST_RECORDS,
+)
+from prod_assistant.etl.change_queue import ChangeQueue
+from prod_assistant.etl.data_ingestion import content_hash, record_to_document
+from utils.index_versions import document_id
+
+
+class IngestionWorker:
+    """Leases batches from the change queue and upserts the changed products into the index."""
+
+    def __init__(self, queue: ChangeQueue, index, embedding, batch_size: int = 64, lease_seconds: float = 120.0,
+                 max_attempts: int = 5, poll_seconds: float = 1.0, keep: int = 3):
+        self.queue = queue
+        self.index = index
+        self.embedding = embedding
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.poll_seconds = poll_seconds
+        self.keep = keep
+        self._stop = threading.Event()
+
+    @classmethod
+    def from_config(cls, config: dict, index, embedding, queue: ChangeQueue | None = None) -> "IngestionWorker":
+        block = config.get("cdc", {})
+        return cls(
+            queue or ChangeQueue.from_config(config),
+            index,
+            embedding,
+            batch_size=block.get("batch_size", 64),
+            lease_seconds=block.get("lease_seconds", 120.0),
+            max_attempts=block.get("max_attempts", 5),
+            poll_seconds=block.get("poll_seconds", 1.0),
+            keep=block.get("keep_versions", 3),
+        )
+
+    def apply(self, batch) -> dict:
+        """Upsert the changed products of one leased batch, then acknowledge it."""
+        live = self.index.pointer()["current"]
+        if self.queue.indexed_version() != live:
+            # Another live version (full re-index, rollback, a batch upserted but never acknowledged):
+            # take the hashes from its documents where the backend can list them, else re-check everything
+            documents = self.index.documents(live) if live else None
+            hashes = {document_id(d): content_hash(d) for d in documents or []}
+            self.queue.reset_indexed(live, hashes)
+            log.info("Live index changed, change detection reset", version=live, known=len(hashes))
+
+        latest = {}
+        for change in batch:  # oldest first: the newest scrape of a product wins
+            doc = record_to_document(change.record)
+            latest[document_id(doc)] = (change, doc)
+        hashes = {doc_id: content_hash(doc) for doc_id, (_, doc) in latest.items()}
+        known = self.queue.indexed_hashes(list(hashes))
+        changed = [doc_id for doc_id, digest in hashes.items() if known.get(doc_id) != digest]
+
+        version = live
+        if changed:
+            version = self.index.upsert([latest[doc_id][1] for doc_id in changed], self.embedding, keep=self.keep)
+        searchable_at = time.time()
+        self.queue.ack([c.seq for c in batch], {doc_id: hashes[doc_id] for doc_id in changed}, version)
+
+        for doc_id in changed:
+            INGEST_FRESHNESS.observe(max(0.0, searchable_at - latest[doc_id][0].scraped_at))
+        outcome = {"upserted": len(changed), "unchanged": len(latest) - len(changed),
+                   "superseded": len(batch) - len(latest)}
+        for name, count in outcome.items():
+            INGEST_RECORDS.labels(name).inc(count)
+        log.info("Change batch applied", version=version, **outcome)
+        return outcome
+
+    def run_once(self) -> int:
+        """Lease and apply one batch; returns the number of records leased."""
+        batch = self.queue.lease(self.batch_size, self.lease_seconds, self.max_attempts)
+        if batch:
+            try:
+                self.apply(batch)
+            except Exception as e:
+                log.error("Change batch failed, will be redelivered", records=len(batch), error=str(e),
+                          attempts=max(c.attempts for c in batch))
+                INGEST_RECORDS.labels("failed").inc(len(batch))
+                self.queue.release([c.seq for c in batch], str(e))
+        stats = self.queue.stats(self.max_attempts)
+        INGEST_QUEUE_DEPTH.set(stats["pending"])
+        INGEST_OLDEST_PENDING.set(stats["oldest_pending_s"])
+        return len(batch)
+
+    def run(self, drain: bool = False):
+        """Consume until stop() (or, with `drain`, until nothing is left to lease)."""
+        log.info("Ingestion worker started", backend=self.index.backend, queue=str(self.queue.path))
+        while not self._stop.is_set():
+            try:
+                leased = self.run_once()
+            except Exception as e:  # queue unavailable (locked / disk): keep the worker alive
+                log.error("Change queue unavailable", error=str(e))
+                leased = 0
+            if not leased and drain:
+                break
+            if leased < self.batch_size:
+                # No backlog: let records accumulate instead of writing one tiny batch per record
+                self._stop.wait(self.poll_seconds)
+        log.info("Ingestion worker stopped", **self.queue.stats(self.max_attempts))
+
+    def stop(self):
+        self._stop.set()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Consume the scraper's change queue into the live index")
+    parser.add_argument("--drain", action="store_true", help="Exit once the queue is empty")
+    args = parser.parse_args(argv)
+
+    from dotenv import load_dotenv
+    from utils.config_loader import load_config
+    from utils.index_versions import open_index
+    from utils.model_loader import ModelLoader
+
+    load_dotenv()
+    config = load_config()
+    index = open_index(config, os.getenv("ASTRA_DB_API_ENDPOINT"), os.getenv("ASTRA_DB_APPLICATION_TOKEN"),
+                       os.getenv("ASTRA_DB_KEYSPACE"))
+    worker = IngestionWorker.from_config(config, index, ModelLoader().load_embeddings())
+    port = config.get("cdc", {}).get("metrics_port")
+    if port:
+        from prometheus_client import start_http_server
+        start_http_server(int(port))
+    signal.signal(signal.SIGTERM, lambda *_: worker.stop())
+    try:
+        worker.run(drain=args.drain)
+    except KeyboardInterrupt:
+        worker.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
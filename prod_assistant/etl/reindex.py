@@ -0,0 +1,58 @@
+"""
+Blue/green index operations (utils/index_versions.py) for the configured `index.backend`:
+
+    python -m prod_assistant.etl.reindex status            # versions, live pointer, candidate
+    python -m prod_assistant.etl.reindex run               # ingest data/product_reviews.csv as a new version
+    python -m prod_assistant.etl.reindex promote v0003     # make an existing version live
+    python -m prod_assistant.etl.reindex rollback          # back to the newest version older than the live one
+"""
+import argparse
+import os
+import sys
+
+
+def _reindexer():
+    from dotenv import load_dotenv
+    from utils.config_loader import load_config
+    from utils.index_versions import Reindexer, open_index
+    from utils.model_loader import ModelLoader
+
+    load_dotenv()
+    config = load_config()
+    index = open_index(config, os.getenv("ASTRA_DB_API_ENDPOINT"), os.getenv("ASTRA_DB_APPLICATION_TOKEN"),
+                       os.getenv("ASTRA_DB_KEYSPACE"))
+    return Reindexer.from_config(config, ModelLoader().load_embeddings(), index=index)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Blue/green index versions")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("status", help="List versions and the live / candidate pointer")
+    commands.add_parser("run", help="Ingest the scraper CSV as a new version and promote it")
+    promote = commands.add_parser("promote", help="Make an existing version live")
+    promote.add_argument("version")
+    commands.add_parser("rollback", help="Make the previous version live again")
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        from prod_assistant.etl.data_ingestion import DataIngestion
+        DataIngestion().run_pipeline()
+        return 0
+
+    reindexer = _reindexer()
+    index = reindexer.index
+    if args.command == "promote":
+        if args.version not in index.versions():
+            parser.error(f"unknown version {args.version}; have {index.versions()}")
+        reindexer.promote(args.version)
+    elif args.command == "rollback":
+        reindexer.rollback()
+    pointer = index.pointer()
+    print(f"backend {index.backend}  live {pointer['current']}  candidate {pointer['candidate']}")
+    for version in index.versions():
+        print(f"  {version}{'  <- live' if version == pointer['current'] else ''}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,16 +1,24 @@
 import asyncio
+from functools import lru_cache
 from utils.model_loader import ModelLoader
-from ragas import SingleTurnSample
-from ragas.llms import LangchainLLMWrapper
-from ragas.embeddings import LangchainEmbeddingsWrapper
-from ragas.metrics import LLMContextPrecisionWithoutReference, ResponseRelevancy
-import grpc.experimental.aio as grpc_aio
-grpc_aio.init_grpc_aio()
-model_loader=ModelLoader()
+
+# ragas (+ datasets, openai, ...) adds ~2s of imports; it is only loaded on the first evaluation
+
+
+@lru_cache(maxsize=1)
+def _get_model_loader() -> ModelLoader:
+    import grpc.experimental.aio as grpc_aio
+    grpc_aio.init_grpc_aio()
+    return ModelLoader()
 
 def evaluate_context_precision(query, response, retrieved_context):
     """summary_"""
     try:
+        from ragas import SingleTurnSample
+        from ragas.llms import LangchainLLMWrapper
+        from ragas.metrics import LLMContextPrecisionWithoutReference
+
+        model_loader = _get_model_loader()
         sample = SingleTurnSample(
             user_input=query,
             response=response,
@@ -18,7 +26,7 @@ def evaluate_context_precision(query, response, retrieved_context):
         )
 
         async def main():
-            llm = model_loader.load_llm()
+            llm = model_loader.load_llm("evaluator")
             evaluator_llm = LangchainLLMWrapper(llm)
             context_precision = LLMContextPrecisionWithoutReference(llm=evaluator_llm)
             result = await context_precision.single_turn_ascore(sample)
@@ -32,6 +40,12 @@ def evaluate_response_relevancy(query, response, retrieved_context):
     """summary_
     """
     try:
+        from ragas import SingleTurnSample
+        from ragas.llms import LangchainLLMWrapper
+        from ragas.embeddings import LangchainEmbeddingsWrapper
+        from ragas.metrics import ResponseRelevancy
+
+        model_loader = _get_model_loader()
         sample = SingleTurnSample(
             user_input=query,
             response=response,
@@ -39,7 +53,7 @@ def evaluate_response_relevancy(query, response, retrieved_context):
         )
 
         async def main():
-            llm = model_loader.load_llm()
+            llm = model_loader.load_llm("evaluator")
             evaluator_llm = LangchainLLMWrapper(llm)
             embedding_model = model_loader.load_embeddings()
             evaluator_embeddings = LangchainEmbeddingsWrapper(embedding_model)
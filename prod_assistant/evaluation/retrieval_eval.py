@@ -0,0 +1,224 @@
+"""
+Batch retrieval evaluation over a golden query set. Every retriever configuration in a grid
+(top_k, fetch_k, lambda_mult, LLM filter on/off, hybrid on/off) is scored locally with
+recall@k, MRR and hit rate, alongside latency and LLM calls per query, and the fastest
+configuration whose quality stays within --tolerance of the best is recommended.
+
+Queries run in parallel across configurations with at most --concurrency in flight, so
+latencies are measured under that load. The "fake" backend (default) uses the offline fakes
+from benchmarks.fakes over the sample catalog: its filter LLM keeps every document, so there
+the filter only shows up in latency and LLM calls. Use --backend live for AstraDB + real LLMs.
+
+    python -m prod_assistant.evaluation.retrieval_eval
+    python -m prod_assistant.evaluation.retrieval_eval --grid top_k=3,4 hybrid=true,false --backend live
+"""
+import argparse
+import itertools
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+GOLDEN_SET = PROJECT_ROOT / "data" / "golden_queries.jsonl"
+SOURCE_CSV = PROJECT_ROOT / "data" / "product_reviews.csv"
+DEFAULT_GRID = {
+    "top_k": [3, 4, 6],
+    "fetch_k": [10, 20],
+    "lambda_mult": [0.5, 0.7],
+    "llm_filter": [True, False],
+    "hybrid": [False, True],
+}
+
+
+class LLMCallCounter(BaseCallbackHandler):
+    """Counts LLM calls made under one retriever invocation (the LLMChainFilter's yes/no calls)."""
+
+    def __init__(self):
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _count(self):
+        with self._lock:
+            self.calls += 1
+
+    def on_llm_start(self, *args, **kwargs):
+        self._count()
+
+    def on_chat_model_start(self, *args, **kwargs):
+        self._count()
+
+
+def load_golden_set(path: str | Path) -> list[dict]:
+    """JSONL lines of {"query": str, "relevant": [product_id, ...]}; "question" (synthetic testsets) works too."""
+    with open(path, encoding="utf-8") as f:
+        items = [json.loads(line) for line in f if line.strip()]
+    return [{**item, "query": item.get("query") or item["question"]} for item in items]
+
+
+def _parse_value(raw: str, kind: type):
+    if kind is bool:
+        return raw.strip().lower() in ("1", "true", "on", "yes")
+    return kind(raw)
+
+
+def parse_grid(specs: list[str]) -> dict[str, list]:
+    """`name=v1,v2` overrides on top of DEFAULT_GRID."""
+    grid = dict(DEFAULT_GRID)
+    for spec in specs:
+        name, _, values = spec.partition("=")
+        if name not in grid or not values:
+            raise ValueError(f"bad grid spec '{spec}', expected one of {sorted(grid)} as name=v1,v2")
+        kind = type(DEFAULT_GRID[name][0])
+        grid[name] = [_parse_value(v, kind) for v in values.split(",")]
+    return grid
+
+
+def expand_grid(grid: dict[str, list]) -> list:
+    """Valid RetrieverConfig per grid point; lambda_mult is dropped from hybrid configs (unused there)."""
+    from pydantic import ValidationError
+    from utils.config_loader import RetrieverConfig, get_config_store
+
+    base = get_config_store().typed.retriever.model_dump()
+    configs, seen = [], set()
+    for values in itertools.product(*grid.values()):
+        params = dict(zip(grid, values))
+        if params["hybrid"]:
+            params["lambda_mult"] = base["lambda_mult"]
+        try:
+            config = RetrieverConfig(**{**base, **params})
+        except ValidationError:
+            continue  # e.g. fetch_k < top_k
+        key = tuple(sorted(config.model_dump().items()))
+        if key not in seen:
+            seen.add(key)
+            configs.append(config)
+    return configs
+
+
+def _label(config) -> str:
+    mode = "hybrid" if config.hybrid else f"mmr λ={config.lambda_mult}"
+    return f"k={config.top_k} fetch={config.fetch_k} {mode} filter={'on' if config.llm_filter else 'off'}"
+
+
+def _base_id(doc) -> str:
+    # Synthetic catalog copies carry a "-<batch>" suffix on the scraped product id
+    return str((doc.metadata or {}).get("product_id", "")).split("-")[0]
+
+
+def score_query(retriever, item: dict) -> dict:
+    counter = LLMCallCounter()
+    started = time.perf_counter()
+    docs = retriever.invoke(item["query"], config={"callbacks": [counter]})
+    latency = time.perf_counter() - started
+    relevant = set(item["relevant"])
+    ranked = [_base_id(d) for d in docs]
+    found = relevant & set(ranked)
+    first = next((rank for rank, pid in enumerate(ranked, 1) if pid in relevant), None)
+    return {
+        "recall": len(found) / len(relevant) if relevant else 0.0,
+        "rr": 1.0 / first if first else 0.0,
+        "hit": first is not None,
+        "latency": latency,
+        "llm_calls": counter.calls,
+    }
+
+
+def evaluate(retriever_obj, configs: list, golden: list[dict], concurrency: int) -> list[dict]:
+    from benchmarks.metrics import percentile
+
+    retrievers = [retriever_obj.build_retriever(config) for config in configs]
+    score_query(retrievers[0], golden[0])  # warm-up: lazy imports, first connection
+    jobs = [(i, item) for i in range(len(configs)) for item in golden]
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        scores = list(pool.map(lambda job: (job[0], score_query(retrievers[job[0]], job[1])), jobs))
+
+    results = []
+    for i, config in enumerate(configs):
+        rows = [s for j, s in scores if j == i]
+        latencies = sorted(r["latency"] for r in rows)
+        results.append({
+            "config": config.model_dump(),
+            "label": _label(config),
+            "recall_at_k": round(sum(r["recall"] for r in rows) / len(rows), 4),
+            "mrr": round(sum(r["rr"] for r in rows) / len(rows), 4),
+            "hit_rate": round(sum(r["hit"] for r in rows) / len(rows), 4),
+            "p50_ms": round(percentile(latencies, 0.5) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+            "llm_calls_per_query": round(sum(r["llm_calls"] for r in rows) / len(rows), 2),
+        })
+    return results
+
+
+def recommend(results: list[dict], tolerance: float) -> dict:
+    """Fastest configuration (then fewest LLM calls) within `tolerance` of the best recall and MRR."""
+    best_recall = max(r["recall_at_k"] for r in results)
+    best_mrr = max(r["mrr"] for r in results)
+    eligible = [r for r in results
+                if r["recall_at_k"] >= best_recall - tolerance and r["mrr"] >= best_mrr - tolerance]
+    return min(eligible, key=lambda r: (r["p50_ms"], r["llm_calls_per_query"]))
+
+
+def print_report(results: list[dict], choice: dict):
+    print(f"\n{'configuration':42} {'recall@k':>8} {'MRR':>6} {'hit':>5} {'p50 ms':>8} {'p95 ms':>8} {'LLM/q':>6}")
+    for r in sorted(results, key=lambda r: (-r["recall_at_k"], -r["mrr"], r["p50_ms"])):
+        mark = "  <- recommended" if r is choice else ""
+        print(f"{r['label']:42} {r['recall_at_k']:8.3f} {r['mrr']:6.3f} {r['hit_rate']:5.2f} "
+              f"{r['p50_ms']:8.2f} {r['p95_ms']:8.2f} {r['llm_calls_per_query']:6.2f}{mark}")
+    print("\nretriever block for config.yaml:")
+    for key, value in choice["config"].items():
+        print(f"  {key}: {str(value).lower() if isinstance(value, bool) else value}")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Score retriever configurations against a golden query set")
+    parser.add_argument("--golden", default=str(GOLDEN_SET), help="JSONL of {query|question, relevant: [product_id]}")
+    parser.add_argument("--grid", nargs="*", default=[], help="Override grid axes, e.g. top_k=3,4 hybrid=true")
+    parser.add_argument("--backend", choices=("fake", "live"), default="fake")
+    parser.add_argument("--concurrency", type=int, default=8, help="Retriever calls in flight")
+    parser.add_argument("--tolerance", type=float, default=0.02, help="Allowed recall/MRR drop for the recommendation")
+    parser.add_argument("--catalog-size", type=int, help="Fake backend: synthetic catalog size (default: the sample CSV)")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Fake backend: seconds per filter LLM call")
+    parser.add_argument("--embed-latency", type=float, default=0.02, help="Fake backend: seconds per embedding call")
+    parser.add_argument("--output", type=Path, help="Write all results as JSON")
+    args = parser.parse_args(argv)
+
+    if args.backend == "fake":
+        from benchmarks.offline_env import use_offline_environment
+        use_offline_environment()
+    from retriever.retrieval import Retriever
+
+    golden = load_golden_set(args.golden)
+    configs = expand_grid(parse_grid(args.grid))
+    if args.backend == "fake":
+        import contextlib
+        import io
+        import pandas as pd
+        from benchmarks.fakes import OfflineModelLoader, populated_vector_store
+
+        loader = OfflineModelLoader(llm_latency_s=args.llm_latency, embed_latency_s=args.embed_latency)
+        size = args.catalog_size or len(pd.read_csv(SOURCE_CSV))
+        with contextlib.redirect_stdout(io.StringIO()):
+            retriever_obj = Retriever(model_loader=loader, vstore=populated_vector_store(loader, size, SOURCE_CSV))
+    else:
+        retriever_obj = Retriever()
+
+    print(f"{len(configs)} configurations x {len(golden)} queries, concurrency {args.concurrency}", flush=True)
+    results = evaluate(retriever_obj, configs, golden, args.concurrency)
+    choice = recommend(results, args.tolerance)
+    print_report(results, choice)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps({"backend": args.backend, "golden": args.golden,
+                                           "recommended": choice, "results": results}, indent=2))
+        print(f"\nresults written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,196 @@
+"""
+Synthetic evaluation set from the ingested catalog: question / answer / context triples per
+product, generated concurrently (asyncio, at most --concurrency LLM calls in flight) and
+streamed to JSONL as each product completes.
+
+Items are keyed by a hash of the product's cleaned content plus the prompt version and
+generation settings; a re-run reuses items whose key is unchanged and only calls the LLM
+for new or changed products. Each line carries "question" (read as the query by
+evaluation/retrieval_eval.py, benchmarks/run.py and benchmarks/replay.py) and
+"relevant": [product_id], so the file is a golden set as is.
+
+    python -m prod_assistant.evaluation.testset_generation --output data/synthetic_testset.jsonl
+    python -m prod_assistant.evaluation.retrieval_eval --golden data/synthetic_testset.jsonl
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+SOURCE_CSV = PROJECT_ROOT / "data" / "product_reviews.csv"
+DEFAULT_OUTPUT = PROJECT_ROOT / "data" / "synthetic_testset.jsonl"
+_JSON_ARRAY = re.compile(r"\[.*\]", re.S)
+
+
+def content_hash(doc, settings: str) -> str:
+    """Changes when the product's cleaned content, the prompt or the generation settings change."""
+    meta = doc.metadata or {}
+    fields = [str(meta.get(k, "")) for k in ("product_id", "product_title", "price", "rating")]
+    payload = "\x1f".join([*fields, doc.page_content, settings])
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def parse_pairs(text: str) -> list[dict]:
+    """Question/answer pairs from the model output (tolerates prose or code fences around the JSON)."""
+    match = _JSON_ARRAY.search(text or "")
+    if not match:
+        return []
+    try:
+        pairs = json.loads(match.group(0))
+    except json.JSONDecodeError:
+        return []
+    return [
+        {"question": p["question"].strip(), "answer": str(p.get("answer", "")).strip()}
+        for p in pairs
+        if isinstance(p, dict) and isinstance(p.get("question"), str) and p["question"].strip()
+    ]
+
+
+def load_cached(*paths: Path) -> dict[str, list[dict]]:
+    """
+    content_hash -> items from earlier (possibly interrupted) runs. A hash is taken from the
+    first path that has it: an interrupted re-run's `.partial` repeats the output's cached items.
+    """
+    cached: dict[str, list[dict]] = {}
+    for path in paths:
+        if not path.exists():
+            continue
+        found: dict[str, dict[str, dict]] = {}
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    item = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn last line of an interrupted run
+                key = item.get("content_hash")
+                if key and key not in cached:
+                    found.setdefault(key, {}).setdefault(item.get("id"), item)
+        cached.update((key, list(items.values())) for key, items in found.items())
+    return cached
+
+
+class TestsetGenerator:
+    """Generates `questions_per_product` QA items per catalog document with one LLM call each."""
+
+    def __init__(self, llm, questions_per_product: int = 2, concurrency: int = 8):
+        from prompt_library.prompts import PROMPT_REGISTRY, PromptType
+        from utils.config_loader import load_config
+        from utils.context_builder import ContextBuilder
+
+        self.prompt = PROMPT_REGISTRY[PromptType.TESTSET_GENERATOR]
+        self.chain = self.prompt.chat_prompt | llm
+        self.model = getattr(llm, "model_name", None) or getattr(llm, "model", None) or type(llm).__name__
+        self.questions_per_product = questions_per_product
+        self.concurrency = concurrency
+        self.context_builder = ContextBuilder.from_config(load_config())
+        self.settings = f"{self.prompt.cache_key}|{self.model}|n={questions_per_product}"
+
+    def _items(self, doc, key: str, context: str, pairs: list[dict]) -> list[dict]:
+        meta = doc.metadata or {}
+        return [
+            {
+                "id": f"{meta.get('product_id')}:{i}",
+                "question": pair["question"],
+                "answer": pair["answer"],
+                "contexts": [context],
+                "relevant": [meta.get("product_id")],
+                "product_title": meta.get("product_title"),
+                "content_hash": key,
+                "generator": {"model": self.model, "prompt": self.prompt.cache_key},
+            }
+            for i, pair in enumerate(pairs[: self.questions_per_product])
+        ]
+
+    async def _generate_one(self, doc, key: str, semaphore: asyncio.Semaphore) -> list[dict]:
+        context = self.context_builder.build("", [doc])
+        async with semaphore:
+            message = await self.chain.ainvoke({"context": context, "n": self.questions_per_product})
+        return self._items(doc, key, context, parse_pairs(message.content))
+
+    async def generate(self, docs: list, output: Path) -> dict:
+        """Write the testset for `docs` to `output`, reusing cached items; returns run stats."""
+        # Items stream into `<output>.partial`; an interrupted run leaves it behind as extra cache
+        partial = output.with_suffix(output.suffix + ".partial")
+        cached = load_cached(output, partial)
+        keyed = [(doc, content_hash(doc, self.settings)) for doc in docs]
+        todo = [(doc, key) for doc, key in keyed if key not in cached]
+        stats = {"products": len(docs), "cached_products": len(docs) - len(todo), "generated_products": 0,
+                 "failed_products": 0, "items": 0}
+
+        output.parent.mkdir(parents=True, exist_ok=True)
+        with open(partial, "w", encoding="utf-8") as f:
+            def write(items: list[dict]):
+                for item in items:
+                    f.write(json.dumps(item, ensure_ascii=False) + "\n")
+                f.flush()
+                stats["items"] += len(items)
+
+            for doc, key in keyed:
+                if key in cached:
+                    write(cached[key])
+            semaphore = asyncio.Semaphore(self.concurrency)
+            tasks = [asyncio.ensure_future(self._generate_one(doc, key, semaphore)) for doc, key in todo]
+            for done in asyncio.as_completed(tasks):
+                try:
+                    items = await done
+                except Exception as e:
+                    stats["failed_products"] += 1
+                    print(f"generation failed: {e}", file=sys.stderr)
+                    continue
+                if not items:
+                    stats["failed_products"] += 1
+                    continue
+                write(items)
+                stats["generated_products"] += 1
+        os.replace(partial, output)
+        return stats
+
+
+def catalog_documents(model_loader, csv_path: str | Path) -> list:
+    """The catalog as ingested: DataIngestion's cleaned page_content and metadata."""
+    from prod_assistant.etl.data_ingestion import DataIngestion
+
+    return DataIngestion(model_loader=model_loader, csv_path=str(csv_path)).transform_data()
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Generate a synthetic QA testset from the product catalog")
+    parser.add_argument("--csv", default=str(SOURCE_CSV), help="Catalog CSV (the ingestion input)")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    parser.add_argument("--questions-per-product", type=int, default=2)
+    parser.add_argument("--concurrency", type=int, default=8, help="LLM calls in flight")
+    parser.add_argument("--limit", type=int, help="Only the first N products")
+    parser.add_argument("--backend", choices=("live", "fake"), default="live")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Fake backend: seconds per LLM call")
+    args = parser.parse_args(argv)
+
+    if args.backend == "fake":
+        from benchmarks.offline_env import use_offline_environment
+        use_offline_environment()
+        from benchmarks.fakes import OfflineModelLoader
+        model_loader = OfflineModelLoader(llm_latency_s=args.llm_latency)
+    else:
+        from utils.model_loader import ModelLoader
+        model_loader = ModelLoader()
+
+    docs = catalog_documents(model_loader, args.csv)[: args.limit]
+    generator = TestsetGenerator(
+        model_loader.load_llm("testset_generator"),
+        questions_per_product=args.questions_per_product,
+        concurrency=args.concurrency,
+    )
+    started = time.perf_counter()
+    stats = asyncio.run(generator.generate(docs, args.output))
+    print(f"{stats} in {time.perf_counter() - started:.2f}s -> {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
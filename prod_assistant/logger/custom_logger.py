@@ -1,53 +1,217 @@
 import os
+import atexit
+import json
+import queue
+import random
 import logging
-from datetime import datetime
+import logging.handlers
+import threading
 import structlog
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson ships with langgraph, json is the fallback
+    orjson = None
+
+_configure_lock = threading.Lock()
+_listener: logging.handlers.QueueListener | None = None
+_queue_handler: "DroppingQueueHandler | None" = None
+_configured: "CustomLogger | None" = None
+
+
+def _fast_json(obj, **kwargs) -> str:
+    if orjson is not None:
+        return orjson.dumps(obj, default=str).decode()
+    return json.dumps(obj, default=str)
+
+
+class EventSampler:
+    """
+    structlog processor dropping a fraction of high-volume events before they are rendered.
+    `level_rates` samples by level (e.g. {"debug": 0.1}); `event_rates` by event name.
+    """
+
+    def __init__(self, level_rates: dict | None = None, event_rates: dict | None = None):
+        self.level_rates = level_rates or {}
+        self.event_rates = event_rates or {}
+
+    def __call__(self, logger, method_name, event_dict):
+        rate = self.event_rates.get(event_dict.get("event"), self.level_rates.get(method_name, 1.0))
+        if rate < 1.0 and random.random() >= rate:
+            raise structlog.DropEvent
+        return event_dict
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records instead of blocking or erroring when the queue is full."""
+
+    dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            DroppingQueueHandler.dropped += 1
+
+
+def _start_listener(log_file_path: str):
+    """New queue and listener thread behind the installed queue handler."""
+    global _listener
+    formatter = logging.Formatter("%(message)s")  # Raw JSON lines
+    file_handler = _configured._file_handler(log_file_path)
+    file_handler.setFormatter(formatter)
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(formatter)
+
+    log_queue: queue.Queue = queue.Queue(maxsize=int(os.getenv("LOG_QUEUE_SIZE", "10000")))
+    _queue_handler.queue = log_queue
+    _listener = logging.handlers.QueueListener(log_queue, console_handler, file_handler, respect_handler_level=True)
+    _listener.start()
+
+
+def _stop_listener():
+    """Flush what is queued and stop this process's listener (at exit)."""
+    if _listener is not None:
+        _listener.stop()
+
+
+def _restart_in_child():
+    """
+    The listener thread does not survive fork, so a child configured before the fork (every
+    gunicorn worker: the config imports the logger in the master) would queue records nobody
+    writes. Start a listener of its own on a fresh queue (the parent's may have been locked
+    mid-fork), writing a file of its own: rotating handlers cannot share one file across processes.
+    """
+    global _configure_lock
+    _configure_lock = threading.Lock()
+    if _listener is None:
+        return
+    base, ext = os.path.splitext(_configured.log_file_path)
+    _start_listener(f"{base}.{os.getpid()}{ext}")
+
+
+os.register_at_fork(after_in_child=_restart_in_child)
+
+
 class CustomLogger:
     def __init__(self, log_dir="logs"):
         # Ensure logs directory exists
         self.logs_dir = os.path.join(os.getcwd(), log_dir)
         os.makedirs(self.logs_dir, exist_ok=True)
 
-        # Timestamped log file (for persistence)
-        log_file = f"{datetime.now().strftime('%m_%d_%Y_%H_%M_%S')}.log"
-        self.log_file_path = os.path.join(self.logs_dir, log_file)
+        # One rotating file per deployment instead of a new timestamped file per process start
+        self.log_file_path = os.path.join(self.logs_dir, os.getenv("LOG_FILE", "prod_assistant.log"))
+        self.level = getattr(logging, os.getenv("LOG_LEVEL", "INFO").upper(), logging.INFO)
+
+    def _file_handler(self, path: str) -> logging.Handler:
+        """Size-based rotation by default; LOG_ROTATE_WHEN (e.g. 'midnight') switches to time-based."""
+        when = os.getenv("LOG_ROTATE_WHEN")
+        backups = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+        if when:
+            return logging.handlers.TimedRotatingFileHandler(
+                path, when=when, backupCount=backups, encoding="utf-8"
+            )
+        return logging.handlers.RotatingFileHandler(
+            path,
+            maxBytes=int(os.getenv("LOG_MAX_BYTES", str(20 * 1024 * 1024))),
+            backupCount=backups,
+            encoding="utf-8",
+        )
+
+    def configure(self):
+        """
+        Configure stdlib logging + structlog once per process. Records are handed to a
+        QueueHandler on the calling thread and written to console/file by a QueueListener
+        thread, so request threads never block on log I/O. A forked child (gunicorn worker)
+        starts its own listener and file (prod_assistant.<pid>.log), see _restart_in_child.
+        """
+        global _configured, _queue_handler
+        with _configure_lock:
+            if _listener is not None:
+                return
+
+            _configured = self
+            _queue_handler = DroppingQueueHandler(None)
+            _start_listener(self.log_file_path)
+            atexit.register(_stop_listener)
+
+            root = logging.getLogger()
+            root.handlers = [_queue_handler]
+            root.setLevel(self.level)
+
+            sampler = EventSampler(
+                level_rates={"debug": float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "1.0"))},
+                event_rates=json.loads(os.getenv("LOG_EVENT_SAMPLE_RATES", "{}")),
+            )
+
+            # Configure structlog for JSON structured logging
+            structlog.configure(
+                processors=[
+                    sampler,
+                    structlog.processors.TimeStamper(fmt="iso", utc=True, key="timestamp"),
+                    structlog.processors.add_log_level,
+                    structlog.processors.EventRenamer(to="event"),
+                    structlog.processors.JSONRenderer(serializer=_fast_json),
+                ],
+                # Calls below the configured level return immediately without building an event
+                wrapper_class=structlog.make_filtering_bound_logger(self.level),
+                logger_factory=structlog.stdlib.LoggerFactory(),
+                cache_logger_on_first_use=True,
+            )
 
     def get_logger(self, name=__file__):
         logger_name = os.path.basename(name)
+        self.configure()
+        return structlog.get_logger(logger_name)
 
-        # Configure logging for console + file (both JSON)
-        file_handler = logging.FileHandler(self.log_file_path)
-        file_handler.setLevel(logging.INFO)
-        file_handler.setFormatter(logging.Formatter("%(message)s"))  # Raw JSON lines
 
-        console_handler = logging.StreamHandler()
-        console_handler.setLevel(logging.INFO)
-        console_handler.setFormatter(logging.Formatter("%(message)s"))
+# --- Micro-benchmark: caller-side cost of a log call at ~1k requests/second ---
+if __name__ == "__main__":
+    import statistics
+    import sys
+    import tempfile
+    import time
 
-        logging.basicConfig(
-            level=logging.INFO,
-            format="%(message)s",  # Structlog will handle JSON rendering
-            handlers=[console_handler, file_handler]
-        )
+    def bench(logger, rps=1000, seconds=3, calls_per_request=5):
+        latencies = []
+        interval = 1.0 / rps
+        next_at = time.perf_counter()
+        for i in range(rps * seconds):
+            for j in range(calls_per_request):
+                t0 = time.perf_counter()
+                logger.info("Node finished", workflow="agentic_rag", node="Retriever", request=i, step=j, duration_ms=12.5)
+                latencies.append(time.perf_counter() - t0)
+            next_at += interval
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        latencies.sort()
+        return {
+            "p50_us": round(statistics.median(latencies) * 1e6, 1),
+            "p99_us": round(latencies[int(len(latencies) * 0.99)] * 1e6, 1),
+            "max_us": round(latencies[-1] * 1e6, 1),
+        }
 
-        # Configure structlog for JSON structured logging
+    os.chdir(tempfile.mkdtemp())
+    mode = sys.argv[1] if len(sys.argv) > 1 else "queue"
+    if mode == "sync":
+        # Previous behaviour: synchronous console + file handlers on the calling thread
+        path = os.path.join(os.getcwd(), "sync.log")
+        logging.basicConfig(level=logging.INFO, format="%(message)s",
+                            handlers=[logging.StreamHandler(), logging.FileHandler(path)])
         structlog.configure(
             processors=[
                 structlog.processors.TimeStamper(fmt="iso", utc=True, key="timestamp"),
                 structlog.processors.add_log_level,
                 structlog.processors.EventRenamer(to="event"),
-                structlog.processors.JSONRenderer()
+                structlog.processors.JSONRenderer(),
             ],
             logger_factory=structlog.stdlib.LoggerFactory(),
             cache_logger_on_first_use=True,
         )
+        logger = structlog.get_logger("bench")
+    else:
+        logger = CustomLogger().get_logger("bench")
 
-        return structlog.get_logger(logger_name)
-
-
-# # --- Usage Example ---
-# if __name__ == "__main__":
-#     logger = CustomLogger().get_logger(__file__)
-#     logger.info("User uploaded a file", user_id=123, filename="report.pdf")
-#     logger.error("Failed to process PDF", error="File not found", user_id=123)
\ No newline at end of file
+    result = bench(logger)
+    print(json.dumps({"mode": mode, **result}), file=sys.__stdout__)
@@ -1,39 +1,40 @@
 import re
 import textwrap
+from functools import lru_cache
 from mcp.server.fastmcp import FastMCP
+from opentelemetry.trace import SpanKind
 from retriever.retrieval import Retriever
-# from langchain_community.tools import DuckDuckGoSearchRun
-from langchain_community.tools import DuckDuckGoSearchResults
-from langchain_community.utilities import DuckDuckGoSearchAPIWrapper
+from observability.instrumentation import exported_callbacks, node_scope
+from observability.tracing import extract_context, setup_tracing, tracer
+from utils.config_loader import load_config
+from utils.context_builder import ContextBuilder
 
 # Initialize MCP server
 mcp = FastMCP("hybrid_search")
-
-# Load retriever once
-retriever_obj = Retriever()
-retriever = retriever_obj.load_retriever()
-
-# Langchain DuckDuckGo tool
-# duckduckgo = DuckDuckGoSearchRun()  # instantitate
-# ddg_results = DuckDuckGoSearchResults()  # returns a list[dict] on run/invoke
-ddg = DuckDuckGoSearchAPIWrapper(region="wt-wt", time="y", max_results=10)
+# Tool calls are their own stage in the node metrics, and the LLM calls they make are attributed to them
+WORKFLOW_NAME = "mcp"
+
+# Retriever and web search clients are built on the first tool call (once), so the
+# server answers the MCP handshake without waiting on AstraDB or importing duckduckgo.
+# The Retriever is cached, not its langchain retriever: load_retriever() is asked on every call
+# so queries follow index version switches (Retriever.refresh_index)
+@lru_cache(maxsize=1)
+def get_retriever():
+    return Retriever()
+
+@lru_cache(maxsize=1)
+def get_ddg():
+    # Langchain DuckDuckGo tool
+    # from langchain_community.tools import DuckDuckGoSearchRun, DuckDuckGoSearchResults
+    from langchain_community.utilities import DuckDuckGoSearchAPIWrapper
+    return DuckDuckGoSearchAPIWrapper(region="wt-wt", time="y", max_results=10)
 
 # ---------- Helpers -------------
-def format_docs(docs) -> str:
-    """Format retreiver docs into readable context"""
+def format_docs(docs, query: str = "") -> str:
+    """Format retreiver docs into readable, token-budgeted context"""
     if not docs:
         return ""
-    formatted_chunks = []
-    for d in docs:
-        meta = d.metadata or {}
-        formatted = (
-            f"Title: {meta.get('product_title', 'N/A')}\n"
-            f"Price: {meta.get('price', 'N/A')}\n"
-            f"Rating: {meta.get('rating', 'N/A')}\n"
-            f"Review: \n{d.page_content.strip()}"
-        )
-        formatted_chunks.append(formatted)
-    return "\n\n---\n\n".join(formatted_chunks)
+    return ContextBuilder.from_config(load_config()).build(query, docs)
 
 def _number_filter(docs, query: str):
     """
@@ -104,34 +105,46 @@ def _fmt_ddg_results(items, k: int = 5) -> str:
 
 
 # ----------- MCP Tools -------------------------
+# `trace_context` carries the caller's W3C traceparent (observability.tracing.call_mcp_tool),
+# so these spans join the chat request's trace across the stdio process boundary.
 @mcp.tool()
-async def get_product_info(query: str) -> str:
+async def get_product_info(query: str, trace_context: dict[str, str] | None = None) -> str:
     """Retrieve product information for a given query from local retriever."""
-    try:
-        docs = retriever.invoke(query)
-        docs = _number_filter(docs, query)
-        context = format_docs(docs)
-        if not context.strip():
-            return "No local results found."
-        return context
-    except Exception as e:
-        return f"Error retrieving product info {str(e)}"
+    with tracer.start_as_current_span("mcp.tool get_product_info", context=extract_context(trace_context),
+                                      kind=SpanKind.SERVER) as span:
+        try:
+            with node_scope(WORKFLOW_NAME, "get_product_info"):
+                docs = get_retriever().load_retriever().invoke(query, config={"callbacks": exported_callbacks()})
+                docs = _number_filter(docs, query)
+                span.set_attribute("retriever.hits", len(docs))
+                context = format_docs(docs, query)
+            if not context.strip():
+                return "No local results found."
+            return context
+        except Exception as e:
+            span.record_exception(e)
+            return f"Error retrieving product info {str(e)}"
     
 @mcp.tool()
-async def web_search(query: str) -> str:
+async def web_search(query: str, trace_context: dict[str, str] | None = None) -> str:
     """Search the web using DuckDuckGo if retriever has no results."""
-    try:
-        # either of these are fine
-        # return duckduckgo.run(query)
-        # return duckduckgo.invoke(query)   # Langchain standard invoke
-        
-        # `invoke` or `run` both work; `invoke` is more LC-standard
-        results = ddg.results(query, max_results=5)   # -> list[dict]
-        return _fmt_ddg_results(results, k=5)
-    except Exception as e:
-        return f"Error during web search: {str(e)}"
+    with tracer.start_as_current_span("mcp.tool web_search", context=extract_context(trace_context),
+                                      kind=SpanKind.SERVER) as span:
+        try:
+            # either of these are fine
+            # return duckduckgo.run(query)
+            # return duckduckgo.invoke(query)   # Langchain standard invoke
+
+            # `invoke` or `run` both work; `invoke` is more LC-standard
+            with node_scope(WORKFLOW_NAME, "web_search"):
+                results = get_ddg().results(query, max_results=5)   # -> list[dict]
+            return _fmt_ddg_results(results, k=5)
+        except Exception as e:
+            span.record_exception(e)
+            return f"Error during web search: {str(e)}"
     
 # --------- Run Server ----------------
 if __name__ == "__main__":
+    setup_tracing("product-search-mcp", load_config())
     mcp.run(transport="stdio")
     
\ No newline at end of file
@@ -0,0 +1,300 @@
+import contextlib
+import functools
+import os
+import time
+from contextvars import ContextVar
+from typing import Any
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.embeddings import Embeddings
+from langchain_core.outputs import LLMResult
+from opentelemetry.trace import SpanKind, Status, StatusCode
+from prometheus_client import Counter, Gauge, Histogram
+
+from logger import GLOBAL_LOGGER as log
+from observability.profiling import current_profile
+from observability.tracing import tracer
+
+# (workflow, node) of the graph node currently executing; LLM/retriever callbacks are
+# attributed to it. Context vars follow LangChain's sync and async execution.
+_current_node: ContextVar[tuple[str, str]] = ContextVar("current_node", default=("none", "none"))
+
+_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+NODE_LATENCY = Histogram(
+    "prod_assistant_node_latency_seconds", "Wall time per workflow node",
+    ["workflow", "node"], buckets=_LATENCY_BUCKETS,
+)
+NODE_ERRORS = Counter(
+    "prod_assistant_node_errors_total", "Workflow node executions that raised", ["workflow", "node"],
+)
+LLM_CALLS = Counter(
+    "prod_assistant_llm_calls_total", "LLM calls", ["workflow", "node", "model"],
+)
+LLM_TOKENS = Counter(
+    "prod_assistant_llm_tokens_total", "LLM tokens by kind (prompt/completion)",
+    ["workflow", "node", "model", "kind"],
+)
+LLM_LATENCY = Histogram(
+    "prod_assistant_llm_latency_seconds", "LLM call latency",
+    ["workflow", "node", "model"], buckets=_LATENCY_BUCKETS,
+)
+LLM_PROVIDER_CALLS = Counter(
+    "prod_assistant_llm_provider_calls_total", "LLM router calls per provider by outcome",
+    ["provider", "outcome"],  # ok | error | cancelled (lost a hedge)
+)
+LLM_HEDGES = Counter(
+    "prod_assistant_llm_hedges_total", "LLM calls hedged because the first provider was slow", ["provider"],
+)
+ADMISSION_IN_FLIGHT = Gauge(
+    "prod_assistant_admission_in_flight", "Chat requests currently executing",
+    multiprocess_mode="livesum",  # summed over live workers under gunicorn
+)
+ADMISSION_QUEUE_DEPTH = Gauge(
+    "prod_assistant_admission_queue_depth", "Chat requests waiting for an execution slot",
+    multiprocess_mode="livesum",
+)
+ADMISSION_REJECTIONS = Counter(
+    "prod_assistant_admission_rejections_total", "Chat requests answered 429 by admission control", ["reason"],
+)
+ADMISSION_WAIT = Histogram(
+    "prod_assistant_admission_wait_seconds", "Time spent queued before execution", buckets=_LATENCY_BUCKETS,
+)
+COALESCED_REQUESTS = Counter(
+    "prod_assistant_coalesced_requests_total", "Requests answered by an identical in-flight run", ["workflow"],
+)
+LLM_CALLS_SAVED = Counter(
+    "prod_assistant_llm_calls_saved_total", "LLM calls avoided by request coalescing", ["workflow"],
+)
+CATALOG_ANSWERS = Counter(
+    "prod_assistant_catalog_answers_total", "Questions answered from the product catalog without an LLM call", ["workflow"],
+)
+INDEX_SWITCHES = Counter(
+    "prod_assistant_index_switches_total", "Retriever switches to a newly promoted index version", ["backend"],
+)
+INGEST_RECORDS = Counter(
+    "prod_assistant_ingest_records_total", "Scraped records consumed by the ingestion worker",
+    ["outcome"],  # upserted | unchanged | superseded | failed
+)
+INGEST_FRESHNESS = Histogram(
+    "prod_assistant_ingest_freshness_seconds", "Scrape to searchable lag of upserted products",
+    buckets=(1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600),
+)
+INGEST_QUEUE_DEPTH = Gauge(
+    "prod_assistant_ingest_queue_depth", "Scraped records waiting for the ingestion worker",
+)
+INGEST_OLDEST_PENDING = Gauge(
+    "prod_assistant_ingest_oldest_pending_seconds", "Age of the oldest record still waiting in the queue",
+)
+EMBEDDING_CALLS = Counter(
+    "prod_assistant_embedding_calls_total", "Embedding API calls", ["kind"],
+)
+EMBEDDING_TEXTS = Counter(
+    "prod_assistant_embedding_texts_total", "Texts sent for embedding", ["kind"],
+)
+RETRIEVER_CALLS = Counter(
+    "prod_assistant_retriever_calls_total", "Retriever invocations", ["workflow", "node", "retriever"],
+)
+RETRIEVER_HITS = Histogram(
+    "prod_assistant_retriever_hits", "Documents returned per retriever invocation",
+    ["workflow", "node", "retriever"], buckets=(0, 1, 2, 3, 4, 5, 8, 10, 20, 50),
+)
+
+
+@contextlib.contextmanager
+def node_scope(workflow: str, node: str):
+    """Record wall time and errors of the enclosed block as (workflow, node); LLM/retriever calls inside are attributed to it."""
+    token = _current_node.set((workflow, node))
+    start = time.perf_counter()
+    status = "ok"
+    try:
+        with tracer.start_as_current_span(f"{workflow}.{node}", attributes={"workflow": workflow, "node": node}):
+            yield
+    except Exception:
+        status = "error"
+        NODE_ERRORS.labels(workflow, node).inc()
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        _current_node.reset(token)
+        NODE_LATENCY.labels(workflow, node).observe(elapsed)
+        profile = current_profile()
+        if profile is not None:
+            profile.add_span("node", node, start, start + elapsed, workflow=workflow, status=status)
+        log.info("Node finished", workflow=workflow, node=node,
+                 duration_ms=round(elapsed * 1000, 2), status=status)
+
+
+def instrument_node(workflow: str, node: str):
+    """Decorator recording wall time and errors of a workflow node (or pipeline stage)."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with node_scope(workflow, node):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _token_usage(response: LLMResult) -> tuple[int, int]:
+    """(prompt, completion) tokens from provider output; Gemini reports usage_metadata, Groq token_usage."""
+    usage = (response.llm_output or {}).get("token_usage") or {}
+    if usage:
+        return int(usage.get("prompt_tokens", 0)), int(usage.get("completion_tokens", 0))
+    prompt = completion = 0
+    for generations in response.generations:
+        for gen in generations:
+            meta = getattr(getattr(gen, "message", None), "usage_metadata", None) or {}
+            prompt += int(meta.get("input_tokens", 0))
+            completion += int(meta.get("output_tokens", 0))
+    return prompt, completion
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """LangChain callback recording LLM calls/tokens/latency and retriever hit counts."""
+
+    run_inline = True
+
+    def __init__(self):
+        self._llm_runs: dict[UUID, tuple[float, str, Any]] = {}
+        self._retriever_runs: dict[UUID, tuple[float, str, Any]] = {}
+
+    def _start_llm(self, run_id: UUID, serialized: dict | None, metadata: dict | None):
+        model = (metadata or {}).get("ls_model_name") or ((serialized or {}).get("kwargs") or {}).get("model") or "unknown"
+        span = tracer.start_span(f"llm {model}", kind=SpanKind.CLIENT, attributes={"llm.model": model})
+        self._llm_runs[run_id] = (time.perf_counter(), model, span)
+
+    def on_llm_start(self, serialized: dict, prompts: list[str], *, run_id: UUID, metadata: dict | None = None, **kwargs: Any):
+        self._start_llm(run_id, serialized, metadata)
+
+    def on_chat_model_start(self, serialized: dict, messages: list, *, run_id: UUID, metadata: dict | None = None, **kwargs: Any):
+        self._start_llm(run_id, serialized, metadata)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any):
+        start, model, span = self._llm_runs.pop(run_id, (None, "unknown", None))
+        # The LLM router reports which provider model actually answered
+        model = (response.llm_output or {}).get("model_name") or model
+        workflow, node = _current_node.get()
+        prompt_tokens, completion_tokens = _token_usage(response)
+        LLM_CALLS.labels(workflow, node, model).inc()
+        LLM_TOKENS.labels(workflow, node, model, "prompt").inc(prompt_tokens)
+        LLM_TOKENS.labels(workflow, node, model, "completion").inc(completion_tokens)
+        elapsed = time.perf_counter() - start if start else 0.0
+        LLM_LATENCY.labels(workflow, node, model).observe(elapsed)
+        log.info("LLM call finished", workflow=workflow, node=node, model=model,
+                 prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                 duration_ms=round(elapsed * 1000, 2))
+        profile = current_profile()
+        if profile is not None and start:
+            profile.add_span("llm", model, start, start + elapsed, node=node,
+                             prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+        if span is not None:
+            span.set_attributes({"llm.response_model": model, "node": node, "llm.prompt_tokens": prompt_tokens,
+                                 "llm.completion_tokens": completion_tokens})
+            span.end()
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        _end_span_with_error(self._llm_runs.pop(run_id, (None, None, None))[2], error)
+
+    def on_retriever_start(self, serialized: dict, query: str, *, run_id: UUID, **kwargs: Any):
+        name = kwargs.get("name") or (serialized or {}).get("name") or "retriever"
+        span = tracer.start_span(f"retriever {name}", attributes={"retriever": name})
+        self._retriever_runs[run_id] = (time.perf_counter(), name, span)
+
+    def on_retriever_end(self, documents, *, run_id: UUID, **kwargs: Any):
+        start, name, span = self._retriever_runs.pop(run_id, (None, "retriever", None))
+        workflow, node = _current_node.get()
+        RETRIEVER_CALLS.labels(workflow, node, name).inc()
+        RETRIEVER_HITS.labels(workflow, node, name).observe(len(documents))
+        log.info("Retriever finished", workflow=workflow, node=node, retriever=name, hits=len(documents))
+        profile = current_profile()
+        if profile is not None and start:
+            # The compression retriever's span includes the LLM filter; the inner vector store one does not
+            profile.add_span("retriever", name, start, time.perf_counter(), node=node, hits=len(documents))
+        if span is not None:
+            span.set_attributes({"node": node, "retriever.hits": len(documents)})
+            span.end()
+
+    def on_retriever_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        _end_span_with_error(self._retriever_runs.pop(run_id, (None, None, None))[2], error)
+
+
+def _end_span_with_error(span, error: BaseException):
+    if span is not None:
+        span.record_exception(error)
+        span.set_status(Status(StatusCode.ERROR, str(error)))
+        span.end()
+
+
+# Shared handler passed in the run config of every workflow invocation
+METRICS_CALLBACK = MetricsCallbackHandler()
+
+
+def mcp_server_env() -> dict[str, str]:
+    """Variables for MCP stdio servers on top of the SDK's minimal default environment.
+
+    Under gunicorn the server process writes its metrics to the same multiprocess directory as
+    the workers, so the API's /metrics scrape includes them.
+    """
+    return {name: os.environ[name] for name in ("PROMETHEUS_MULTIPROC_DIR",) if name in os.environ}
+
+
+def exported_callbacks() -> list[BaseCallbackHandler]:
+    """Metrics callbacks for a process that is not scraped itself (an MCP server): only in multiprocess mode."""
+    return [METRICS_CALLBACK] if os.getenv("PROMETHEUS_MULTIPROC_DIR") else []
+
+
+class InstrumentedEmbeddings(Embeddings):
+    """Embeddings wrapper counting embedding calls (LangChain emits no callbacks for them)."""
+
+    def __init__(self, embeddings: Embeddings):
+        self.embeddings = embeddings
+
+    @staticmethod
+    def _span(kind: str, start: float | None, texts: int):
+        if start is not None:
+            _, node = _current_node.get()
+            current_profile().add_span("embedding", kind, start, time.perf_counter(), node=node, texts=texts)
+
+    @staticmethod
+    def _started() -> float | None:
+        return time.perf_counter() if current_profile() is not None else None
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        EMBEDDING_CALLS.labels("documents").inc()
+        EMBEDDING_TEXTS.labels("documents").inc(len(texts))
+        start = self._started()
+        with tracer.start_as_current_span("embedding documents", kind=SpanKind.CLIENT,
+                                          attributes={"embedding.texts": len(texts)}):
+            vectors = self.embeddings.embed_documents(texts)
+        self._span("documents", start, len(texts))
+        return vectors
+
+    def embed_query(self, text: str) -> list[float]:
+        EMBEDDING_CALLS.labels("query").inc()
+        EMBEDDING_TEXTS.labels("query").inc()
+        start = self._started()
+        with tracer.start_as_current_span("embedding query", kind=SpanKind.CLIENT):
+            vector = self.embeddings.embed_query(text)
+        self._span("query", start, 1)
+        return vector
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        EMBEDDING_CALLS.labels("documents").inc()
+        EMBEDDING_TEXTS.labels("documents").inc(len(texts))
+        start = self._started()
+        with tracer.start_as_current_span("embedding documents", kind=SpanKind.CLIENT,
+                                          attributes={"embedding.texts": len(texts)}):
+            vectors = await self.embeddings.aembed_documents(texts)
+        self._span("documents", start, len(texts))
+        return vectors
+
+    async def aembed_query(self, text: str) -> list[float]:
+        EMBEDDING_CALLS.labels("query").inc()
+        EMBEDDING_TEXTS.labels("query").inc()
+        start = self._started()
+        with tracer.start_as_current_span("embedding query", kind=SpanKind.CLIENT):
+            vector = await self.embeddings.aembed_query(text)
+        self._span("query", start, 1)
+        return vector
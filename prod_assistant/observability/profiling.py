@@ -0,0 +1,205 @@
+import cProfile
+import hmac
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Callable
+
+from logger import GLOBAL_LOGGER as log
+
+# Profile of the request running in this context; None (the common case) makes every hook a no-op
+_active_profile: ContextVar["RequestProfile | None"] = ContextVar("active_profile", default=None)
+
+
+def current_profile() -> "RequestProfile | None":
+    return _active_profile.get()
+
+
+class RequestProfile:
+    """Span timeline of one profiled request: graph nodes, LLM calls, retrievers and embeddings."""
+
+    def __init__(self, profile_id: str):
+        self.profile_id = profile_id
+        self.started = time.perf_counter()
+        self.spans: list[dict] = []
+        self._lock = threading.Lock()  # nodes and callbacks may run on LangGraph/LangChain pool threads
+
+    def add_span(self, kind: str, name: str, start: float, end: float, **attrs: Any):
+        span = {
+            "kind": kind,
+            "name": name,
+            "start_ms": round((start - self.started) * 1000, 3),
+            "duration_ms": round((end - start) * 1000, 3),
+            **attrs,
+        }
+        with self._lock:
+            self.spans.append(span)
+
+    def timeline(self) -> list[dict]:
+        with self._lock:
+            return sorted(self.spans, key=lambda s: (s["start_ms"], -s["duration_ms"]))
+
+    def summary(self) -> dict[str, float]:
+        """Total ms per span, e.g. {"node:Retriever": 812.4, "llm:Retriever/gemini-2.0-flash-lite": 640.1}."""
+        totals: dict[str, float] = {}
+        for span in self.timeline():
+            # LLM calls keyed by node too: under Retriever they are the LLMChainFilter's
+            name = f"{span['node']}/{span['name']}" if span["kind"] == "llm" else span["name"]
+            key = f"{span['kind']}:{name}"
+            totals[key] = round(totals.get(key, 0.0) + span["duration_ms"], 3)
+        return dict(sorted(totals.items(), key=lambda kv: -kv[1]))
+
+
+def _pyinstrument_profiler():
+    try:
+        from pyinstrument import Profiler
+    except ImportError:
+        return None
+    return Profiler()
+
+
+class ProfilingForbidden(Exception):
+    """Raised when a profile is requested with a token that does not match; the API answers 403."""
+
+
+class RequestProfiler:
+    """
+    Opt-in per-request profiling for the API. A request that carries the trigger header (or
+    query parameter) while `enabled` is set, and matches the token from `token_env` when that
+    variable is set, runs under a CPU profiler (pyinstrument when installed, else cProfile) with
+    a span timeline of the LangGraph nodes. Both are written to `output_dir/<profile_id>.*`,
+    keeping the newest `max_profiles`. Unprofiled requests pay one header lookup.
+    """
+
+    def __init__(self, enabled: bool = False, header: str = "X-Profile", query_param: str = "profile",
+                 token_env: str = "PROFILING_TOKEN", output_dir: str = "profiles", max_profiles: int = 50,
+                 engine: str = "auto"):
+        self.enabled = enabled
+        self.header = header
+        self.query_param = query_param
+        self.token_env = token_env
+        self.output_dir = Path(output_dir)
+        self.max_profiles = max_profiles
+        self.engine = engine
+        # Profilers are process-wide on Python 3.12+ (sys.monitoring); one CPU profile at a time
+        self._cpu_lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: dict) -> "RequestProfiler":
+        block = config.get("profiling", {})
+        return cls(
+            enabled=block.get("enabled", False),
+            header=block.get("header", "X-Profile"),
+            query_param=block.get("query_param", "profile"),
+            token_env=block.get("token_env", "PROFILING_TOKEN"),
+            output_dir=block.get("output_dir", "profiles"),
+            max_profiles=block.get("max_profiles", 50),
+            engine=block.get("engine", "auto"),
+        )
+
+    def authorized(self, value: str | None) -> bool:
+        """
+        True when profiling is on and `value` (header / query flag) carries the configured token;
+        raises ProfilingForbidden when a token is configured and `value` is a different one.
+        """
+        if not self.enabled or value is None:
+            return False
+        token = os.getenv(self.token_env, "")
+        if not token:
+            return value.lower() in ("1", "true", "yes")
+        # Bytes, not str: compare_digest rejects non-ASCII strings with a TypeError
+        if not hmac.compare_digest(value.encode("utf-8", "surrogatepass"), token.encode("utf-8")):
+            raise ProfilingForbidden(f"invalid {self.header} token")
+        return True
+
+    def requested(self, headers, query_params) -> bool:
+        if not self.enabled:
+            return False
+        return self.authorized(headers.get(self.header) or query_params.get(self.query_param))
+
+    def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> tuple[Any, str]:
+        """Call `fn` under the profiler in the current thread; returns (result, profile_id)."""
+        profile = RequestProfile(f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}")
+        token = _active_profile.set(profile)
+        cpu = self._start_cpu_profiler()
+        error = None
+        try:
+            return fn(*args, **kwargs), profile.profile_id
+        except Exception as e:
+            error = repr(e)
+            raise
+        finally:
+            elapsed = time.perf_counter() - profile.started
+            _active_profile.reset(token)
+            cpu_artifact = self._stop_cpu_profiler(cpu, profile.profile_id)
+            self._save(profile, elapsed, cpu_artifact, error)
+
+    def _start_cpu_profiler(self):
+        if not self._cpu_lock.acquire(blocking=False):
+            return None  # another request is being profiled: timeline only
+        profiler = _pyinstrument_profiler() if self.engine in ("auto", "pyinstrument") else None
+        if profiler is None:
+            profiler = cProfile.Profile()
+        try:
+            if isinstance(profiler, cProfile.Profile):
+                profiler.enable()
+            else:
+                profiler.start()
+        except Exception as e:
+            self._cpu_lock.release()
+            log.warning("CPU profiler unavailable, recording timeline only", error=str(e))
+            return None
+        return profiler
+
+    def _stop_cpu_profiler(self, profiler, profile_id: str) -> str | None:
+        if profiler is None:
+            return None
+        try:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            if isinstance(profiler, cProfile.Profile):
+                profiler.disable()
+                path = self.output_dir / f"{profile_id}.prof"
+                profiler.dump_stats(path)
+                # Plain-text top functions next to the binary stats (snakeviz / pstats read the .prof)
+                text = io.StringIO()
+                pstats.Stats(profiler, stream=text).sort_stats("cumulative").print_stats(40)
+                (self.output_dir / f"{profile_id}.txt").write_text(text.getvalue(), encoding="utf-8")
+            else:
+                profiler.stop()
+                path = self.output_dir / f"{profile_id}.html"
+                path.write_text(profiler.output_html(), encoding="utf-8")
+            return path.name
+        finally:
+            self._cpu_lock.release()
+
+    def _save(self, profile: RequestProfile, elapsed: float, cpu_artifact: str | None, error: str | None):
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        report = {
+            "profile_id": profile.profile_id,
+            "total_ms": round(elapsed * 1000, 3),
+            "error": error,
+            "cpu_profile": cpu_artifact,
+            "summary_ms": profile.summary(),
+            "spans": profile.timeline(),
+        }
+        (self.output_dir / f"{profile.profile_id}.json").write_text(json.dumps(report, indent=2), encoding="utf-8")
+        log.info("Request profile saved", profile_id=profile.profile_id, total_ms=report["total_ms"],
+                 cpu_profile=cpu_artifact)
+        self._prune()
+
+    def _prune(self):
+        reports = sorted(self.output_dir.glob("*.json"), key=lambda p: p.stat().st_mtime)
+        for report in reports[: max(0, len(reports) - self.max_profiles)]:
+            for artifact in self.output_dir.glob(f"{report.stem}.*"):
+                artifact.unlink(missing_ok=True)
+
+    def artifact(self, name: str) -> Path | None:
+        """Path of a stored artifact (`<profile_id>.json|.prof|.txt|.html`), or None."""
+        path = self.output_dir / Path(name).name  # no directory traversal
+        return path if path.suffix in (".json", ".prof", ".txt", ".html") and path.is_file() else None
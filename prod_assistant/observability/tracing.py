@@ -0,0 +1,84 @@
+import os
+from pathlib import Path
+from typing import Any
+
+from opentelemetry import propagate, trace
+from opentelemetry.trace import SpanKind
+
+from logger import GLOBAL_LOGGER as log
+
+# Spans from the API, graph nodes, LLM/retriever callbacks and the MCP server all use this
+# tracer. Until setup_tracing() installs a provider it is the API's no-op tracer.
+tracer = trace.get_tracer("prod_assistant")
+
+_configured = False
+
+
+def setup_tracing(service_name: str, config: dict) -> bool:
+    """
+    Install the process's tracer provider from the `tracing` config block: spans are batched
+    to an OTLP/HTTP collector (`exporter: otlp`, endpoint from `otlp_endpoint` or the standard
+    OTEL_EXPORTER_OTLP_* env vars), appended as OTLP-JSON lines to `<file_dir>/<service>.jsonl`
+    (`exporter: file`), or printed (`exporter: console`). Returns False when tracing is off.
+    """
+    global _configured
+    block = config.get("tracing", {})
+    if _configured or not block.get("enabled", False):
+        return _configured
+    try:
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+        from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+    except ImportError:
+        log.warning("Tracing enabled but opentelemetry-sdk is not installed; spans are dropped")
+        return False
+
+    exporter_name = os.getenv("TRACING_EXPORTER", block.get("exporter", "file"))
+    if exporter_name == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        endpoint = block.get("otlp_endpoint")
+        exporter = OTLPSpanExporter(endpoint=endpoint) if endpoint else OTLPSpanExporter()
+        target = endpoint or os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "default OTLP endpoint")
+    elif exporter_name == "file":
+        path = Path(block.get("file_dir", "traces")) / f"{service_name}.jsonl"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        exporter = ConsoleSpanExporter(
+            service_name=service_name,
+            out=open(path, "a", encoding="utf-8"),
+            formatter=lambda span: span.to_json(indent=None) + os.linesep,
+        )
+        target = str(path)
+    else:
+        exporter = ConsoleSpanExporter(service_name=service_name)
+        target = "stdout"
+
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": service_name}),
+        # Child processes (the MCP server) follow the caller's sampling decision
+        sampler=ParentBased(TraceIdRatioBased(block.get("sample_ratio", 1.0))),
+    )
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+    _configured = True
+    log.info("Tracing enabled", service=service_name, exporter=exporter_name, target=target)
+    return True
+
+
+def inject_context() -> dict[str, str]:
+    """W3C trace context (traceparent/tracestate) of the current span, for another process."""
+    carrier: dict[str, str] = {}
+    propagate.inject(carrier)
+    return carrier
+
+
+def extract_context(carrier: dict[str, str] | None):
+    """Parent context from a carrier filled by inject_context() (or HTTP headers)."""
+    return propagate.extract(carrier or {})
+
+
+async def call_mcp_tool(tool, arguments: dict[str, Any]) -> Any:
+    """Invoke an MCP tool in a client span, passing the trace context as its `trace_context` argument."""
+    with tracer.start_as_current_span(f"mcp.call {tool.name}", kind=SpanKind.CLIENT,
+                                      attributes={"mcp.tool": tool.name}):
+        return await tool.ainvoke({**arguments, "trace_context": inject_context()})
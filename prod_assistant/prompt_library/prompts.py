@@ -1,47 +1,157 @@
 from enum import Enum
+from functools import cached_property
 from typing import Dict
+import hashlib
 import string
+import textwrap
+
+from langchain_core.prompts import ChatPromptTemplate
 
 class PromptType(str, Enum):
     PRODUCT_BOT = "product_bot"
+    ASSISTANT = "assistant"
+    GRADER = "grader"
+    REWRITER = "rewriter"
+    TESTSET_GENERATOR = "testset_generator"
     # REVIEW_BOT = "review_bot"
     # COMPARISON_BOT = "comparison_bot"
 
 class PromptTemplate:
-    def __init__(self, template: str, description: str = "", version: str = "v1"):
-        self.template = template.strip()
+    """
+    A versioned prompt split into static `system` instructions and a variable `template`.
+    The static part always comes first (as the system message) so providers can reuse a
+    cached prefix across requests; the ChatPromptTemplate is compiled once and reused.
+    """
+
+    def __init__(self, template: str, description: str = "", version: str = "v1", system: str = ""):
+        self.system = textwrap.dedent(system).strip()
+        self.template = textwrap.dedent(template).strip()
         self.description = description
         self.version = version
+        # Parsed once; format() used to re-run string.Formatter on every call
+        self._placeholders = tuple(
+            field_name for _, field_name, _, _ in string.Formatter().parse(self.template) if field_name
+        )
+
+    @property
+    def full_template(self) -> str:
+        """System instructions + variable template as one string, for single-string consumers."""
+        return f"{self.system}\n\n{self.template}" if self.system else self.template
+
+    @cached_property
+    def cache_key(self) -> str:
+        """Stable id for this exact prompt text; changes whenever the wording does."""
+        digest = hashlib.sha256(self.full_template.encode("utf-8")).hexdigest()[:12]
+        return f"{self.version}-{digest}"
+
+    @cached_property
+    def chat_prompt(self) -> ChatPromptTemplate:
+        messages = [("system", self.system)] if self.system else []
+        messages.append(("human", self.template))
+        prompt = ChatPromptTemplate.from_messages(messages)
+        prompt.metadata = {"prompt_version": self.version, "prompt_cache_key": self.cache_key}
+        return prompt
 
     def format(self, **kwargs) -> str:
         # Validate placeholders before formatting
         missing = [
-            f for f in self.required_placeholders() if f not in kwargs
+            f for f in self._placeholders if f not in kwargs
         ]
         if missing:
             raise ValueError(f"Missing placeholders: {missing}")
-        return self.template.format(**kwargs)
-    
+        return self.full_template.format(**kwargs)
+
     def required_placeholders(self):
-        return[field_name for _, field_name, _, _ in string.Formatter().parse(self.template) if field_name]
-    
+        return list(self._placeholders)
+
 # Central Registry
 PROMPT_REGISTRY: Dict[PromptType, PromptTemplate] = {
-    
+
     PromptType.PRODUCT_BOT: PromptTemplate(
-        """
+        system="""
         You are an expert EcommerceBot specialized in product recommendatations and handling customer queries.
         Analyze the provided product titles, ratings and reviews to provide accurate, helpful responses.
         Stay relevant to the context, and keep your answers concies and informative.
-
+        """,
+        template="""
         CONTEXT:
         {context}
 
         QUESTION: {question}
 
         YOUR ANSWER:
-        """,    
-        description = "Handles ecommerce QnA $ product recommendation flows"   
-    )
+        """,
+        description = "Handles ecommerce QnA $ product recommendation flows",
+        version = "v2",
+    ),
+
+    PromptType.ASSISTANT: PromptTemplate(
+        system="You are a helpful assistant. Answer the user directly.",
+        template="Question: {question}\nAnswer:",
+        description="Direct answers for questions that need no product retrieval",
+    ),
+
+    PromptType.GRADER: PromptTemplate(
+        system="You are a grader. Decide whether the docs are relevant to the question. Answer yes or no.",
+        template="Question: {question}\nDocs: {docs}",
+        description="Yes/no relevance check of retrieved context",
+    ),
+
+    PromptType.REWRITER: PromptTemplate(
+        system=(
+            "Rewrite this user query to make it more clear and specific for a search engine. "
+            "Do NOT answer the query. Only rewrite it."
+        ),
+        template="Query: {question}\nRewritten Query:",
+        description="Query rewrite before another retrieval / web search",
+    ),
+
+    PromptType.TESTSET_GENERATOR: PromptTemplate(
+        system="""
+        You write evaluation data for an e-commerce product assistant.
+        Given one product's title, price, rating and reviews, write realistic shopper questions
+        that this product's context can answer, each with a short answer grounded only in that context.
+        Respond with a JSON array of objects with "question" and "answer" keys and nothing else.
+        """,
+        template="""
+        CONTEXT:
+        {context}
+
+        Write {n} question/answer pairs.
+        """,
+        description="Synthetic question/answer pairs per catalog product for evaluation sets",
+    ),
+
+    }
+
+
+def get_prompt(prompt_type: PromptType) -> ChatPromptTemplate:
+    """Compiled chat prompt for `prompt_type` (built on first use, then shared)."""
+    return PROMPT_REGISTRY[prompt_type].chat_prompt
+
+
+# --- Benchmark: per-call prompt construction overhead ---
+if __name__ == "__main__":
+    import timeit
+
+    entry = PROMPT_REGISTRY[PromptType.PRODUCT_BOT]
+    inputs = {"context": "Title: Apple iPhone 15\nPrice: ₹69,999\nRating: 4.6\nReviews:\n- 5/5 Great phone " * 5,
+              "question": "What is the price of iPhone 15?"}
+    n = 5000
 
-    }
\ No newline at end of file
+    cases = {
+        "rebuild from_template + format_messages": lambda: ChatPromptTemplate.from_template(entry.full_template).format_messages(**inputs),
+        "compiled chat_prompt.format_messages": lambda: entry.chat_prompt.format_messages(**inputs),
+        "rebuild from_template + invoke": lambda: ChatPromptTemplate.from_template(entry.full_template).invoke(inputs),
+        "compiled chat_prompt.invoke": lambda: entry.chat_prompt.invoke(inputs),
+        "PromptTemplate.format (placeholders re-parsed)": lambda: (
+            [f for _, f, _, _ in string.Formatter().parse(entry.template) if f], entry.full_template.format(**inputs)),
+        "PromptTemplate.format (cached placeholders)": lambda: entry.format(**inputs),
+    }
+    print(f"{'case':50} {'us/call':>9}")
+    for name, fn in cases.items():
+        fn()
+        per_call = min(timeit.repeat(fn, number=n, repeat=3)) / n * 1e6
+        print(f"{name:50} {per_call:9.1f}")
+    for prompt_type, p in PROMPT_REGISTRY.items():
+        print(f"{prompt_type.value:12} cache_key={p.cache_key}")
@@ -0,0 +1,252 @@
+import csv
+import math
+import re
+from array import array
+from pathlib import Path
+
+from logger import GLOBAL_LOGGER as log
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_SOURCE = "data/product_reviews.csv"
+
+_WORD = re.compile(r"[a-z0-9]+")
+_STORAGE = re.compile(r"\b(\d+)\s*(gb|tb)\b")
+_STORAGE_TOKEN = re.compile(r"\d+(gb|tb)")
+_NUMBER = re.compile(r"[\d.]+")
+# Words after the model number that name a different model (iPhone 15 vs 15 Pro vs 15 Pro Max)
+_TIERS = {"pro", "max", "plus", "ultra", "mini", "lite", "se", "fe", "neo", "prime"}
+_FILLER = {"and", "with", "for", "the", "of", "in", "a", "an"}
+
+# What a lookup asks for; a question must ask for at least one and carry none of the opinion cues
+_ATTRIBUTES = {
+    "price": re.compile(r"\b(price[sd]?|cost[s]?|how much|mrp)\b"),
+    "rating": re.compile(r"\b(rating|rated|stars?)\b"),
+    "reviews": re.compile(r"\b(how many|number of|count of|total)\s+(customer\s+|user\s+)?(reviews|ratings)\b|\breview count\b"),
+}
+_NOT_A_LOOKUP = re.compile(
+    r"\b(compare|comparison|vs|versus|better|best|cheap|cheaper|cheapest|difference|between|recommend|"
+    r"should|worth|under|below|above|good|bad|camera|battery|display|performance|why|or)\b"
+)
+
+
+def normalize_title(title: str) -> str:
+    """Lowercased word tokens, storage written as one token ("512 GB" -> "512gb")."""
+    return " ".join(_WORD.findall(_STORAGE.sub(r"\1\2", (title or "").lower())))
+
+
+def parse_price(value) -> float:
+    """'₹1,04,999' -> 104999.0; NaN when there is no number."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    digits = _NUMBER.search(str(value or "").replace(",", ""))
+    return float(digits.group()) if digits else math.nan
+
+
+def parse_count(value) -> int:
+    """'2,581' -> 2581; -1 when unknown."""
+    price = parse_price(value)
+    return -1 if math.isnan(price) else int(price)
+
+
+def format_inr(value: float) -> str:
+    """104999.0 -> '₹1,04,999' (Indian digit grouping, as scraped from Flipkart)."""
+    digits = str(int(round(value)))
+    head, tail = digits[:-3], digits[-3:]
+    groups = []
+    while len(head) > 2:
+        head, group = head[:-2], head[-2:]
+        groups.insert(0, group)
+    return "₹" + ",".join(([head] if head else []) + groups + [tail])
+
+
+def _split_title(title: str) -> tuple[str, str]:
+    """'Apple iPhone 15 Pro (Black Titanium, 512 GB)' -> ('Apple iPhone 15 Pro', 'Black Titanium, 512 GB')."""
+    model, _, variant = (title or "").partition("(")
+    return model.strip(), variant.rstrip(")").strip()
+
+
+def _required_tokens(model_tokens: list[str]) -> frozenset:
+    """The model number plus the tier words after it: what a question must name to mean this model."""
+    for i, tok in enumerate(model_tokens):
+        if any(ch.isdigit() for ch in tok):
+            tiers = [t for t in model_tokens[i + 1:] if t in _TIERS]
+            return frozenset([tok, *tiers])
+    return frozenset(model_tokens)
+
+
+class ProductCatalog:
+    """
+    In-memory product table for price / rating / review-count lookups, built from the
+    ingestion metadata (product_id, product_title, price, rating, total_reviews).
+
+    Columns are parallel arrays: ids and titles as lists, numbers as typed `array`s (8 bytes
+    a price, 4 a rating, 8 a count) instead of a dict per product, or numpy views of a
+    memory-mapped snapshot (from_snapshot). An inverted index maps
+    model-name tokens to row numbers, so resolving a question touches only the rows that
+    share a token with it.
+    """
+
+    def __init__(self, max_variants: int = 4):
+        self.max_variants = max_variants
+        self.version: str | None = None  # snapshot version the rows were mapped from (None: records or CSV)
+        self.ids: list[str] = []
+        self.titles: list[str] = []
+        self.prices = array("d")
+        self.ratings = array("f")
+        self.review_counts = array("q")
+        self._model_tokens: list[frozenset] = []
+        self._required: list[frozenset] = []
+        self._variant_tokens: list[frozenset] = []
+        self._storage: list[str] = []
+        self._index: dict[str, array] = {}
+        self._model_vocab: set[str] = set()
+        self._variant_vocab: set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    # ---------- Build ----------
+    def add(self, product_id: str, title: str, price, rating, total_reviews):
+        row = len(self.ids)
+        self.ids.append(str(product_id))
+        self.titles.append(title)
+        self.prices.append(parse_price(price))
+        self.ratings.append(parse_price(rating))
+        self.review_counts.append(parse_count(total_reviews))
+        self._index_title(row, title)
+
+    def _index_title(self, row: int, title: str):
+        model, variant = _split_title(title)
+        model_tokens = normalize_title(model).split()
+        variant_tokens = normalize_title(variant).split()
+        self._model_tokens.append(frozenset(model_tokens) - _FILLER)
+        self._required.append(_required_tokens(model_tokens))
+        self._variant_tokens.append(frozenset(variant_tokens))
+        self._storage.append(next((t for t in variant_tokens if _STORAGE_TOKEN.fullmatch(t)), ""))
+        for tok in self._model_tokens[row]:
+            self._index.setdefault(tok, array("I")).append(row)
+        self._model_vocab.update(self._model_tokens[row])
+        self._variant_vocab.update(variant_tokens)
+
+    @classmethod
+    def from_records(cls, records, **kwargs) -> "ProductCatalog":
+        catalog = cls(**kwargs)
+        for r in records:
+            catalog.add(r["product_id"], r["product_title"], r.get("price"), r.get("rating"), r.get("total_reviews"))
+        return catalog
+
+    @classmethod
+    def from_documents(cls, docs, **kwargs) -> "ProductCatalog":
+        """From DataIngestion.transform_data() output (or retrieved documents): one row per metadata."""
+        return cls.from_records((d.metadata for d in docs), **kwargs)
+
+    @classmethod
+    def from_snapshot(cls, snapshot, **kwargs) -> "ProductCatalog":
+        """
+        From a utils.snapshot.CatalogSnapshot: the numeric columns are zero-copy views of the
+        memory-mapped file (shared by every worker), only ids, titles and the index are built.
+        """
+        catalog = cls(**kwargs)
+        catalog.version = snapshot.version
+        catalog.ids = snapshot.strings("product_id")
+        catalog.titles = snapshot.strings("product_title")
+        catalog.prices = snapshot.numeric("price_value")
+        catalog.ratings = snapshot.numeric("rating_value")
+        catalog.review_counts = snapshot.numeric("review_count")
+        for row, title in enumerate(catalog.titles):
+            catalog._index_title(row, title)
+        log.info("Product catalog mapped", products=len(catalog), snapshot=snapshot.version)
+        return catalog
+
+    @classmethod
+    def from_csv(cls, path: str | Path, **kwargs) -> "ProductCatalog":
+        """From the scraper CSV that DataIngestion ingests; missing file -> empty catalog."""
+        path = Path(path)
+        if not path.exists():
+            log.warning("Catalog source not found, catalog lookups disabled", path=str(path))
+            return cls(**kwargs)
+        with open(path, newline="", encoding="utf-8") as f:
+            catalog = cls.from_records((r for r in csv.DictReader(f) if r.get("product_id")), **kwargs)
+        log.info("Product catalog loaded", products=len(catalog), path=str(path))
+        return catalog
+
+    @classmethod
+    def from_config(cls, config: dict) -> "ProductCatalog":
+        block = config.get("catalog", {})
+        kwargs = {"max_variants": block.get("max_variants", 4)}
+        source = block.get("source", "snapshot")
+        if source == "snapshot":
+            from utils.snapshot import CatalogSnapshot
+
+            snapshot = CatalogSnapshot.from_config(config)
+            if snapshot is not None:
+                return cls.from_snapshot(snapshot, **kwargs)
+            log.warning("No catalog snapshot yet, loading the scraper CSV")
+            source = DEFAULT_SOURCE
+        path = Path(source)
+        if not path.is_absolute():
+            path = PROJECT_ROOT / path
+        return cls.from_csv(path, **kwargs)
+
+    # ---------- Lookup ----------
+    def resolve(self, query: str) -> list[int]:
+        """
+        Rows of the product the question names ([] when it names none).
+        A row matches when the question contains its model number and tier words, and every
+        model word in the question belongs to that row's title (so "15 Pro" never matches a
+        "15 Pro Max" and "S25 Ultra and S25 Plus" matches neither). Storage and colour words
+        then narrow the variants.
+        """
+        words = normalize_title(query).split()
+        named = {w for w in words if w in self._model_vocab} - _FILLER
+        if not named:
+            return []
+        candidates = set()
+        for tok in named:
+            candidates.update(self._index.get(tok, ()))
+        rows = sorted(r for r in candidates if self._required[r] <= named and named <= self._model_tokens[r])
+        storage = [w for w in words if _STORAGE_TOKEN.fullmatch(w)]
+        if storage:
+            rows = [r for r in rows if self._storage[r] in storage]
+        colours = {w for w in words if w in self._variant_vocab and w not in self._model_vocab and w not in storage}
+        if colours:
+            rows = [r for r in rows if colours <= self._variant_tokens[r]]
+        return rows
+
+    @staticmethod
+    def lookup_attributes(query: str) -> list[str]:
+        """The catalog fields a factual question asks for ([] for anything needing reviews or an LLM)."""
+        text = (query or "").lower()
+        if _NOT_A_LOOKUP.search(text):
+            return []
+        return [name for name, pattern in _ATTRIBUTES.items() if pattern.search(text)]
+
+    def _describe(self, row: int, attributes: list[str]) -> str:
+        parts = []
+        if "price" in attributes and not math.isnan(self.prices[row]):
+            parts.append(f"costs {format_inr(self.prices[row])}")
+        if "rating" in attributes and not math.isnan(self.ratings[row]):
+            parts.append(f"is rated {self.ratings[row]:.1f}/5")
+        if "reviews" in attributes and self.review_counts[row] >= 0:
+            parts.append(f"has {self.review_counts[row]:,} ratings and reviews")
+        return " and ".join(parts)
+
+    def answer(self, query: str) -> str | None:
+        """
+        A direct answer when the question asks for price / rating / review count of one
+        catalog product, else None. Variants that agree are answered once; variants that
+        differ (e.g. storage sizes) are listed when there are at most `max_variants`.
+        """
+        attributes = self.lookup_attributes(query)
+        if not attributes or not self.ids:
+            return None
+        rows = self.resolve(query)
+        if not rows:
+            return None
+        descriptions = {r: self._describe(r, attributes) for r in rows}
+        if not all(descriptions.values()) or len(rows) > self.max_variants and len(set(descriptions.values())) > 1:
+            return None
+        if len(set(descriptions.values())) == 1:
+            title = self.titles[rows[0]] if len(rows) == 1 else _split_title(self.titles[rows[0]])[0]
+            return f"The {title} {descriptions[rows[0]]}."
+        return "\n".join(f"- {self.titles[r]} {descriptions[r]}." for r in rows)
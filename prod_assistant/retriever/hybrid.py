@@ -0,0 +1,55 @@
+import math
+import re
+from collections import Counter
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.vectorstores import VectorStore
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def _terms(doc: Document) -> list[str]:
+    # Product titles live in metadata and are not embedded, so the lexical side reads them too
+    title = (doc.metadata or {}).get("product_title", "")
+    return _WORD.findall(f"{title} {doc.page_content}".lower())
+
+
+def bm25_rank(query: str, docs: list[Document], k1: float = 1.2, b: float = 0.75) -> list[int]:
+    """Indices of `docs` ordered by BM25 score for `query`, with IDF taken over `docs` themselves."""
+    query_terms = set(_WORD.findall((query or "").lower()))
+    tokenized = [_terms(d) for d in docs]
+    avg_len = sum(map(len, tokenized)) / len(tokenized) if tokenized else 0.0
+    doc_freq = Counter(t for toks in tokenized for t in set(toks) & query_terms)
+    n = len(docs)
+    scores = []
+    for toks in tokenized:
+        tf = Counter(t for t in toks if t in query_terms)
+        score = 0.0
+        for term, freq in tf.items():
+            idf = math.log(1 + (n - doc_freq[term] + 0.5) / (doc_freq[term] + 0.5))
+            score += idf * freq * (k1 + 1) / (freq + k1 * (1 - b + b * len(toks) / (avg_len or 1)))
+        scores.append(score)
+    return sorted(range(n), key=lambda i: -scores[i])
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    Vector + lexical retrieval: the `fetch_k` nearest documents are re-ranked by reciprocal
+    rank fusion of their vector rank and a BM25 rank over title + reviews, and the top `k`
+    are returned. No extra round trip to the vector store, so it works on AstraDB as is.
+    """
+
+    vectorstore: VectorStore
+    k: int = 4
+    fetch_k: int = 20
+    rrf_k: int = 60
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> list[Document]:
+        candidates = self.vectorstore.similarity_search(query, k=self.fetch_k)
+        fused = [1.0 / (self.rrf_k + rank) for rank in range(len(candidates))]
+        for rank, i in enumerate(bm25_rank(query, candidates)):
+            fused[i] += 1.0 / (self.rrf_k + rank)
+        order = sorted(range(len(candidates)), key=lambda i: -fused[i])
+        return [candidates[i] for i in order[: self.k]]
@@ -1,24 +1,60 @@
 import os
-from langchain_astradb import AstraDBVectorStore
-from utils.config_loader import load_config
+import threading
+from utils.config_loader import RetrieverConfig, load_config, get_config_store
 from utils.model_loader import ModelLoader
 from dotenv import load_dotenv
-from langchain.retrievers.document_compressors import LLMChainFilter
-from langchain.retrievers import ContextualCompressionRetriever
-from evaluation.ragas_eval import evaluate_context_precision, evaluate_response_relevancy
+from logger import GLOBAL_LOGGER as log
+from observability.instrumentation import INDEX_SWITCHES
 # Add the project root to the Python path for direct script execution
 # project_root = Path(__file__).resolve().parents[2]
 # sys.path.insert(0, str(project_root))
 
 class Retriever:
-    def __init__(self):
-        """_summary_
+    def __init__(self, model_loader: ModelLoader | None = None, vstore=None):
+        """
+        `model_loader` / `vstore` may be injected (e.g. offline fakes in benchmarks);
+        by default the configured models and the AstraDB collection are used.
         """
-        self.model_loader=ModelLoader()
-        self.config=load_config()
+        self.model_loader = model_loader or ModelLoader()
         self._load_env_variables()
-        self.vstore = None
+        self.vstore = vstore
+        self._injected_vstore = vstore
         self.retriever_instance = None
+        self.index = None
+        self.version = None  # index version being served (None: injected store or legacy collection)
+        self._warm = None  # (version, vector store) built and warmed ahead of a promotion
+        self._watcher = None
+        self._refresh_hooks = []
+        self._stop_watching = threading.Event()
+
+        # Hot reload: rebuild only what a changed section feeds into. The store holds these weakly;
+        # close() detaches a retriever that is dropped while the config can still change.
+        store = get_config_store()
+        self._unsubscribe = [store.subscribe(section, self._reset_retriever)
+                             for section in ("retriever", "llm", "llm_provider", "llm_router", "llm_tasks")]
+        self._unsubscribe += [store.subscribe(section, self._reset_vstore)
+                              for section in ("astra_db", "embedding_model", "snapshot", "index")]
+
+    @property
+    def config(self) -> dict:
+        return load_config()
+
+    def _reset_retriever(self, old, new):
+        """MMR params or filter LLM changed: rebuild the retriever wrapper, keep the vector store."""
+        self.retriever_instance = None
+
+    def _reset_vstore(self, old, new):
+        """Connection or index settings changed: reconnect on next use. An injected store is kept."""
+        self.vstore = self._injected_vstore
+        self.retriever_instance = None
+        self.index = None
+
+    def close(self):
+        """Stop receiving config reloads and following the index pointer."""
+        for unsubscribe in self._unsubscribe:
+            unsubscribe()
+        self._unsubscribe = []
+        self._stop_watching.set()
     
     def _load_env_variables(self):
         """_summary_
@@ -37,41 +73,123 @@ class Retriever:
         self.db_application_token = os.getenv("ASTRA_DB_APPLICATION_TOKEN")
         self.db_keyspace = os.getenv("ASTRA_DB_KEYSPACE")
     
-    def load_retriever(self):
-        """_summary_
+    def load_index(self):
+        """The configured index backend (utils/index_versions.py): versioned AstraDB collections or local snapshots."""
+        if self.index is None:
+            from utils.index_versions import open_index
+            self.index = open_index(self.config, self.db_api_endpoint, self.db_application_token, self.db_keyspace)
+        return self.index
+
+    def load_vstore(self):
         """
-        if not self.vstore:
-            collection_name = self.config["astra_db"]["collection_name"]
-            
-            self.vstore =AstraDBVectorStore(
-                embedding= self.model_loader.load_embeddings(),
-                collection_name=collection_name,
-                api_endpoint=self.db_api_endpoint,
-                token=self.db_application_token,
-                namespace=self.db_keyspace,
-                )
-        if not self.retriever_instance:
-            top_k = self.config["retriever"]["top_k"] if "retriever" in self.config else 3
-            
-            mmr_retriever=self.vstore.as_retriever(
+        Connect (once) to the live index version, unless a store was injected, and start
+        following the index pointer so promoted versions are picked up without a restart.
+        """
+        vstore = self.vstore
+        if not vstore:
+            index = self.load_index()
+            version = index.pointer()["current"]
+            vstore = self.vstore = index.open_store(version, self.model_loader.load_embeddings())
+            self.version = version
+            log.info("Serving index version", backend=index.backend, version=version)
+            self.watch_index()
+        return vstore
+
+    # ---------- Blue/green switching ----------
+    def watch_index(self):
+        """Poll the index pointer every `index.poll_seconds` from a daemon thread (0 disables)."""
+        interval = self.config.get("index", {}).get("poll_seconds", 15)
+        if self._watcher is not None or interval <= 0:
+            return
+
+        def _loop():
+            while not self._stop_watching.wait(interval):
+                try:
+                    self.refresh_index()
+                except Exception as e:
+                    log.error("Index refresh failed, still serving", version=self.version, error=str(e))
+                for hook in list(self._refresh_hooks):
+                    try:
+                        hook()
+                    except Exception as e:
+                        log.error("Index refresh hook failed", hook=getattr(hook, "__qualname__", repr(hook)),
+                                  error=str(e))
+
+        self._watcher = threading.Thread(target=_loop, name="index-watcher", daemon=True)
+        self._watcher.start()
+
+    def add_refresh_hook(self, hook):
+        """Call `hook()` after every poll of the index pointer, e.g. to follow state built from the live snapshot."""
+        self._refresh_hooks.append(hook)
+
+    def _prepare(self, version: str):
+        """Open a version and warm it (connections, query embedding, first searches) off the request path."""
+        vstore = self.load_index().open_store(version, self.model_loader.load_embeddings())
+        for query in self.config.get("index", {}).get("warm_queries", []):
+            vstore.similarity_search(query, k=get_config_store().typed.retriever.top_k)
+        log.info("Index version warmed", version=version)
+        return vstore
+
+    def refresh_index(self):
+        """
+        Warm a staged candidate before it is promoted, and switch to the live version once the
+        pointer moves. The new store and retriever are built first and swapped in by plain
+        attribute assignment, so in-flight and new queries always see a complete version.
+        """
+        if self.index is None:
+            return  # injected store, or not loaded yet
+        pointer = self.index.pointer()
+        candidate, current = pointer.get("candidate"), pointer.get("current")
+        if candidate and candidate != self.version and (self._warm is None or self._warm[0] != candidate):
+            self._warm = (candidate, self._prepare(candidate))
+        if current == self.version:
+            return
+        vstore = self._warm[1] if self._warm and self._warm[0] == current else self._prepare(current)
+        retriever = self.build_retriever(get_config_store().typed.retriever, vstore)
+        previous = self.version
+        self.vstore, self.retriever_instance, self.version, self._warm = vstore, retriever, current, None
+        INDEX_SWITCHES.labels(self.index.backend).inc()
+        log.info("Switched index version", backend=self.index.backend, version=current, previous=previous)
+
+    def build_retriever(self, params: RetrieverConfig, vstore=None):
+        """
+        Retriever for the given params (not cached): MMR, or hybrid vector + BM25 fusion when
+        `params.hybrid`, wrapped in the per-document LLM filter when `params.llm_filter`.
+        Searches `vstore`, by default the live one.
+        """
+        # Heavy client libraries load with the first retriever, not at import time
+        from langchain.retrievers.document_compressors import LLMChainFilter
+        from langchain.retrievers import ContextualCompressionRetriever
+
+        vstore = vstore or self.load_vstore()
+        if params.hybrid:
+            from retriever.hybrid import HybridRetriever
+            base_retriever = HybridRetriever(vectorstore=vstore, k=params.top_k, fetch_k=params.fetch_k)
+        else:
+            base_retriever = vstore.as_retriever(
                 search_type="mmr",
-                search_kwargs={"k": top_k,
-                                "fetch_k": 20,
-                                "lambda_mult": 0.7,
-                                "score_threshold": 0.6
+                search_kwargs={"k": params.top_k,
+                                "fetch_k": params.fetch_k,
+                                "lambda_mult": params.lambda_mult,
+                                "score_threshold": params.score_threshold
                                })
+        if not params.llm_filter:
+            return base_retriever
+
+        llm = self.model_loader.load_llm("doc_filter")
+        compressor=LLMChainFilter.from_llm(llm)
+        return ContextualCompressionRetriever(
+            base_compressor=compressor, 
+            base_retriever=base_retriever
+        )
+
+    def load_retriever(self):
+        """Build (once) the retriever from the configured `retriever` params."""
+        retriever_instance = self.retriever_instance
+        if not retriever_instance:
+            retriever_instance = self.retriever_instance = self.build_retriever(get_config_store().typed.retriever)
             print("Retriever loaded successfully.")
-            
-            llm = self.model_loader.load_llm()
-            
-            compressor=LLMChainFilter.from_llm(llm)
-            
-            self.retriever_instance = ContextualCompressionRetriever(
-                base_compressor=compressor, 
-                base_retriever=mmr_retriever
-            )
-            
-        return self.retriever_instance
+        return retriever_instance
             
     def call_retriever(self,query):
         """_summary_
@@ -81,6 +199,8 @@ class Retriever:
         return output
     
 if __name__=='__main__':
+    from evaluation.ragas_eval import evaluate_context_precision, evaluate_response_relevancy
+
     user_query = "Can you suggest good budget iPhone under 1,00,00 INR?"
     
     retriever_obj = Retriever()
@@ -0,0 +1,72 @@
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+from langchain_core.vectorstores.utils import maximal_marginal_relevance
+
+from utils.snapshot import CatalogSnapshot
+
+
+class SnapshotVectorStore(VectorStore):
+    """
+    Read-only vector store over a memory-mapped catalog snapshot (utils/snapshot.py). Search is
+    an exact dot product against the mapped, L2-normalised embedding matrix, so only the query
+    embedding leaves the process; documents are materialised for the returned rows only.
+    Supports the MMR and plain similarity searches Retriever and HybridRetriever use.
+    """
+
+    def __init__(self, snapshot: CatalogSnapshot, embedding: Embeddings):
+        self.snapshot = snapshot
+        self.embedding = embedding
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self.embedding
+
+    def _query_vector(self, query: str) -> np.ndarray:
+        vector = np.asarray(self.embedding.embed_query(query), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _top(self, vector: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+        scores = self.snapshot.embeddings @ vector
+        k = min(k, len(scores))
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), scores[:0]
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return top, scores[top]
+
+    def similarity_search_with_score_by_vector(self, embedding: list[float], k: int = 4, **kwargs) -> list[tuple[Document, float]]:
+        rows, scores = self._top(np.asarray(embedding, dtype=np.float32), k)
+        return [(self.snapshot.document(int(r)), float(s)) for r, s in zip(rows, scores)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs) -> list[tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vector(self._query_vector(query), k)
+
+    def similarity_search_by_vector(self, embedding: list[float], k: int = 4, **kwargs) -> list[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k)]
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs) -> list[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k)]
+
+    def _select_relevance_score_fn(self):
+        return self._cosine_relevance_score_fn
+
+    def max_marginal_relevance_search_by_vector(self, embedding: list[float], k: int = 4, fetch_k: int = 20,
+                                                lambda_mult: float = 0.5, **kwargs) -> list[Document]:
+        vector = np.asarray(embedding, dtype=np.float32)
+        rows, _ = self._top(vector, fetch_k)
+        picked = maximal_marginal_relevance(vector, self.snapshot.embeddings[rows], lambda_mult=lambda_mult, k=k)
+        return [self.snapshot.document(int(rows[i])) for i in picked]
+
+    def max_marginal_relevance_search(self, query: str, k: int = 4, fetch_k: int = 20,
+                                      lambda_mult: float = 0.5, **kwargs) -> list[Document]:
+        return self.max_marginal_relevance_search_by_vector(self._query_vector(query), k, fetch_k, lambda_mult)
+
+    def add_texts(self, texts, metadatas=None, **kwargs):
+        raise NotImplementedError("Snapshots are read-only; DataIngestion writes a new version")
+
+    @classmethod
+    def from_texts(cls, texts, embedding, metadatas=None, **kwargs):
+        raise NotImplementedError("Snapshots are written by DataIngestion (utils/snapshot.write_snapshot)")
@@ -0,0 +1,190 @@
+import asyncio
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+
+from logger import GLOBAL_LOGGER as log
+from observability.instrumentation import (
+    ADMISSION_IN_FLIGHT,
+    ADMISSION_QUEUE_DEPTH,
+    ADMISSION_REJECTIONS,
+    ADMISSION_WAIT,
+)
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot be admitted; the API answers 429 with Retry-After."""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(f"request rejected: {reason}")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Per-worker admission control for the chat endpoint: at most `max_concurrency` requests
+    run at once, up to `max_queue` wait (at most `max_queued_per_client` per client), and a
+    freed slot goes to the next client in round-robin order so one busy client cannot starve
+    the rest. Everything runs on the worker's event loop, so no locking is needed.
+    """
+
+    def __init__(self, max_concurrency: int = 8, max_queue: int = 32, max_queued_per_client: int = 4,
+                 queue_timeout_seconds: float = 10.0, retry_after_seconds: float = 2.0):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_queued_per_client = max_queued_per_client
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self.retry_after_seconds = retry_after_seconds
+        self.in_flight = 0
+        self._waiting: OrderedDict[str, deque[asyncio.Future]] = OrderedDict()
+        self._queued = 0
+
+    @classmethod
+    def from_config(cls, config: dict) -> "AdmissionController":
+        block = config.get("admission", {})
+        return cls(
+            max_concurrency=block.get("max_concurrency", 8),
+            max_queue=block.get("max_queue", 32),
+            max_queued_per_client=block.get("max_queued_per_client", 4),
+            queue_timeout_seconds=block.get("queue_timeout_seconds", 10.0),
+            retry_after_seconds=block.get("retry_after_seconds", 2.0),
+        )
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queued
+
+    def _reject(self, client_id: str, reason: str):
+        ADMISSION_REJECTIONS.labels(reason).inc()
+        log.warning("Request rejected by admission control", client=client_id, reason=reason,
+                    in_flight=self.in_flight, queued=self._queued)
+        raise AdmissionRejected(reason, self.retry_after_seconds)
+
+    def _update_gauges(self):
+        ADMISSION_IN_FLIGHT.set(self.in_flight)
+        ADMISSION_QUEUE_DEPTH.set(self._queued)
+
+    def _dequeue(self, client_id: str, waiter: asyncio.Future):
+        queue = self._waiting.get(client_id)
+        if queue and waiter in queue:
+            queue.remove(waiter)
+            self._queued -= 1
+            if not queue:
+                del self._waiting[client_id]
+
+    async def acquire(self, client_id: str):
+        if self.in_flight < self.max_concurrency and not self._queued:
+            self.in_flight += 1
+            self._update_gauges()
+            ADMISSION_WAIT.observe(0.0)
+            return
+        if self._queued >= self.max_queue:
+            self._reject(client_id, "queue_full")
+        if len(self._waiting.get(client_id, ())) >= self.max_queued_per_client:
+            self._reject(client_id, "client_queue_full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiting.setdefault(client_id, deque()).append(waiter)
+        self._queued += 1
+        self._update_gauges()
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout=self.queue_timeout_seconds)
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                # Granted a slot in the same tick the timeout fired: take it
+                ADMISSION_WAIT.observe(time.perf_counter() - started)
+                return
+            waiter.cancel()
+            self._dequeue(client_id, waiter)
+            self._update_gauges()
+            self._reject(client_id, "timeout")
+        except asyncio.CancelledError:
+            # Client went away while queued; hand the slot on if it was already granted
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            else:
+                waiter.cancel()
+                self._dequeue(client_id, waiter)
+                self._update_gauges()
+            raise
+        ADMISSION_WAIT.observe(time.perf_counter() - started)
+
+    def release(self):
+        """Pass the slot to the next waiting client (round robin), or free it."""
+        while self._waiting:
+            client_id, queue = next(iter(self._waiting.items()))
+            waiter = queue.popleft()
+            self._queued -= 1
+            if queue:
+                self._waiting.move_to_end(client_id)
+            else:
+                del self._waiting[client_id]
+            if not waiter.done():
+                waiter.set_result(True)  # slot transferred, in_flight unchanged
+                self._update_gauges()
+                return
+        self.in_flight -= 1
+        self._update_gauges()
+
+    @asynccontextmanager
+    async def slot(self, client_id: str):
+        await self.acquire(client_id)
+        try:
+            yield
+        finally:
+            self.release()
+
+
+# --- Local load generator against a stubbed agent (no LLM / AstraDB) ---
+if __name__ == "__main__":
+    import argparse
+    import os
+    import statistics
+    from collections import Counter
+
+    import httpx
+
+    parser = argparse.ArgumentParser(description="Burst /get with stubbed backends and report admission behaviour")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--clients", type=int, default=10)
+    parser.add_argument("--hog-share", type=float, default=0.5, help="Fraction of requests from one noisy client")
+    parser.add_argument("--agent-latency", type=float, default=0.25)
+    args = parser.parse_args()
+
+    os.chdir(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+    import router.main as api
+
+    class StubAgent:
+        def run_with_metadata(self, query: str, thread_id: str = "default_thread") -> dict:
+            time.sleep(args.agent_latency)
+            return {"answer": f"stub answer to {query}", "budget": {}}
+
+    api._rag_agent = StubAgent()
+
+    async def main():
+        transport = httpx.ASGITransport(app=api.app)
+        hog_count = int(args.requests * args.hog_share)
+        senders = ["hog"] * hog_count + [f"client-{i % args.clients}" for i in range(args.requests - hog_count)]
+
+        async def one(client_id: str):
+            started = time.perf_counter()
+            async with httpx.AsyncClient(transport=transport, base_url="http://api",
+                                         cookies={api.SESSION_COOKIE: client_id}) as client:
+                resp = await client.post("/get", data={"msg": "price of iphone 15"})
+            return client_id, resp.status_code, time.perf_counter() - started
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(one(c) for c in senders))
+        elapsed = time.perf_counter() - started
+        ok = sorted(lat for _, status, lat in results if status == 200)
+        print(f"admission: {api.admission.max_concurrency} concurrent, queue {api.admission.max_queue}")
+        print(f"{len(results)} requests in {elapsed:.2f}s; status counts: {dict(Counter(s for _, s, _ in results))}")
+        if ok:
+            print(f"200 latency p50={statistics.median(ok):.2f}s p99={ok[int(len(ok) * 0.99) - 1]:.2f}s max={ok[-1]:.2f}s")
+        by_client = Counter((c == "hog", s) for c, s, _ in results)
+        print(f"hog client: {by_client[(True, 200)]} ok / {by_client[(True, 429)]} rejected; "
+              f"others: {by_client[(False, 200)]} ok / {by_client[(False, 429)]} rejected")
+
+    asyncio.run(main())
@@ -0,0 +1,76 @@
+"""
+Production serving profile: gunicorn master + uvicorn workers, settings from the `serving`
+block of config.yaml (WEB_CONCURRENCY / BIND / PRELOAD env vars override workers / bind / preload).
+
+    gunicorn -c prod_assistant/router/gunicorn_conf.py router.main:app
+
+- workers: one per CPU core by default. With more than one, the checkpointer defaults to the
+  sqlite backend (CHECKPOINTER_BACKEND), which every worker writes through and reads back on
+  each turn, so a session's history follows it to whichever worker takes the request.
+  Admission limits and request coalescing stay per worker.
+- preload: the app and shared read-only state load once in the master and are inherited
+  copy-on-write (router/serving.preload_shared_state); clients are built per worker.
+- recycling: max_requests (+ jitter) and a per-worker RSS watchdog, both via graceful drain.
+- SIGTERM: the master drains every worker for graceful_timeout_seconds (k8 rolling update).
+- metrics: prometheus_client multiprocess mode, so /metrics aggregates all workers.
+- logs: the master writes logs/prod_assistant.log, each worker logs/prod_assistant.<pid>.log.
+"""
+import multiprocessing
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+PACKAGE_ROOT = Path(__file__).resolve().parents[1]
+PROJECT_ROOT = PACKAGE_ROOT.parent
+
+# Must be set before prometheus_client is first imported (by the app, in this process).
+# Cleared on first load only: gunicorn re-reads this file on SIGHUP while workers still write there.
+if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = os.path.join(tempfile.gettempdir(), "prod_assistant_metrics")
+    shutil.rmtree(os.environ["PROMETHEUS_MULTIPROC_DIR"], ignore_errors=True)
+os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+import prod_assistant  # noqa: E402,F401  (puts the package modules on sys.path)
+from utils.config_loader import load_config  # noqa: E402
+
+_serving = load_config().get("serving", {})
+
+bind = os.getenv("BIND", _serving.get("bind", "0.0.0.0:8000"))
+workers = int(os.getenv("WEB_CONCURRENCY", 0)) or _serving.get("workers") or multiprocessing.cpu_count()
+if workers > 1:
+    # In-memory history would be per worker; set before the app (and its agent) loads
+    os.environ.setdefault("CHECKPOINTER_BACKEND", "sqlite")
+worker_class = "router.serving.DrainingUvicornWorker"
+chdir = str(PROJECT_ROOT)  # static/ and templates/ are resolved from the project root
+preload_app = os.getenv("PRELOAD", str(_serving.get("preload", True))).lower() in ("1", "true", "yes")
+timeout = _serving.get("timeout_seconds", 120)
+graceful_timeout = _serving.get("graceful_timeout_seconds", 30)
+keepalive = _serving.get("keepalive_seconds", 5)
+max_requests = _serving.get("max_requests", 0)
+max_requests_jitter = _serving.get("max_requests_jitter", 0)
+accesslog = "-"
+
+
+def when_ready(server):
+    if not preload_app:
+        return  # each worker imports the app itself; nothing in the master to share
+    from router.serving import preload_shared_state
+
+    preload_shared_state()
+
+
+def post_worker_init(worker):
+    from router.serving import MemoryWatchdog, warm_worker
+
+    warm_worker()
+    MemoryWatchdog(
+        max_rss_mb=_serving.get("max_worker_rss_mb", 0),
+        interval_seconds=_serving.get("memory_check_interval_seconds", 10),
+    ).start()
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
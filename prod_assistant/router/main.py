@@ -1,15 +1,40 @@
-import uvicorn
-from fastapi import FastAPI, Request, Form
-from fastapi.responses import HTMLResponse
+import json
+import os
+import uuid
+from typing import TYPE_CHECKING
+from fastapi import FastAPI, Request, Form, HTTPException
+from fastapi.responses import FileResponse, HTMLResponse
+from fastapi.concurrency import run_in_threadpool
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from langchain_core.messages import HumanMessage
+from opentelemetry.trace import SpanKind, format_trace_id
+from prometheus_client import REGISTRY, CollectorRegistry, make_asgi_app, multiprocess
 
-from workflow.agentic_rag_workflow import AgenticRAG
+from utils.config_loader import get_config_store, load_config
+from router.admission import AdmissionController, AdmissionRejected
+from observability.profiling import ProfilingForbidden, RequestProfiler
+from observability.tracing import extract_context, setup_tracing, tracer
+
+if TYPE_CHECKING:
+    from workflow.agentic_rag_workflow import AgenticRAG
 
 app = FastAPI()
 app.mount("/static", StaticFiles(directory="static"), name="static")
+
+
+def _metrics_registry():
+    """Under gunicorn (PROMETHEUS_MULTIPROC_DIR set) a scrape aggregates every worker's samples."""
+    if not os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+# Prometheus scrape endpoint for node latency, LLM token and retriever metrics
+app.mount("/metrics", make_asgi_app(registry=_metrics_registry()))
 templates = Jinja2Templates(directory="templates")
 
 app.add_middleware(
@@ -20,18 +45,117 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+SESSION_COOKIE = "session_id"
+_rag_agent = None
+# Bounded concurrency + fair wait queue per worker; excess load gets 429 instead of slowing everyone
+admission = AdmissionController.from_config(load_config())
+# Opt-in per-request CPU profile + node timeline (profiling.enabled, X-Profile header / ?profile=)
+profiler = RequestProfiler.from_config(load_config())
+
+
+def _reload_profiler(old, new):
+    """Config reload touched the profiling block: apply it to the next request."""
+    global profiler
+    profiler = RequestProfiler.from_config(load_config())
+
+
+get_config_store().subscribe("profiling", _reload_profiler)
+
+def get_rag_agent() -> "AgenticRAG":
+    """
+    Build the agent once per worker; per-session history survives across requests (and, with
+    the sqlite checkpointer, across the gunicorn workers sharing its file). The
+    LangGraph / provider module graph loads here (or in the gunicorn master's preload), not on import.
+    """
+    global _rag_agent
+    if _rag_agent is None:
+        from workflow.agentic_rag_workflow import AgenticRAG
+        _rag_agent = AgenticRAG()
+    return _rag_agent
+
+@app.on_event("startup")
+def enable_config_reload():
+    """Hot-reload config.yaml (retriever params, LLM choice) without restarting uvicorn."""
+    store = get_config_store()
+    store.install_signal_handler()
+    reload_cfg = store.data.get("config_reload", {})
+    if reload_cfg.get("watch", False):
+        store.watch(reload_cfg.get("interval_seconds", 5))
+
+@app.on_event("startup")
+def enable_tracing():
+    """Export request / node / LLM / MCP spans when tracing.enabled is set (needs a restart to change)."""
+    setup_tracing("prod-assistant-api", load_config())
+
 # ------------FastAPI Endpoints -------------------------
 @app.get("/", response_class=HTMLResponse)
 async def index(request: Request):
     return templates.TemplateResponse("chat.html", {"request": request})
 
+@app.get("/healthz")
+async def healthz():
+    """Liveness / readiness probe; a draining worker has already closed its listener."""
+    return {"status": "ok", "pid": os.getpid(), "in_flight": admission.in_flight, "queued": admission.queue_depth}
+
 @app.post("/get", response_class=HTMLResponse)
-async def chat(msg: str = Form(...)):
+async def chat(request: Request, msg: str = Form(...)):
     """Call the Agentic workflow """
-    rag_agent = AgenticRAG()
-    answer = rag_agent.run(msg)  # run() already returns final answer string
+    # Root span of the chat trace (joins an incoming traceparent); the workflow thread inherits it
+    with tracer.start_as_current_span("POST /get", context=extract_context(dict(request.headers)),
+                                      kind=SpanKind.SERVER) as span:
+        response = await _chat(request, msg)
+        span.set_attribute("http.status_code", response.status_code)
+        if span.get_span_context().is_valid:
+            response.headers["X-Trace-Id"] = format_trace_id(span.get_span_context().trace_id)
+        return response
+
+async def _chat(request: Request, msg: str) -> HTMLResponse:
+    # One conversation thread per browser session instead of a shared default thread
+    session_id = request.cookies.get(SESSION_COOKIE) or uuid.uuid4().hex
+    # Fair-queue by session; first-time visitors share their client address
+    client_id = request.cookies.get(SESSION_COOKIE) or (request.client.host if request.client else "anonymous")
+    profile_id = None
+    try:
+        profiled = profiler.requested(request.headers, request.query_params)
+        async with admission.slot(client_id):
+            rag_agent = get_rag_agent()
+            # The workflow is blocking; run it off the event loop so queued requests stay responsive
+            if profiled:
+                result, profile_id = await run_in_threadpool(
+                    profiler.run, rag_agent.run_with_metadata, msg, thread_id=session_id)
+            else:
+                result = await run_in_threadpool(rag_agent.run_with_metadata, msg, thread_id=session_id)
+    except ProfilingForbidden:
+        return HTMLResponse(content="Invalid profiling token.", status_code=403)
+    except AdmissionRejected as e:
+        return HTMLResponse(
+            content="The assistant is busy right now. Please retry in a moment.",
+            status_code=429,
+            headers={"Retry-After": str(int(e.retry_after + 0.999))},
+        )
+    answer = result["answer"]
     print(f"Agentic Response: {answer}")
-    return answer
+    response = HTMLResponse(content=answer)
+    # Budget consumption (LLM calls, rewrites, tokens, elapsed, degraded) as response metadata
+    response.headers["X-Request-Budget"] = json.dumps(result["budget"])
+    if profile_id:
+        response.headers["X-Profile-Id"] = profile_id
+    response.set_cookie(SESSION_COOKIE, session_id, httponly=True, samesite="lax")
+    return response
+
+
+@app.get("/profiles/{name}")
+async def download_profile(request: Request, name: str):
+    """Stored profile artifact: `<id>.json` timeline, `<id>.prof`/`.txt` (cProfile) or `<id>.html` (pyinstrument)."""
+    try:
+        if not profiler.requested(request.headers, request.query_params):
+            raise HTTPException(status_code=404)
+    except ProfilingForbidden:
+        raise HTTPException(status_code=403)
+    path = profiler.artifact(name)
+    if path is None:
+        raise HTTPException(status_code=404)
+    return FileResponse(path, filename=path.name)
 
 
 # uvicorn prod_assistant.router.main:app --reload --port 8000
\ No newline at end of file
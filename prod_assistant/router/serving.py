@@ -0,0 +1,107 @@
+import gc
+import os
+import signal
+import threading
+import warnings
+from pathlib import Path
+
+from logger import GLOBAL_LOGGER as log
+
+with warnings.catch_warnings():
+    # uvicorn points at the separate uvicorn-worker package; the bundled worker is the same class
+    warnings.simplefilter("ignore", DeprecationWarning)
+    from uvicorn.workers import UvicornWorker
+
+
+class DrainingUvicornWorker(UvicornWorker):
+    """
+    Gunicorn worker for the FastAPI app. On SIGTERM (rolling update, or the memory watchdog) it
+    stops accepting connections and lets in-flight chats finish for up to gunicorn's
+    graceful_timeout before exiting; the bundled worker would wait on them without a bound.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.config.timeout_graceful_shutdown = self.cfg.graceful_timeout
+
+
+def rss_mb(pid: int | str = "self") -> float:
+    """Resident set size of a process in MiB (Linux /proc; 0.0 where unavailable)."""
+    try:
+        pages = int(Path(f"/proc/{pid}/statm").read_text().split()[1])
+    except (OSError, IndexError, ValueError):
+        return 0.0
+    return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+def pss_mb(pid: int | str = "self") -> float:
+    """Proportional set size in MiB: pages shared with other workers count fractionally."""
+    try:
+        for line in Path(f"/proc/{pid}/smaps_rollup").read_text().splitlines():
+            if line.startswith("Pss:"):
+                return int(line.split()[1]) / 1024
+    except (OSError, IndexError, ValueError):
+        pass
+    return 0.0
+
+
+class MemoryWatchdog:
+    """
+    Polls the worker's RSS from a daemon thread and, above `max_rss_mb`, sends the worker
+    SIGTERM once: it drains like on a rolling update and the gunicorn master forks a fresh
+    replacement from the preloaded state. Leaks are bounded without killing live requests.
+    """
+
+    def __init__(self, max_rss_mb: float, interval_seconds: float = 10.0):
+        self.max_rss_mb = max_rss_mb
+        self.interval_seconds = interval_seconds
+        self._stop = threading.Event()
+
+    def start(self):
+        if self.max_rss_mb <= 0:
+            return
+        threading.Thread(target=self._loop, name="memory-watchdog", daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self):
+        while not self._stop.wait(self.interval_seconds):
+            rss = rss_mb()
+            if rss > self.max_rss_mb:
+                log.warning("Worker over memory limit, draining for replacement", pid=os.getpid(),
+                            rss_mb=round(rss, 1), max_rss_mb=self.max_rss_mb)
+                os.kill(os.getpid(), signal.SIGTERM)
+                return
+
+
+def preload_shared_state():
+    """
+    Read-only work done once in the gunicorn master so every forked worker shares it
+    copy-on-write: the LangChain / LangGraph / provider SDK imports, the parsed config and the
+    compiled prompts. Network clients (LLMs, AstraDB, the checkpointer) are not fork-safe and
+    are built per worker after the fork (warm_worker).
+    """
+    import workflow.agentic_rag_workflow  # noqa: F401  (pulls in the heavy module graph)
+    from prompt_library.prompts import PROMPT_REGISTRY
+    from utils.config_loader import get_config_store
+
+    get_config_store().typed
+    for prompt in PROMPT_REGISTRY.values():
+        prompt.chat_prompt
+    # Move everything allocated so far out of the GC's generations: collections in the workers
+    # then never write to these objects' headers, so their pages stay shared
+    gc.collect()
+    gc.freeze()
+    log.info("Shared state preloaded", pid=os.getpid(), rss_mb=round(rss_mb(), 1))
+
+
+def warm_worker():
+    """Build the worker's agent before it takes traffic, so the first chat is not a cold start."""
+    import router.main as api
+
+    try:
+        api.get_rag_agent()
+    except Exception as e:
+        # Lazy construction on the first request still applies
+        log.error("Worker warm-up failed", pid=os.getpid(), error=str(e))
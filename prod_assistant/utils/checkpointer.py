@@ -0,0 +1,357 @@
+# utils/checkpointer.py
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from pathlib import Path
+from typing import Any, Sequence
+
+from langchain_core.messages import RemoveMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import ChannelVersions, Checkpoint, CheckpointMetadata
+from langgraph.checkpoint.memory import InMemorySaver
+
+from logger import GLOBAL_LOGGER as log
+
+
+class BoundedCheckpointer(InMemorySaver):
+    """
+    In-memory LangGraph checkpointer with bounded growth.
+
+    - keeps at most `max_checkpoints_per_thread` checkpoints per thread/namespace
+    - evicts threads idle for longer than `ttl_seconds`
+    - evicts least recently used threads beyond `max_threads`
+    - optionally writes through to a local SQLite file, reloads it on restart and reads a
+      thread back from it on every get, so gunicorn workers sharing the file share history
+      (`max_threads` then bounds memory per worker; the file is bounded by the TTL)
+    """
+
+    def __init__(
+        self,
+        max_threads: int = 10000,
+        ttl_seconds: float = 3600,
+        max_checkpoints_per_thread: int = 3,
+        sqlite_path: str | None = None,
+    ):
+        super().__init__()
+        self.max_threads = max_threads
+        self.ttl_seconds = ttl_seconds
+        self.max_checkpoints_per_thread = max(1, max_checkpoints_per_thread)
+
+        self._lock = threading.RLock()
+        # thread_id -> last access time, ordered least -> most recently used
+        self._last_seen: OrderedDict[str, float] = OrderedDict()
+        # thread_id -> keys it owns in self.writes / self.blobs (avoids full scans on eviction)
+        self._write_keys: defaultdict[str, set] = defaultdict(set)
+        self._blob_keys: defaultdict[str, set] = defaultdict(set)
+        # thread_id -> ns -> checkpoint_id -> channel_versions, used to drop unreferenced blobs
+        self._versions: defaultdict[str, defaultdict[str, dict[str, ChannelVersions]]] = defaultdict(
+            lambda: defaultdict(dict)
+        )
+
+        self._db = None
+        self._swept_at = 0.0
+        if sqlite_path:
+            self._open_db(sqlite_path)
+            self._restore()
+
+    # ---------- SQLite persistence ----------
+    def _open_db(self, sqlite_path: str):
+        path = Path(sqlite_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        for table in ("checkpoints", "writes", "blobs"):
+            self._db.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} "
+                "(thread_id TEXT NOT NULL, key BLOB NOT NULL, value BLOB NOT NULL, PRIMARY KEY (thread_id, key))"
+            )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS threads (thread_id TEXT PRIMARY KEY, last_seen REAL NOT NULL)"
+        )
+        log.info("Checkpointer SQLite store opened", path=str(path))
+
+    def _persist(self, table: str, thread_id: str, key: Any, value: Any):
+        if self._db is not None:
+            self._db.execute(
+                f"INSERT OR REPLACE INTO {table} (thread_id, key, value) VALUES (?, ?, ?)",
+                (thread_id, pickle.dumps(key), pickle.dumps(value)),
+            )
+
+    def _unpersist(self, table: str, thread_id: str, keys: list):
+        if self._db is not None and keys:
+            self._db.executemany(
+                f"DELETE FROM {table} WHERE thread_id = ? AND key = ?",
+                [(thread_id, pickle.dumps(k)) for k in keys],
+            )
+
+    def _restore(self):
+        """Load persisted threads back into memory, dropping the ones already expired."""
+        now = time.time()
+        rows = self._db.execute("SELECT thread_id, last_seen FROM threads ORDER BY last_seen").fetchall()
+        expired = [tid for tid, seen in rows if now - seen > self.ttl_seconds]
+        live = {tid: seen for tid, seen in rows if now - seen <= self.ttl_seconds}
+
+        for tid in expired:
+            self._drop_persisted_thread(tid)
+        self._load_rows(live=live)
+        self._last_seen.update(live)
+        self._swept_at = now
+        log.info("Checkpointer restored from SQLite", threads=len(live), expired=len(expired))
+
+    def _load_rows(self, where: str = "", params: tuple = (), live: dict | None = None):
+        """Copy persisted checkpoints, writes and blobs into memory (those of `live` threads, if given)."""
+        def rows(table: str):
+            for thread_id, key, value in self._db.execute(f"SELECT thread_id, key, value FROM {table}{where}", params):
+                if live is None or thread_id in live:
+                    yield thread_id, pickle.loads(key), pickle.loads(value)
+
+        for thread_id, (checkpoint_ns, checkpoint_id), (saved, versions) in rows("checkpoints"):
+            self.storage[thread_id][checkpoint_ns][checkpoint_id] = saved
+            self._versions[thread_id][checkpoint_ns][checkpoint_id] = versions
+        for thread_id, (outer_key, inner_key), value in rows("writes"):
+            self.writes[outer_key][inner_key] = value
+            self._write_keys[thread_id].add(outer_key)
+        for thread_id, blob_key, value in rows("blobs"):
+            self.blobs[blob_key] = value
+            self._blob_keys[thread_id].add(blob_key)
+
+    def _reload_thread(self, thread_id: str):
+        """
+        Replace the in-memory copy of a thread with the persisted one: every gunicorn worker
+        writes through to the same file, so another worker may have advanced the conversation.
+        """
+        row = self._db.execute("SELECT last_seen FROM threads WHERE thread_id = ?", (thread_id,)).fetchone()
+        self._forget(thread_id)
+        if row is not None:
+            self._load_rows(" WHERE thread_id = ?", (thread_id,))
+            self._last_seen[thread_id] = row[0]
+
+    def _sweep(self, now: float):
+        """Drop persisted threads no process has touched within the TTL."""
+        self._swept_at = now
+        expired = self._db.execute(
+            "SELECT thread_id FROM threads WHERE last_seen < ?", (now - self.ttl_seconds,)
+        ).fetchall()
+        for (thread_id,) in expired:
+            self._drop_persisted_thread(thread_id)
+
+    def _drop_persisted_thread(self, thread_id: str):
+        if self._db is not None:
+            for table in ("checkpoints", "writes", "blobs", "threads"):
+                self._db.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+
+    # ---------- Bookkeeping ----------
+    def _touch(self, thread_id: str):
+        now = time.time()
+        self._last_seen[thread_id] = now
+        self._last_seen.move_to_end(thread_id)
+        if self._db is not None:
+            self._db.execute(
+                "INSERT OR REPLACE INTO threads (thread_id, last_seen) VALUES (?, ?)", (thread_id, now)
+            )
+        self._evict(now, keep=thread_id)
+
+    def _evict(self, now: float, keep: str):
+        """
+        Drop idle threads (TTL) and least recently used threads (capacity) from memory. With
+        SQLite the persisted copy stays until no process touched it for the TTL (_sweep): another
+        worker may still be serving the conversation.
+        """
+        while self._last_seen:
+            oldest, seen = next(iter(self._last_seen.items()))
+            if oldest == keep:
+                break
+            if now - seen > self.ttl_seconds or len(self._last_seen) > self.max_threads:
+                if self._db is None:
+                    self.delete_thread(oldest)
+                else:
+                    self._forget(oldest)
+            else:
+                break
+        if self._db is not None and now - self._swept_at >= min(60.0, self.ttl_seconds):
+            self._sweep(now)
+
+    def _prune(self, thread_id: str, checkpoint_ns: str):
+        """Keep only the newest checkpoints of a thread and the blobs they reference."""
+        checkpoints = self.storage[thread_id][checkpoint_ns]
+        excess = len(checkpoints) - self.max_checkpoints_per_thread
+        if excess <= 0:
+            return
+
+        # checkpoint ids are monotonic (uuid6), so sorting gives chronological order
+        stale = sorted(checkpoints)[:excess]
+        versions_by_id = self._versions[thread_id][checkpoint_ns]
+        for checkpoint_id in stale:
+            del checkpoints[checkpoint_id]
+            versions_by_id.pop(checkpoint_id, None)
+            outer_key = (thread_id, checkpoint_ns, checkpoint_id)
+            inner_keys = list(self.writes.pop(outer_key, {}).keys())
+            self._write_keys[thread_id].discard(outer_key)
+            self._unpersist("writes", thread_id, [(outer_key, k) for k in inner_keys])
+        self._unpersist("checkpoints", thread_id, [(checkpoint_ns, c) for c in stale])
+
+        referenced = {
+            (channel, version)
+            for versions in versions_by_id.values()
+            for channel, version in versions.items()
+        }
+        dropped = [
+            key for key in self._blob_keys[thread_id]
+            if key[1] == checkpoint_ns and (key[2], key[3]) not in referenced
+        ]
+        for key in dropped:
+            self.blobs.pop(key, None)
+            self._blob_keys[thread_id].discard(key)
+        self._unpersist("blobs", thread_id, dropped)
+
+    # ---------- BaseCheckpointSaver API ----------
+    def get_tuple(self, config: RunnableConfig):
+        with self._lock:
+            thread_id = config["configurable"]["thread_id"]
+            if self._db is not None:
+                self._reload_thread(thread_id)
+            if thread_id in self._last_seen:
+                self._touch(thread_id)
+            return super().get_tuple(config)
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        with self._lock:
+            thread_id = config["configurable"]["thread_id"]
+            checkpoint_ns = config["configurable"]["checkpoint_ns"]
+            next_config = super().put(config, checkpoint, metadata, new_versions)
+
+            checkpoint_id = checkpoint["id"]
+            versions = dict(checkpoint["channel_versions"])
+            self._versions[thread_id][checkpoint_ns][checkpoint_id] = versions
+            saved = self.storage[thread_id][checkpoint_ns][checkpoint_id]
+            self._persist("checkpoints", thread_id, (checkpoint_ns, checkpoint_id), (saved, versions))
+            for channel, version in new_versions.items():
+                blob_key = (thread_id, checkpoint_ns, channel, version)
+                self._blob_keys[thread_id].add(blob_key)
+                self._persist("blobs", thread_id, blob_key, self.blobs[blob_key])
+
+            self._prune(thread_id, checkpoint_ns)
+            self._touch(thread_id)
+            return next_config
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        with self._lock:
+            super().put_writes(config, writes, task_id, task_path)
+            thread_id = config["configurable"]["thread_id"]
+            outer_key = (thread_id, config["configurable"].get("checkpoint_ns", ""), config["configurable"]["checkpoint_id"])
+            self._write_keys[thread_id].add(outer_key)
+            if self._db is not None:
+                for inner_key, value in self.writes.get(outer_key, {}).items():
+                    self._persist("writes", thread_id, (outer_key, inner_key), value)
+
+    def _forget(self, thread_id: str):
+        """Drop a thread from memory, using the per-thread key index instead of scanning every write/blob."""
+        self.storage.pop(thread_id, None)
+        for key in self._write_keys.pop(thread_id, ()):
+            self.writes.pop(key, None)
+        for key in self._blob_keys.pop(thread_id, ()):
+            self.blobs.pop(key, None)
+        self._versions.pop(thread_id, None)
+        self._last_seen.pop(thread_id, None)
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            self._forget(thread_id)
+            self._drop_persisted_thread(thread_id)
+
+    @property
+    def active_threads(self) -> int:
+        return len(self._last_seen)
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+def load_checkpointer(config: dict) -> BoundedCheckpointer:
+    """
+    Build the conversation checkpointer from the `checkpointer` block of config.yaml.
+    CHECKPOINTER_BACKEND env var overrides the configured backend (memory | sqlite).
+    """
+    cp_config = config.get("checkpointer", {})
+    backend = os.getenv("CHECKPOINTER_BACKEND", cp_config.get("backend", "memory"))
+    sqlite_path = cp_config.get("sqlite_path", "data/checkpoints.sqlite") if backend == "sqlite" else None
+    log.info("Loading checkpointer", backend=backend)
+    return BoundedCheckpointer(
+        max_threads=cp_config.get("max_threads", 10000),
+        ttl_seconds=cp_config.get("thread_ttl_seconds", 3600),
+        max_checkpoints_per_thread=cp_config.get("max_checkpoints_per_thread", 3),
+        sqlite_path=sqlite_path,
+    )
+
+
+def trim_history(app, thread_config: RunnableConfig, max_messages: int) -> list:
+    """
+    Return RemoveMessage markers for the oldest messages of a thread so that the history
+    carried into the next turn is capped at `max_messages` messages.
+    """
+    snapshot = app.get_state(thread_config)
+    messages = (snapshot.values or {}).get("messages", []) if snapshot else []
+    excess = len(messages) - max_messages
+    if excess <= 0:
+        return []
+    return [RemoveMessage(id=m.id) for m in messages[:excess]]
+
+
+if __name__ == "__main__":
+    # Soak test: 10k sessions against the bounded checkpointer, reporting memory use.
+    import resource
+    import tracemalloc
+    from typing import Annotated, TypedDict
+    from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+    from langgraph.graph import StateGraph, START, END
+    from langgraph.graph.message import add_messages
+
+    class State(TypedDict):
+        messages: Annotated[Sequence[BaseMessage], add_messages]
+
+    def answer(state: State):
+        return {"messages": [AIMessage(content="Title: Apple iPhone 15\nPrice: 79,999\n" + "review " * 60)]}
+
+    graph = StateGraph(State)
+    graph.add_node("Answer", answer)
+    graph.add_edge(START, "Answer")
+    graph.add_edge("Answer", END)
+
+    sessions, turns, max_messages = 10000, 3, 6
+    saver = BoundedCheckpointer(max_threads=sessions, ttl_seconds=3600, max_checkpoints_per_thread=3)
+    app = graph.compile(checkpointer=saver)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    for turn in range(turns):
+        for i in range(sessions):
+            cfg = {"configurable": {"thread_id": f"session-{i}"}}
+            removals = trim_history(app, cfg, max_messages)
+            app.invoke({"messages": removals + [HumanMessage(content=f"price of iphone 15? turn {turn}")]}, config=cfg)
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    print(f"sessions={saver.active_threads} turns={turns} elapsed={elapsed:.1f}s")
+    print(f"traced memory: {current / 1e6:.1f} MB (peak {peak / 1e6:.1f} MB)")
+    print(f"memory per active session: {current / saver.active_threads / 1024:.1f} KB")
+    print(f"max resident set size: {rss_mb:.1f} MB")
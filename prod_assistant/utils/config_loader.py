@@ -1,13 +1,82 @@
 # utils/config_loader.py
 from pathlib import Path
 import os
+import signal
+import threading
+import weakref
+from typing import Callable
 import yaml
+from pydantic import BaseModel, ConfigDict, Field, ValidationError, model_validator
+from logger import GLOBAL_LOGGER as log
 
 def _project_root() -> Path:
     # ... /utils/config_loader.py -> parents[1] == project root
     return Path(__file__).resolve().parents[1]
 
-def load_config(config_path: str | None = None) -> dict:
+
+# ---------- Typed schema (only the blocks hot paths depend on; other blocks pass through) ----------
+class AstraDBConfig(BaseModel):
+    collection_name: str
+
+
+class EmbeddingConfig(BaseModel):
+    provider: str = "google"
+    model_name: str
+
+
+class RetrieverConfig(BaseModel):
+    top_k: int = Field(3, gt=0)
+    fetch_k: int = Field(20, gt=0)
+    lambda_mult: float = Field(0.7, ge=0.0, le=1.0)
+    score_threshold: float = Field(0.6, ge=0.0, le=1.0)
+    llm_filter: bool = True      # LLMChainFilter: one LLM call per retrieved doc
+    hybrid: bool = False         # vector + BM25 rank fusion instead of MMR
+
+    @model_validator(mode="after")
+    def _fetch_covers_top_k(self):
+        if self.fetch_k < self.top_k:
+            raise ValueError("retriever.fetch_k must be >= retriever.top_k")
+        return self
+
+
+class LLMProviderConfig(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    provider: str
+    model_name: str
+    temperature: float = 0.0
+    max_output_tokens: int = 2048
+
+
+class LLMTaskConfig(BaseModel):
+    provider: str | None = None            # pin one provider for this task (otherwise router/default)
+    models: dict[str, str] = {}            # provider key -> model_name for this task
+    max_output_tokens: int | None = Field(None, gt=0)
+    temperature: float | None = None
+
+
+class AppConfig(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    astra_db: AstraDBConfig
+    embedding_model: EmbeddingConfig
+    retriever: RetrieverConfig = RetrieverConfig()
+    llm: dict[str, LLMProviderConfig]
+    llm_provider: str = "google"
+    llm_tasks: dict[str, LLMTaskConfig] = {}
+
+    @model_validator(mode="after")
+    def _provider_is_configured(self):
+        if self.llm_provider not in self.llm:
+            raise ValueError(f"llm_provider '{self.llm_provider}' not found in llm block")
+        for task, cfg in self.llm_tasks.items():
+            unknown = (({cfg.provider} - {None}) | cfg.models.keys()) - self.llm.keys()
+            if unknown:
+                raise ValueError(f"llm_tasks.{task} references unknown provider(s): {sorted(unknown)}")
+        return self
+
+
+def _resolve_path(config_path: str | None = None) -> Path:
     """
     Resolve config path reliably irrespective of CWD.
     Priority: explicit arg > CONFIG_PATH env > <project_root>/config/config.yaml
@@ -22,6 +91,121 @@ def load_config(config_path: str | None = None) -> dict:
 
     if not path.exists():
         raise FileNotFoundError(f"Config file not found: {path}")
+    return path
+
 
+def _parse(path: Path) -> tuple[dict, AppConfig]:
     with open(path, "r", encoding="utf-8") as f:
-        return yaml.safe_load(f) or {}
+        raw = yaml.safe_load(f) or {}
+    return raw, AppConfig.model_validate(raw)
+
+
+class ConfigStore:
+    """
+    Process-wide holder of the parsed + validated config. Readers take `data` (the raw dict,
+    for existing callers) or `typed`; reload() swaps both in a single assignment, so a reader
+    never sees half of an update. Subscribers are notified per top-level section that changed,
+    letting each client rebuild only what depends on it. Bound methods are held weakly, so a
+    discarded client stops being notified without unsubscribing.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._subscribers: dict[str, list[Callable[[], Callable[[dict, dict], None] | None]]] = {}
+        self._mtime = path.stat().st_mtime
+        self._snapshot = _parse(path)
+        self._watcher: threading.Thread | None = None
+
+    @property
+    def data(self) -> dict:
+        return self._snapshot[0]
+
+    @property
+    def typed(self) -> AppConfig:
+        return self._snapshot[1]
+
+    def subscribe(self, section: str, callback: Callable[[dict, dict], None]) -> Callable[[], None]:
+        """Call `callback(old_section, new_section)` after a reload changes `section`; returns the unsubscribe."""
+        ref = weakref.WeakMethod(callback) if hasattr(callback, "__self__") else (lambda: callback)
+        with self._lock:
+            self._subscribers.setdefault(section, []).append(ref)
+
+        def unsubscribe():
+            with self._lock:
+                self._subscribers[section] = [r for r in self._subscribers.get(section, []) if r is not ref]
+        return unsubscribe
+
+    def reload(self) -> list[str]:
+        """Re-read the file; an invalid file keeps the current config. Returns the changed sections."""
+        with self._lock:
+            try:
+                self._mtime = self.path.stat().st_mtime
+                new_snapshot = _parse(self.path)
+            except (OSError, yaml.YAMLError, ValidationError) as e:
+                log.error("Config reload rejected, keeping current config", path=str(self.path), error=str(e))
+                return []
+            old = self.data
+            new = new_snapshot[0]
+            changed = sorted(k for k in old.keys() | new.keys() if old.get(k) != new.get(k))
+            self._snapshot = new_snapshot
+            callbacks = []
+            for section in changed:
+                alive = [(ref, ref()) for ref in self._subscribers.get(section, [])]
+                self._subscribers[section] = [ref for ref, cb in alive if cb is not None]  # drop collected clients
+                callbacks.extend((section, cb) for _, cb in alive if cb is not None)
+
+        log.info("Config reloaded", path=str(self.path), changed_sections=changed)
+        for section, cb in callbacks:
+            try:
+                cb(old.get(section), new.get(section))
+            except Exception as e:
+                log.error("Config subscriber failed", section=section, error=str(e))
+        return changed
+
+    def reload_if_changed(self) -> list[str]:
+        try:
+            mtime = self.path.stat().st_mtime
+        except OSError:
+            return []
+        return self.reload() if mtime != self._mtime else []
+
+    def watch(self, interval_seconds: float = 5.0):
+        """Poll the file's mtime from a daemon thread and reload on change."""
+        if self._watcher is not None:
+            return
+        stop = threading.Event()
+
+        def _loop():
+            while not stop.wait(interval_seconds):
+                self.reload_if_changed()
+
+        self._watcher = threading.Thread(target=_loop, name="config-watcher", daemon=True)
+        self._watcher.start()
+
+    def install_signal_handler(self, signum: int = getattr(signal, "SIGHUP", 0)):
+        """Reload on SIGHUP (`kill -HUP <pid>`). Must be called from the main thread."""
+        if not signum:
+            return
+        signal.signal(signum, lambda *_: threading.Thread(target=self.reload, daemon=True).start())
+
+
+_stores: dict[Path, ConfigStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_config_store(config_path: str | None = None) -> ConfigStore:
+    """Return the shared store for the resolved path, parsing the file on first use only."""
+    path = _resolve_path(config_path)
+    store = _stores.get(path)
+    if store is None:
+        with _stores_lock:
+            store = _stores.get(path)
+            if store is None:
+                store = _stores[path] = ConfigStore(path)
+    return store
+
+
+def load_config(config_path: str | None = None) -> dict:
+    """Current config as a plain dict; cached per process and refreshed by ConfigStore.reload()."""
+    return get_config_store(config_path).data
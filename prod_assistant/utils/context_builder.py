@@ -0,0 +1,170 @@
+import hashlib
+import re
+
+from langchain_core.documents import Document
+
+NO_DOCS = "No relevant documents found."
+REVIEW_SEPARATOR = " || "
+_SEPARATOR = "\n\n---\n\n"
+_NO_REVIEWS = "\n- No reviews."
+
+# Flipkart scraper tail after every review: "READ MORE <name> Certified Buyer , <city> <date> <up> <down> Permalink Report Abuse"
+_BOILERPLATE = re.compile(r"\s*(?:\.\.\.\s*)?(?:READ MORE\b.*?)?\bCertified Buyer\b.*?Permalink Report Abuse", re.S)
+_LEFTOVER = re.compile(r"\s*(?:\.\.\.\s*)?READ MORE\s*$|\bPermalink\b|\bReport Abuse\b")
+_STARS = re.compile(r"^([1-5])\s+(.+)$", re.S)
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def estimate_tokens(text: str) -> int:
+    """~4 chars/token, the same estimate the request budget uses when usage metadata is missing."""
+    return max(1, len(text) // 4) if text else 0
+
+
+def clean_reviews(raw: str) -> list[str]:
+    """Split a scraped `top_reviews` blob into reviews without buyer/permalink boilerplate."""
+    if not raw or raw.strip().lower() == "no reviews found":
+        return []
+    reviews = []
+    for chunk in str(raw).split("||"):
+        text = _LEFTOVER.sub("", _BOILERPLATE.sub("", chunk)).strip()
+        text = re.sub(r"\s+", " ", text)
+        if not text:
+            continue
+        m = _STARS.match(text)
+        reviews.append(f"{m.group(1)}/5 {m.group(2)}" if m else text)
+    return reviews
+
+
+def clean_review_text(raw: str) -> str:
+    """Cleaned reviews joined back into one page_content string (idempotent)."""
+    return REVIEW_SEPARATOR.join(clean_reviews(raw))
+
+
+def reviews_hash(text: str) -> str:
+    """Stable key for identical review text shared by product variants."""
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+
+class ContextBuilder:
+    """
+    Turns retrieved product docs into a compact prompt context: scraper boilerplate removed,
+    variants sharing identical reviews merged into one block, and reviews packed by query
+    relevance until `max_tokens` is reached. Blocks keep the "Title:/Price:/Rating:/Reviews:"
+    layout and the "\\n\\n---\\n\\n" separator the grader and RAGAS split on.
+    """
+
+    def __init__(self, max_tokens: int = 1200, max_reviews_per_product: int = 5):
+        self.max_tokens = max_tokens
+        self.max_reviews_per_product = max_reviews_per_product
+
+    @classmethod
+    def from_config(cls, config: dict) -> "ContextBuilder":
+        block = config.get("context", {})
+        return cls(
+            max_tokens=block.get("max_tokens", 1200),
+            max_reviews_per_product=block.get("max_reviews_per_product", 5),
+        )
+
+    def _groups(self, docs: list[Document]) -> list[tuple[list[dict], list[str]]]:
+        """(variant metadata list, reviews) per distinct review text, in retrieval order."""
+        groups: dict[str, tuple[list[dict], list[str]]] = {}
+        for d in docs:
+            meta = d.metadata or {}
+            reviews = clean_reviews(d.page_content)
+            key = meta.get("reviews_hash") or reviews_hash(REVIEW_SEPARATOR.join(reviews))
+            if not reviews:
+                key = f"no-reviews:{meta.get('product_id') or id(d)}"
+            variants, _ = groups.setdefault(key, ([], reviews))
+            if all(v.get("product_title") != meta.get("product_title") for v in variants):
+                variants.append(meta)
+        return list(groups.values())
+
+    @staticmethod
+    def _header(meta: dict) -> str:
+        return (
+            f"Title: {meta.get('product_title', 'N/A')}\n"
+            f"Price: {meta.get('price', 'N/A')}\n"
+            f"Rating: {meta.get('rating', 'N/A')}"
+        )
+
+    def build(self, query: str, docs: list[Document]) -> str:
+        if not docs:
+            return NO_DOCS
+        terms = set(_WORD.findall((query or "").lower()))
+        # Packed in characters, so estimate_tokens() of the whole context stays within max_tokens
+        # (summing per-piece token estimates undercounts). The first product always gets a block.
+        remaining = self.max_tokens * 4
+        blocks = []
+        for variants, reviews in self._groups(docs):
+            header = "\n".join(self._header(meta) for meta in variants) + "\nReviews:"
+            cost = len(header) + len(_NO_REVIEWS) + (len(_SEPARATOR) if blocks else 0)
+            if blocks and cost > remaining:
+                break
+            remaining -= cost
+            # Most query-relevant reviews first; ties keep the scraped (helpfulness) order
+            ranked = sorted(reviews, key=lambda r: -len(terms & set(_WORD.findall(r.lower()))))
+            kept = []
+            for review in ranked[: self.max_reviews_per_product]:
+                line = f"\n- {review}"
+                line_cost = len(line) - (0 if kept else len(_NO_REVIEWS))  # the first one replaces "No reviews."
+                if line_cost > remaining:
+                    continue
+                kept.append(line)
+                remaining -= line_cost
+            blocks.append(header + ("".join(kept) or _NO_REVIEWS))
+        return _SEPARATOR.join(blocks)
+
+
+def legacy_format(docs: list[Document]) -> str:
+    """The previous `_format_docs` output, kept for the before/after report below."""
+    if not docs:
+        return NO_DOCS
+    chunks = []
+    for d in docs:
+        meta = d.metadata or {}
+        chunks.append(
+            f"Title: {meta.get('product_title', 'N/A')}\n"
+            f"Price: {meta.get('price', 'N/A')}\n"
+            f"Rating: {meta.get('rating', 'N/A')}\n"
+            f"Reviews:\n{d.page_content.strip()}"
+        )
+    return "\n\n---\n\n".join(chunks)
+
+
+# --- Prompt-token reduction on the sample dataset (lexical top-k stands in for AstraDB) ---
+if __name__ == "__main__":
+    import sys
+    import pandas as pd
+
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else "data/product_reviews.csv"
+    df = pd.read_csv(csv_path)
+    docs = [
+        Document(page_content=row["top_reviews"], metadata={
+            "product_id": row["product_id"], "product_title": row["product_title"],
+            "rating": row["rating"], "total_reviews": row["total_reviews"], "price": row["price"],
+        })
+        for _, row in df.iterrows()
+    ]
+
+    def top_k(query: str, k: int = 4) -> list[Document]:
+        terms = set(_WORD.findall(query.lower()))
+        score = lambda d: len(terms & set(_WORD.findall((d.metadata["product_title"] + " " + d.page_content).lower())))
+        return sorted(docs, key=score, reverse=True)[:k]
+
+    queries = [
+        "What is the price of iPhone 15 Pro?",
+        "How is the camera on iPhone 15 Pro Max?",
+        "Is iPhone 15 Plus good for battery life?",
+        "Samsung Galaxy S24 reviews",
+        "Compare Samsung S25 Ultra and S25 Plus",
+        "best phone with good performance",
+    ]
+    builder = ContextBuilder()
+    total_before = total_after = 0
+    print(f"{'query':45} {'before':>7} {'after':>7} {'saved':>7}")
+    for q in queries:
+        retrieved = top_k(q)
+        before, after = estimate_tokens(legacy_format(retrieved)), estimate_tokens(builder.build(q, retrieved))
+        total_before, total_after = total_before + before, total_after + after
+        print(f"{q[:45]:45} {before:7d} {after:7d} {1 - after / before:7.0%}")
+    print(f"{'total':45} {total_before:7d} {total_after:7d} {1 - total_after / total_before:7.0%}")
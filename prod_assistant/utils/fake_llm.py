@@ -0,0 +1,65 @@
+import asyncio
+import random
+import time
+from typing import Any
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import PrivateAttr
+
+
+class FakeProviderError(RuntimeError):
+    """Injected provider failure (stands in for a 429 / 5xx from a real LLM API)."""
+
+
+class FakeProviderChatModel(BaseChatModel):
+    """
+    Offline chat model for exercising routing, hedging and load paths without API keys.
+    Each call sleeps `latency_s` plus up to `jitter_s`, then fails with probability
+    `failure_rate` or returns `response` with ~4 chars/token usage metadata.
+    """
+
+    response: str = "ok"
+    latency_s: float = 0.0
+    jitter_s: float = 0.0
+    failure_rate: float = 0.0
+    seed: int | None = None
+    model_name: str = "fake-provider"
+
+    _rng: random.Random = PrivateAttr(default_factory=random.Random)
+
+    def model_post_init(self, __context: Any) -> None:
+        self._rng = random.Random(self.seed)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake_provider"
+
+    def _draw(self) -> tuple[float, bool]:
+        return self.latency_s + self._rng.random() * self.jitter_s, self._rng.random() < self.failure_rate
+
+    def _result(self, messages: list[BaseMessage], fail: bool) -> ChatResult:
+        if fail:
+            raise FakeProviderError(f"{self.model_name}: injected failure")
+        prompt_tokens = max(1, sum(len(str(m.content)) for m in messages) // 4)
+        completion_tokens = max(1, len(self.response) // 4)
+        message = AIMessage(
+            content=self.response,
+            usage_metadata={
+                "input_tokens": prompt_tokens,
+                "output_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages: list[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        delay, fail = self._draw()
+        time.sleep(delay)
+        return self._result(messages, fail)
+
+    async def _agenerate(self, messages: list[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        delay, fail = self._draw()
+        await asyncio.sleep(delay)
+        return self._result(messages, fail)
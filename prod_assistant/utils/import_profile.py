@@ -0,0 +1,102 @@
+"""
+Cold-start import budget check for the API and MCP server entrypoints.
+
+Runs each entrypoint in a fresh interpreter with `-X importtime`, prints the slowest
+imports, and exits non-zero if the cumulative import time exceeds the budget or if an
+optional subsystem that must stay lazy was imported. Meant for CI / pre-rollout:
+
+    python prod_assistant/utils/import_profile.py --budget-ms 1500
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+PACKAGE_ROOT = PROJECT_ROOT / "prod_assistant"
+
+ENTRYPOINTS = {
+    "api": "import router.main",
+    "mcp_server": "import mcp_servers.product_search_server",
+}
+
+# Optional subsystems that must only load on first use
+LAZY_MODULES = (
+    "ragas",
+    "datasets",
+    "langchain_groq",
+    "langchain_google_genai",
+    "langchain_astradb",
+    "langchain_mcp_adapters",
+    "duckduckgo_search",
+)
+
+# Cumulative cold-import time allowed per entrypoint; IMPORT_BUDGET_MS overrides it in CI
+BUDGET_MS = float(os.getenv("IMPORT_BUDGET_MS", "1500"))
+
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+
+
+def profile_imports(statement: str) -> list[tuple[str, int, int, int]]:
+    """Return (module, self_us, cumulative_us, depth) for every import made by `statement`."""
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join([str(PACKAGE_ROOT), str(PROJECT_ROOT), os.environ.get("PYTHONPATH", "")]),
+    }
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=PROJECT_ROOT, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"`{statement}` failed:\n{proc.stderr[-2000:]}")
+    rows = []
+    for line in proc.stderr.splitlines():
+        m = _LINE.match(line)
+        if m:
+            rows.append((m.group(4), int(m.group(1)), int(m.group(2)), (len(m.group(3)) - 1) // 2))
+    return rows
+
+
+def _total_ms(rows: list[tuple[str, int, int, int]]) -> float:
+    return sum(cum for _, _, cum, depth in rows if depth == 0) / 1000
+
+
+def check(name: str, statement: str, budget_ms: float, top: int = 10, runs: int = 1) -> bool:
+    """Profile `statement` and report against the budget; with `runs` > 1 the fastest cold start counts."""
+    rows = min((profile_imports(statement) for _ in range(max(1, runs))), key=_total_ms)
+    total_ms = _total_ms(rows)
+    leaked = sorted({mod.split(".")[0] for mod, *_ in rows} & set(LAZY_MODULES))
+
+    print(f"\n== {name}: `{statement}` -> {total_ms:.0f} ms (budget {budget_ms:.0f} ms)")
+    for mod, self_us, cum_us, _ in sorted(rows, key=lambda r: r[1], reverse=True)[:top]:
+        print(f"  {self_us / 1000:8.1f} ms self  {cum_us / 1000:8.1f} ms cumulative  {mod}")
+
+    ok = True
+    if total_ms > budget_ms:
+        print(f"  FAIL: cold import {total_ms:.0f} ms exceeds budget {budget_ms:.0f} ms")
+        ok = False
+    if leaked:
+        print(f"  FAIL: optional subsystems imported eagerly: {', '.join(leaked)}")
+        ok = False
+    return ok
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=BUDGET_MS)
+    parser.add_argument("--entrypoint", choices=sorted(ENTRYPOINTS), action="append",
+                        help="Entrypoint(s) to check; default all")
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports to print")
+    parser.add_argument("--runs", type=int, default=3,
+                        help="Fresh interpreters per entrypoint; the fastest is compared (shared CI hosts are noisy)")
+    args = parser.parse_args(argv)
+
+    results = [check(name, ENTRYPOINTS[name], args.budget_ms, args.top, args.runs)
+               for name in (args.entrypoint or sorted(ENTRYPOINTS))]
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
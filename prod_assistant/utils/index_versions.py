@@ -0,0 +1,361 @@
+"""
+Blue/green versions of the search index. Every ingestion builds a new version next to the
+live one, validates it, stages it as the candidate (so retrievers can warm it) and then flips
+the live pointer; the previous versions stay for rollback until pruned.
+
+Backends (`index.backend` in config.yaml):
+  astra  one AstraDB collection per version, `<astra_db.collection_name>_v0004`; the pointer is
+         a document in `<collection_name>_pointer`. Without a pointer the unversioned legacy
+         collection stays live.
+  local  the catalog snapshots themselves (utils/snapshot.py) searched through
+         SnapshotVectorStore; the pointer is the CURRENT / CANDIDATE files. No AstraDB needed.
+
+Versions share their names with the snapshot written in the same run, so the catalog cache and
+the search index always flip together. Between full re-indexes the ingestion worker
+(etl/ingestion_worker.py) upserts changed products into the live version by document_id.
+"""
+import hashlib
+import json
+import re
+import shutil
+import time
+from pathlib import Path
+
+from langchain_core.documents import Document
+
+from logger import GLOBAL_LOGGER as log
+from utils.snapshot import (
+    CANDIDATE, METADATA_FIELDS, CatalogSnapshot, PrecomputedEmbeddings, current_version, list_versions,
+    prune_versions, read_pointer, set_current, snapshot_dir, write_pointer, write_snapshot, writer_lock,
+)
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+
+class IndexValidationError(Exception):
+    """A freshly built index version failed validation and was not promoted."""
+
+
+def document_id(doc) -> str:
+    """Stable id for upserts: the scraped product id, or a hash of the title when the scraper found none."""
+    metadata = doc.metadata or {}
+    product_id = str(metadata.get("product_id", "")).strip()
+    if product_id and product_id != "N/A":
+        return product_id
+    title = " ".join(str(metadata.get("product_title", "")).lower().split())
+    return "title-" + hashlib.sha1(title.encode("utf-8")).hexdigest()[:16]
+
+
+class LocalIndex:
+    """Index versions are the snapshot versions under `root`, searched in process."""
+
+    backend = "local"
+
+    def __init__(self, root: str | Path):
+        self.root = Path(root)
+
+    def versions(self) -> list[str]:
+        return list_versions(self.root)
+
+    def pointer(self) -> dict:
+        return {"current": current_version(self.root), "candidate": read_pointer(self.root, CANDIDATE)}
+
+    def build(self, version: str, documents, vectors, embedding):
+        """Nothing to do: the snapshot written for `version` is the index."""
+
+    def count(self, version: str) -> int:
+        return len(CatalogSnapshot(self.root / version))
+
+    def open_store(self, version: str | None, embedding):
+        from retriever.snapshot_store import SnapshotVectorStore
+
+        if version is None:
+            raise FileNotFoundError(f"No index version under {self.root}; run the ingestion first")
+        return SnapshotVectorStore(CatalogSnapshot(self.root / version), embedding)
+
+    def stage(self, version: str | None):
+        with writer_lock(self.root):
+            write_pointer(self.root, CANDIDATE, version)
+
+    def promote(self, version: str):
+        with writer_lock(self.root):
+            set_current(self.root, version)
+            write_pointer(self.root, CANDIDATE, None)
+
+    def drop(self, version: str):
+        with writer_lock(self.root):
+            shutil.rmtree(self.root / version, ignore_errors=True)
+
+    def documents(self, version: str) -> list[Document]:
+        """Every document of a version, in row order."""
+        table = CatalogSnapshot(self.root / version).table.select([*METADATA_FIELDS, "page_content"])
+        return [Document(page_content=r.pop("page_content"), metadata=r) for r in table.to_pylist()]
+
+    def upsert(self, documents, embedding, keep: int = 3) -> str:
+        """
+        Copy-on-write upsert: the live rows with `documents` replaced or appended by document_id,
+        written as the next version and made live. Only `documents` are embedded; the other
+        rows keep their vectors. Returns the new live version; `keep` bounds the worker's
+        incremental versions only, full builds are retained by their own writers.
+        """
+        vectors_in = embedding.embed_documents([d.page_content for d in documents])
+        # Read-modify-write of the live version: concurrent writers would otherwise drop each other's rows
+        with writer_lock(self.root):
+            live = CatalogSnapshot.open(self.root)
+            rows, vectors, model = [], [], ""
+            if live is not None:
+                rows = self.documents(live.version)
+                vectors, model = list(live.embeddings), live.manifest.get("embedding_model", "")
+            position = {document_id(d): i for i, d in enumerate(rows)}
+            for doc, vector in zip(documents, vectors_in):
+                i = position.setdefault(document_id(doc), len(rows))
+                if i == len(rows):
+                    rows.append(doc)
+                    vectors.append(vector)
+                else:
+                    rows[i], vectors[i] = doc, vector
+            path = write_snapshot(rows, vectors, self.root, embedding_model=model, source="ingestion worker",
+                                  keep=keep, incremental=True)
+        return path.name
+
+
+class AstraIndex:
+    """One AstraDB collection per version plus a single-document pointer collection."""
+
+    backend = "astra"
+    POINTER_ID = "live"
+
+    def __init__(self, collection_name: str, api_endpoint: str, token: str, keyspace: str):
+        from astrapy import DataAPIClient
+
+        self.base_name = collection_name
+        self.api_endpoint = api_endpoint
+        self.token = token
+        self.keyspace = keyspace
+        self.db = DataAPIClient().get_database(api_endpoint, token=token, keyspace=keyspace)
+        self.pointer_collection = f"{collection_name}_pointer"
+
+    def collection_name(self, version: str | None) -> str:
+        return f"{self.base_name}_{version}" if version else self.base_name
+
+    def versions(self) -> list[str]:
+        pattern = re.compile(re.escape(self.base_name) + r"_(v\d+)")
+        return sorted(m.group(1) for name in self.db.list_collection_names() if (m := pattern.fullmatch(name)))
+
+    def pointer(self) -> dict:
+        try:
+            doc = self.db.get_collection(self.pointer_collection).find_one({"_id": self.POINTER_ID})
+        except Exception:
+            doc = None  # no pointer collection yet: the legacy collection is live
+        return {"current": (doc or {}).get("current"), "candidate": (doc or {}).get("candidate")}
+
+    def _set_pointer(self, **fields):
+        doc = {**self.pointer(), **fields, "updated_at": time.time()}
+        self.db.create_collection(self.pointer_collection)  # idempotent
+        self.db.get_collection(self.pointer_collection).replace_one(
+            {"_id": self.POINTER_ID}, {"_id": self.POINTER_ID, **doc}, upsert=True
+        )
+
+    def open_store(self, version: str | None, embedding):
+        from langchain_astradb import AstraDBVectorStore
+
+        return AstraDBVectorStore(
+            embedding=embedding,
+            collection_name=self.collection_name(version),
+            api_endpoint=self.api_endpoint,
+            token=self.token,
+            namespace=self.keyspace,
+        )
+
+    def build(self, version: str, documents, vectors, embedding):
+        texts = [d.page_content for d in documents]
+        store = self.open_store(version, PrecomputedEmbeddings(texts, vectors, fallback=embedding))
+        store.add_documents(documents, ids=[document_id(d) for d in documents])
+
+    def count(self, version: str) -> int:
+        collection = self.db.get_collection(self.collection_name(version))
+        try:
+            return collection.count_documents({}, upper_bound=1000)  # exact counts stop at 1000
+        except Exception:
+            return collection.estimated_document_count()
+
+    def stage(self, version: str | None):
+        self._set_pointer(candidate=version)
+
+    def promote(self, version: str):
+        self._set_pointer(current=version, candidate=None)
+
+    def drop(self, version: str):
+        self.db.drop_collection(self.collection_name(version))
+
+    def documents(self, version: str | None) -> None:
+        """Not enumerated: reading a whole collection back costs more than re-embedding changed products."""
+        return None
+
+    def upsert(self, documents, embedding, keep: int = 3) -> str | None:
+        """Upsert into the live collection; AstraDB replaces documents with the same _id (document_id)."""
+        version = self.pointer()["current"]
+        self.open_store(version, embedding).add_documents(documents, ids=[document_id(d) for d in documents])
+        return version
+
+
+def open_index(config: dict, api_endpoint: str | None = None, token: str | None = None,
+               keyspace: str | None = None):
+    """The configured index backend; AstraDB credentials are only needed for "astra"."""
+    if config.get("index", {}).get("backend", "astra") == "local":
+        return LocalIndex(snapshot_dir(config))
+    return AstraIndex(config["astra_db"]["collection_name"], api_endpoint, token, keyspace)
+
+
+def _base_id(doc) -> str:
+    # Synthetic catalog copies carry a "-<batch>" suffix on the scraped product id
+    return str((doc.metadata or {}).get("product_id", "")).split("-")[0]
+
+
+class Reindexer:
+    """
+    Builds, validates and promotes one index version. Validation, before anything goes live:
+      - the version holds as many documents as were ingested (within `count_tolerance`)
+      - `sample` documents are found again, in the top `k`, by searching their own text
+      - golden-set hit rate@k (data/golden_queries.jsonl) is at most `max_hit_rate_drop` below
+        the live version's
+    A version failing any check is dropped and the live one keeps serving.
+    """
+
+    def __init__(self, index, snapshot_root: str | Path, embedding, golden: list[dict] | None = None,
+                 k: int = 4, sample: int = 20, min_self_hit_rate: float = 0.9, max_hit_rate_drop: float = 0.05,
+                 count_tolerance: float = 0.0, warm_seconds: float = 10.0, keep: int = 2):
+        self.index = index
+        self.snapshots = LocalIndex(snapshot_root)
+        self.embedding = embedding
+        self.golden = golden or []
+        self.k = k
+        self.sample = sample
+        self.min_self_hit_rate = min_self_hit_rate
+        self.max_hit_rate_drop = max_hit_rate_drop
+        self.count_tolerance = count_tolerance
+        self.warm_seconds = warm_seconds
+        self.keep = keep
+
+    @classmethod
+    def from_config(cls, config: dict, embedding, index=None) -> "Reindexer":
+        block = config.get("index", {})
+        checks = block.get("validation", {})
+        golden_path = Path(checks.get("golden_set", "data/golden_queries.jsonl"))
+        if not golden_path.is_absolute():
+            golden_path = PROJECT_ROOT / golden_path
+        golden = []
+        if golden_path.exists():
+            with open(golden_path, encoding="utf-8") as f:
+                golden = [json.loads(line) for line in f if line.strip()]
+        return cls(
+            index or open_index(config),
+            snapshot_dir(config),
+            embedding,
+            golden=golden,
+            k=config.get("retriever", {}).get("top_k", 4),
+            sample=checks.get("sample", 20),
+            min_self_hit_rate=checks.get("min_self_hit_rate", 0.9),
+            max_hit_rate_drop=checks.get("max_hit_rate_drop", 0.05),
+            count_tolerance=checks.get("count_tolerance", 0.0),
+            warm_seconds=block.get("warm_seconds", 10.0),
+            keep=block.get("keep", 2),
+        )
+
+    # ---------- Validation ----------
+    def _golden_hit_rate(self, store) -> float | None:
+        if not self.golden:
+            return None
+        hits = 0
+        for item in self.golden:
+            found = {_base_id(d) for d in store.similarity_search(item.get("query") or item["question"], k=self.k)}
+            hits += bool(found & set(item["relevant"]))
+        return hits / len(self.golden)
+
+    def validate(self, version: str, documents) -> dict:
+        expected = len(documents)
+        count = self.index.count(version)
+        if abs(count - expected) > expected * self.count_tolerance:
+            raise IndexValidationError(f"{version} holds {count} documents, expected {expected}")
+
+        store = self.index.open_store(version, self.embedding)
+        step = max(1, expected // self.sample) if self.sample else expected + 1
+        probes = documents[::step][: self.sample]
+        self_hits = sum(
+            _base_id(d) in {_base_id(r) for r in store.similarity_search(d.page_content, k=self.k)}
+            for d in probes
+        )
+        self_hit_rate = self_hits / len(probes) if probes else 1.0
+        if self_hit_rate < self.min_self_hit_rate:
+            raise IndexValidationError(f"{version} re-finds {self_hit_rate:.0%} of sampled documents, "
+                                       f"minimum {self.min_self_hit_rate:.0%}")
+
+        hit_rate = self._golden_hit_rate(store)
+        live = self.index.pointer()["current"]
+        live_hit_rate = None
+        # On AstraDB a missing pointer means the legacy unversioned collection is live
+        if hit_rate is not None and live != version and (live or self.index.backend == "astra"):
+            try:
+                live_hit_rate = self._golden_hit_rate(self.index.open_store(live, self.embedding))
+            except Exception as e:
+                log.warning("Live index not searchable, skipping the regression check", version=live, error=str(e))
+        if live_hit_rate is not None and hit_rate < live_hit_rate - self.max_hit_rate_drop:
+            raise IndexValidationError(f"{version} golden hit rate {hit_rate:.2f} vs live {live_hit_rate:.2f}")
+        return {"documents": count, "self_hit_rate": self_hit_rate, "golden_hit_rate": hit_rate,
+                "live_golden_hit_rate": live_hit_rate}
+
+    # ---------- Lifecycle ----------
+    def run(self, documents, vectors, embedding_model: str = "", source: str = "") -> str:
+        """Build, validate, stage, promote; returns the new live version."""
+        path = write_snapshot(documents, vectors, self.snapshots.root, embedding_model=embedding_model,
+                              source=source, promote=False)
+        version = path.name
+        try:
+            started = time.perf_counter()
+            self.index.build(version, documents, vectors, self.embedding)
+            built_s = time.perf_counter() - started
+            report = self.validate(version, documents)
+        except Exception as e:
+            log.error("Index version rejected", version=version, backend=self.index.backend, error=str(e))
+            self.discard(version)
+            raise
+        log.info("Index version validated", version=version, backend=self.index.backend, build_s=round(built_s, 2), **report)
+
+        # Retrievers polling the pointer build and warm the candidate before the flip
+        self.index.stage(version)
+        time.sleep(self.warm_seconds)
+        self.promote(version)
+        self.prune()
+        return version
+
+    def promote(self, version: str):
+        previous = self.index.pointer()["current"]
+        self.index.promote(version)
+        if self.index.backend != "local":
+            self.snapshots.promote(version)  # the catalog cache reads the same version
+        log.info("Index version promoted", version=version, previous=previous, backend=self.index.backend)
+
+    def rollback(self) -> str:
+        """Make the newest version older than the live one live again."""
+        current = self.index.pointer()["current"]
+        older = [v for v in self.index.versions() if current and v < current]
+        if not older:
+            raise IndexValidationError(f"No version older than {current} to roll back to")
+        self.promote(older[-1])
+        return older[-1]
+
+    def discard(self, version: str):
+        self.index.stage(None)
+        self.index.drop(version)
+        self.snapshots.drop(version)
+
+    def prune(self) -> list[str]:
+        """Keep the live version plus `keep` older ones in the index; snapshots follow."""
+        live = self.index.pointer()["current"]
+        older = [v for v in self.index.versions() if live and v < live]
+        removed = older[: max(0, len(older) - self.keep)]
+        for version in removed:
+            self.index.drop(version)
+        if self.index.backend != "local":
+            removed += [v for v in prune_versions(self.snapshots.root, self.keep + 1) if v not in removed]
+        return removed
@@ -0,0 +1,283 @@
+import asyncio
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from statistics import median
+from typing import Any
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import PrivateAttr
+
+from logger import GLOBAL_LOGGER as log
+from observability.instrumentation import LLM_HEDGES, LLM_PROVIDER_CALLS
+
+# A provider's score is its median latency inflated by its error rate
+_ERROR_PENALTY = 4.0
+
+
+class ProviderHealth:
+    """
+    Rolling latency / error window for one provider, with a cooldown after repeated errors.
+    Calls cancelled after losing a hedge are counted apart: they neither answered nor failed.
+    """
+
+    def __init__(self, window: int = 50):
+        self.latencies: deque[float] = deque(maxlen=window)
+        self.outcomes: deque[bool] = deque(maxlen=window)
+        self.consecutive_errors = 0
+        self.cooldown_until = 0.0
+        self.cancelled = 0
+
+    def record(self, latency: float, ok: bool, max_consecutive_errors: int, cooldown_seconds: float):
+        self.outcomes.append(ok)
+        if ok:
+            self.latencies.append(latency)
+            self.consecutive_errors = 0
+        else:
+            self.consecutive_errors += 1
+            if self.consecutive_errors >= max_consecutive_errors:
+                self.cooldown_until = time.monotonic() + cooldown_seconds
+
+    @property
+    def error_rate(self) -> float:
+        return self.outcomes.count(False) / len(self.outcomes) if self.outcomes else 0.0
+
+    def score(self) -> float:
+        """Lower is better; unseen providers score 0 so they get tried."""
+        if time.monotonic() < self.cooldown_until:
+            return float("inf")
+        if not self.outcomes:
+            return 0.0
+        latency = median(self.latencies) if self.latencies else 1.0
+        return latency * (1.0 + _ERROR_PENALTY * self.error_rate)
+
+    def as_dict(self) -> dict:
+        return {
+            "calls": len(self.outcomes),
+            "p50_latency_s": round(median(self.latencies), 3) if self.latencies else None,
+            "error_rate": round(self.error_rate, 3),
+            "cancelled": self.cancelled,
+            "cooling_down": time.monotonic() < self.cooldown_until,
+        }
+
+
+# One health window per provider and one thread pool for every router in the process: the
+# per-task routers (llm_tasks) then rank providers on all traffic, and a reload keeps the history
+_shared_lock = threading.Lock()
+_shared_health: dict[str, ProviderHealth] = {}
+_shared_pool: ThreadPoolExecutor | None = None
+_POOL_WORKERS = 32
+
+
+def _provider_health(name: str, window: int) -> ProviderHealth:
+    with _shared_lock:
+        health = _shared_health.get(name)
+        if health is None or health.outcomes.maxlen != window:
+            previous = health
+            health = _shared_health[name] = ProviderHealth(window)
+            if previous is not None:  # window resized by a reload: keep the most recent samples
+                health.latencies.extend(previous.latencies)
+                health.outcomes.extend(previous.outcomes)
+                health.consecutive_errors, health.cooldown_until = previous.consecutive_errors, previous.cooldown_until
+                health.cancelled = previous.cancelled
+        return health
+
+
+def _router_pool() -> ThreadPoolExecutor:
+    global _shared_pool
+    with _shared_lock:
+        if _shared_pool is None:
+            _shared_pool = ThreadPoolExecutor(max_workers=_POOL_WORKERS, thread_name_prefix="llm-router")
+        return _shared_pool
+
+
+class LLMRouter(BaseChatModel):
+    """
+    Chat model routing each call across several provider chat models. Providers are ranked
+    by rolling latency and error rate (config order breaks ties); a call still running after
+    `hedge_after_seconds` is hedged on the next provider and the first answer wins; errors
+    fall back to the next provider. Drop-in wherever a single chat model is used.
+    """
+
+    providers: dict[str, BaseChatModel]
+    hedge_after_seconds: float | None = 2.0
+    window: int = 50
+    max_consecutive_errors: int = 3
+    error_cooldown_seconds: float = 30.0
+
+    _health: dict[str, ProviderHealth] = PrivateAttr(default_factory=dict)
+    _pool: ThreadPoolExecutor | None = PrivateAttr(default=None)
+
+    def model_post_init(self, __context: Any) -> None:
+        self._health = {name: _provider_health(name, self.window) for name in self.providers}
+        self._pool = _router_pool()
+
+    @property
+    def _llm_type(self) -> str:
+        return "llm_router"
+
+    @property
+    def _identifying_params(self) -> dict[str, Any]:
+        return {"providers": list(self.providers), "hedge_after_seconds": self.hedge_after_seconds}
+
+    # ---------- Health ----------
+    def ranked_providers(self) -> list[str]:
+        with _shared_lock:
+            scores = {name: health.score() for name, health in self._health.items()}
+        order = list(self.providers)
+        return sorted(order, key=lambda name: (scores[name], order.index(name)))
+
+    def health(self) -> dict[str, dict]:
+        with _shared_lock:
+            return {name: health.as_dict() for name, health in self._health.items()}
+
+    def _record(self, name: str, started: float, ok: bool):
+        latency = time.perf_counter() - started
+        with _shared_lock:
+            self._health[name].record(latency, ok, self.max_consecutive_errors, self.error_cooldown_seconds)
+        LLM_PROVIDER_CALLS.labels(name, "ok" if ok else "error").inc()
+
+    def _record_cancelled(self, name: str):
+        with _shared_lock:
+            self._health[name].cancelled += 1
+        LLM_PROVIDER_CALLS.labels(name, "cancelled").inc()
+
+    def _result(self, name: str, message: BaseMessage) -> ChatResult:
+        provider = self.providers[name]
+        model = getattr(provider, "model_name", None) or getattr(provider, "model", None) or name
+        return ChatResult(
+            generations=[ChatGeneration(message=message)],
+            llm_output={"provider": name, "model_name": model},
+        )
+
+    # ---------- Sync ----------
+    def _call(self, name: str, messages: list[BaseMessage], stop: list[str] | None, **kwargs: Any) -> BaseMessage:
+        started = time.perf_counter()
+        try:
+            message = self.providers[name].invoke(messages, stop=stop, **kwargs)
+        except Exception:
+            self._record(name, started, ok=False)
+            raise
+        self._record(name, started, ok=True)
+        return message
+
+    def _generate(self, messages: list[BaseMessage], stop: list[str] | None = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        order = self.ranked_providers()
+        pending = {}
+        launched: list[str] = []
+        last_error: Exception | None = None
+
+        def launch():
+            name = order[len(launched)]
+            launched.append(name)
+            pending[self._pool.submit(self._call, name, messages, stop, **kwargs)] = name
+
+        launch()
+        while pending:
+            can_hedge = self.hedge_after_seconds is not None and len(launched) < len(order)
+            done, _ = wait(pending, timeout=self.hedge_after_seconds if can_hedge else None, return_when=FIRST_COMPLETED)
+            if not done:
+                LLM_HEDGES.labels(pending[next(iter(pending))]).inc()
+                launch()
+                continue
+            for future in done:
+                name = pending.pop(future)
+                try:
+                    return self._result(name, future.result())
+                except Exception as e:
+                    last_error = e
+                    log.warning("LLM provider failed, falling back", provider=name, error=str(e))
+                    if len(launched) < len(order):
+                        launch()
+        raise last_error
+
+    # ---------- Async ----------
+    async def _acall(self, name: str, messages: list[BaseMessage], stop: list[str] | None, **kwargs: Any) -> BaseMessage:
+        started = time.perf_counter()
+        try:
+            message = await self.providers[name].ainvoke(messages, stop=stop, **kwargs)
+        except asyncio.CancelledError:
+            # Lost a hedge: no answer and no error, so it stays out of the latency / error window
+            self._record_cancelled(name)
+            raise
+        except Exception:
+            self._record(name, started, ok=False)
+            raise
+        self._record(name, started, ok=True)
+        return message
+
+    async def _agenerate(self, messages: list[BaseMessage], stop: list[str] | None = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        order = self.ranked_providers()
+        pending: dict[asyncio.Task, str] = {}
+        launched: list[str] = []
+        last_error: Exception | None = None
+
+        def launch():
+            name = order[len(launched)]
+            launched.append(name)
+            # Fresh context: the provider must not inherit this run's callbacks (the router reports the call)
+            task = asyncio.get_running_loop().create_task(
+                self._acall(name, messages, stop, **kwargs), context=contextvars.Context()
+            )
+            pending[task] = name
+
+        launch()
+        try:
+            while pending:
+                can_hedge = self.hedge_after_seconds is not None and len(launched) < len(order)
+                done, _ = await asyncio.wait(
+                    pending, timeout=self.hedge_after_seconds if can_hedge else None, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    LLM_HEDGES.labels(pending[next(iter(pending))]).inc()
+                    launch()
+                    continue
+                for task in done:
+                    name = pending.pop(task)
+                    try:
+                        return self._result(name, task.result())
+                    except Exception as e:
+                        last_error = e
+                        log.warning("LLM provider failed, falling back", provider=name, error=str(e))
+                        if len(launched) < len(order):
+                            launch()
+            raise last_error
+        finally:
+            # The hedge that lost is cancelled rather than left to bill tokens in the background
+            for task in pending:
+                task.cancel()
+
+
+# --- Demo: route between fake providers with injected latency and failures ---
+if __name__ == "__main__":
+    from utils.fake_llm import FakeProviderChatModel, FakeProviderError
+
+    router = LLMRouter(
+        providers={
+            "google": FakeProviderChatModel(response="from google", latency_s=0.05, jitter_s=0.4, failure_rate=0.2, seed=1),
+            "groq": FakeProviderChatModel(response="from groq", latency_s=0.08, failure_rate=0.05, seed=2),
+        },
+        hedge_after_seconds=0.2,
+        error_cooldown_seconds=1.0,
+    )
+    def call():
+        try:
+            return router.invoke("hello").content
+        except FakeProviderError:
+            return "all providers failed"
+
+    started = time.perf_counter()
+    answers = [call() for _ in range(50)]
+    print("sync:", {a: answers.count(a) for a in set(answers)}, f"{time.perf_counter() - started:.2f}s")
+
+    async def burst():
+        return await asyncio.gather(*(router.ainvoke("hello") for _ in range(50)), return_exceptions=True)
+
+    started = time.perf_counter()
+    answers = [getattr(m, "content", "all providers failed") for m in asyncio.run(burst())]
+    print("async:", {a: answers.count(a) for a in set(answers)}, f"{time.perf_counter() - started:.2f}s")
+    print("health:", router.health())
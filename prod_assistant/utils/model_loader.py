@@ -3,10 +3,9 @@ import sys
 import json
 from dotenv import load_dotenv
 from utils.config_loader import load_config
-from langchain_google_genai import GoogleGenerativeAIEmbeddings, ChatGoogleGenerativeAI
-from langchain_groq import ChatGroq
 from logger import GLOBAL_LOGGER as log
 from exception.custom_exception import ProductAssistantException
+from observability.instrumentation import InstrumentedEmbeddings
 import asyncio
 
 class ApiKeyManager:
@@ -62,9 +61,13 @@ class ModelLoader:
             log.info("Running in PRODUCTION mode")
 
         self.api_key_mgr = ApiKeyManager()
-        self.config = load_config()
         log.info("YAML config loaded", config_keys=list(self.config.keys()))
 
+    @property
+    def config(self) -> dict:
+        # Read through the shared store so hot reloads are picked up on the next load_*()
+        return load_config()
+
 
     def load_embeddings(self):
         """
@@ -80,20 +83,57 @@ class ModelLoader:
             except RuntimeError:
                 asyncio.set_event_loop(asyncio.new_event_loop())
 
-            return GoogleGenerativeAIEmbeddings(
+            from langchain_google_genai import GoogleGenerativeAIEmbeddings
+
+            # Wrapped so embedding calls show up in the Prometheus metrics
+            return InstrumentedEmbeddings(GoogleGenerativeAIEmbeddings(
                 model=model_name,
                 google_api_key=self.api_key_mgr.get("GOOGLE_API_KEY")  # type: ignore
-        )
+            ))
         except Exception as e:  
             log.error("Error loading embedding model", error=str(e))
             raise ProductAssistantException("Failed to load embedding model", sys)
         
-    def load_llm(self):
+    def load_llm(self, task: str | None = None):
+        """
+        Load and return the configured LLM model: the multi-provider router when
+        `llm_router.enabled`, unless LLM_PROVIDER (or the task's `provider`) pins a single provider.
+        `task` applies the matching `llm_tasks` entry (model per provider, output token cap).
+        """
+        overrides = self.config.get("llm_tasks", {}).get(task, {}) if task else {}
+        pinned = os.getenv("LLM_PROVIDER") or overrides.get("provider")
+        if not pinned and self.config.get("llm_router", {}).get("enabled", False):
+            return self.load_llm_router(overrides, task=task)
+        return self.load_provider_llm(pinned or self.config.get("llm_provider", "google"), overrides, task=task)
+
+    def load_llm_router(self, overrides: dict | None = None, task: str | None = None):
+        """
+        Build an LLMRouter over the providers in `llm_router.providers`; the
+        configured `llm_provider` goes first so it wins ties before any latency is known.
+        """
+        from utils.llm_router import LLMRouter
+
+        router_cfg = self.config.get("llm_router", {})
+        preferred = self.config.get("llm_provider", "google")
+        keys = router_cfg.get("providers") or list(self.config["llm"])
+        keys = sorted(keys, key=lambda k: k != preferred)
+
+        log.info("Loading LLM router", task=task, providers=keys, hedge_after_seconds=router_cfg.get("hedge_after_seconds"))
+        return LLMRouter(
+            providers={key: self.load_provider_llm(key, overrides, task=task) for key in keys},
+            hedge_after_seconds=router_cfg.get("hedge_after_seconds", 2.0),
+            window=router_cfg.get("window", 50),
+            max_consecutive_errors=router_cfg.get("max_consecutive_errors", 3),
+            error_cooldown_seconds=router_cfg.get("error_cooldown_seconds", 30.0),
+        )
+
+    def load_provider_llm(self, provider_key: str, overrides: dict | None = None, task: str | None = None):
         """
-        Load and return the configured LLM model.
+        Load and return the chat model for one key of the `llm` config block,
+        with optional per-task overrides (see `llm_tasks` in config.yaml).
         """
+        overrides = overrides or {}
         llm_block = self.config["llm"]
-        provider_key = os.getenv("LLM_PROVIDER", "google")
 
         if provider_key not in llm_block:
             log.error("LLM provider not found in config", provider=provider_key)
@@ -101,13 +141,15 @@ class ModelLoader:
 
         llm_config = llm_block[provider_key]
         provider = llm_config.get("provider")
-        model_name = llm_config.get("model_name")
-        temperature = llm_config.get("temperature", 0.0)
-        max_tokens = llm_config.get("max_output_tokens", 2048)
+        model_name = overrides.get("models", {}).get(provider_key) or llm_config.get("model_name")
+        temperature = overrides.get("temperature", llm_config.get("temperature", 0.0))
+        max_tokens = overrides.get("max_output_tokens") or llm_config.get("max_output_tokens", 2048)
 
-        log.info("Loading LLM", provider=provider, model=model_name)
+        log.info("Loading LLM", task=task, provider=provider, model=model_name, max_tokens=max_tokens)
 
+        # Provider SDKs are imported on first use so an unused provider costs nothing at startup
         if provider == "google":
+            from langchain_google_genai import ChatGoogleGenerativeAI
             return ChatGoogleGenerativeAI(
                 model=model_name,
                 google_api_key=self.api_key_mgr.get("GOOGLE_API_KEY"),
@@ -116,10 +158,12 @@ class ModelLoader:
             )
 
         elif provider == "groq":
+            from langchain_groq import ChatGroq
             return ChatGroq(
                 model=model_name,
                 api_key=self.api_key_mgr.get("GROQ_API_KEY"), #type: ignore
                 temperature=temperature,
+                max_tokens=max_tokens,
             )
 
         # elif provider == "openai":
@@ -0,0 +1,249 @@
+"""
+Versioned binary snapshot of the ingested catalog, written by DataIngestion and memory-mapped
+by the retriever, the MCP server and the catalog cache:
+
+    <snapshot.dir>/
+      CURRENT               name of the live version, replaced atomically
+      CANDIDATE             version being validated / warmed before it goes live (utils/index_versions.py)
+      .lock                 held by writers while they number, rename, promote and prune versions
+      v0003/
+        manifest.json       format, version, row count, embedding model / dimension, source, incremental
+        metadata.arrow      Arrow IPC file: product metadata, page_content, parsed numeric columns
+        embeddings.npy      float32 (rows, dim) matrix, rows L2-normalised
+
+Both data files are read through mmap with zero copies (pyarrow.memory_map, numpy mmap_mode="r"),
+so the pages live in the OS page cache and every worker process maps the same physical memory.
+
+Full builds (DataIngestion, the blue/green Reindexer) and the ingestion worker's incremental
+upserts are numbered in one sequence but retained separately (manifest "incremental"), so a
+busy worker cannot prune the full builds kept for rollback.
+"""
+import contextlib
+import fcntl
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from logger import GLOBAL_LOGGER as log
+from retriever.catalog import parse_count, parse_price
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+FORMAT_VERSION = 1
+CURRENT = "CURRENT"
+CANDIDATE = "CANDIDATE"
+LOCK = ".lock"
+MANIFEST = "manifest.json"
+METADATA = "metadata.arrow"
+EMBEDDINGS = "embeddings.npy"
+METADATA_FIELDS = ("product_id", "product_title", "rating", "total_reviews", "price", "reviews_hash")
+
+
+def snapshot_dir(config: dict) -> Path:
+    path = Path(config.get("snapshot", {}).get("dir", "data/snapshots"))
+    return path if path.is_absolute() else PROJECT_ROOT / path
+
+
+def read_pointer(root: str | Path, name: str) -> str | None:
+    try:
+        return (Path(root) / name).read_text().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def write_pointer(root: str | Path, name: str, version: str | None):
+    """Replace (or with None, remove) a pointer file atomically."""
+    target = Path(root) / name
+    if version is None:
+        target.unlink(missing_ok=True)
+        return
+    tmp = Path(root) / f".{name}.tmp"
+    tmp.write_text(version)
+    os.replace(tmp, target)
+
+
+def current_version(root: str | Path) -> str | None:
+    """Name of the live version under `root`, or None when nothing was written yet."""
+    return read_pointer(root, CURRENT)
+
+
+def set_current(root: str | Path, version: str):
+    write_pointer(root, CURRENT, version)
+
+
+def list_versions(root: str | Path) -> list[str]:
+    return sorted(p.name for p in Path(root).glob("v[0-9]*") if p.is_dir())
+
+
+_held = threading.local()
+
+
+@contextlib.contextmanager
+def writer_lock(root: str | Path):
+    """
+    Exclusive lock on a snapshot root across threads and processes (flock on `<root>/.lock`),
+    for numbering, renaming, promoting and pruning versions. Re-entrant within a thread.
+    """
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    held = _held.__dict__.setdefault("roots", set())
+    key = str(root.resolve())
+    if key in held:
+        yield
+        return
+    with open(root / LOCK, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        held.add(key)
+        try:
+            yield
+        finally:
+            held.discard(key)
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def is_incremental(root: str | Path, version: str) -> bool:
+    """Whether `version` was written by the ingestion worker's upsert rather than a full build."""
+    try:
+        return bool(json.loads((Path(root) / version / MANIFEST).read_text()).get("incremental", False))
+    except (OSError, ValueError):
+        return False
+
+
+def prune_versions(root: str | Path, keep: int, incremental: bool = False) -> list[str]:
+    """
+    Remove all but the newest `keep` full versions (with `incremental`, worker upserts: the two
+    kinds are retained separately); the live and candidate versions always stay.
+    """
+    with writer_lock(root):
+        protected = {read_pointer(root, CURRENT), read_pointer(root, CANDIDATE)}
+        versions = [v for v in list_versions(root) if is_incremental(root, v) == incremental]
+        removed = [v for v in versions[:-keep] if v not in protected] if keep > 0 else []
+        for version in removed:
+            shutil.rmtree(Path(root) / version, ignore_errors=True)
+    return removed
+
+
+def write_snapshot(documents: list[Document], vectors, root: str | Path, embedding_model: str = "",
+                   source: str = "", keep: int = 3, promote: bool = True, incremental: bool = False) -> Path:
+    """
+    Write `documents` and their embedding `vectors` as the next version under `root` and,
+    with `promote`, point CURRENT at it and remove the oldest of its kind beyond `keep`. The
+    version is built in a private hidden directory and renamed into place, so readers only see
+    complete versions; only numbering, the rename and promotion run under the writer lock.
+    """
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    staging = Path(tempfile.mkdtemp(prefix=".staging-", dir=root))
+    try:
+        matrix = np.asarray(vectors, dtype=np.float32).reshape(len(documents), -1)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+        np.save(staging / EMBEDDINGS, matrix)
+
+        metas = [d.metadata or {} for d in documents]
+        columns = {name: pa.array([str(m.get(name, "")) for m in metas], pa.string()) for name in METADATA_FIELDS}
+        columns["page_content"] = pa.array([d.page_content for d in documents], pa.string())
+        columns["price_value"] = pa.array([parse_price(m.get("price")) for m in metas], pa.float64())
+        columns["rating_value"] = pa.array([parse_price(m.get("rating")) for m in metas], pa.float32())
+        columns["review_count"] = pa.array([parse_count(m.get("total_reviews")) for m in metas], pa.int64())
+        table = pa.table(columns)
+        # One record batch, uncompressed: every column is a single contiguous buffer in the file
+        with pa.OSFile(str(staging / METADATA), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table, max_chunksize=max(1, len(documents)))
+
+        with writer_lock(root):
+            existing = list_versions(root)
+            version = f"v{int(existing[-1][1:]) + 1 if existing else 1:04d}"
+            manifest = {
+                "format": FORMAT_VERSION,
+                "version": version,
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "rows": len(documents),
+                "dim": int(matrix.shape[1]),
+                "embedding_model": embedding_model,
+                "source": str(source),
+                "incremental": incremental,
+            }
+            (staging / MANIFEST).write_text(json.dumps(manifest, indent=2))
+            os.rename(staging, root / version)
+            if promote:
+                set_current(root, version)
+                prune_versions(root, keep, incremental)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    log.info("Catalog snapshot written", version=version, rows=len(documents), dim=manifest["dim"],
+             path=str(root), promoted=promote, incremental=incremental)
+    return root / version
+
+
+class CatalogSnapshot:
+    """Read-only, memory-mapped view of one snapshot version."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.manifest = json.loads((self.path / MANIFEST).read_text())
+        if self.manifest.get("format") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported snapshot format {self.manifest.get('format')} in {self.path}")
+        # The table's buffers point into the mapping, which stays open for the snapshot's lifetime
+        self._source = pa.memory_map(str(self.path / METADATA))
+        self.table = pa.ipc.open_file(self._source).read_all()
+        self.embeddings = np.load(self.path / EMBEDDINGS, mmap_mode="r")
+        if self.embeddings.shape[0] != self.table.num_rows:
+            raise ValueError(f"Snapshot {self.path}: {self.table.num_rows} rows but {self.embeddings.shape[0]} vectors")
+
+    @classmethod
+    def open(cls, root: str | Path) -> "CatalogSnapshot | None":
+        """The version CURRENT points at under `root`, or None when there is none."""
+        version = current_version(root)
+        return cls(Path(root) / version) if version else None
+
+    @classmethod
+    def from_config(cls, config: dict) -> "CatalogSnapshot | None":
+        return cls.open(snapshot_dir(config))
+
+    @property
+    def version(self) -> str:
+        return self.manifest["version"]
+
+    def __len__(self) -> int:
+        return self.table.num_rows
+
+    def strings(self, name: str) -> list[str]:
+        return self.table.column(name).to_pylist()
+
+    def numeric(self, name: str) -> np.ndarray:
+        """Zero-copy numpy view of a numeric column (backed by the mapped file)."""
+        column = self.table.column(name)
+        # write_snapshot stores one record batch; combine_chunks would copy even a single chunk
+        chunk = column.chunk(0) if column.num_chunks == 1 else column.combine_chunks()
+        return chunk.to_numpy(zero_copy_only=True)
+
+    def document(self, row: int) -> Document:
+        metadata = {name: self.table.column(name)[row].as_py() for name in METADATA_FIELDS}
+        return Document(page_content=self.table.column("page_content")[row].as_py(), metadata=metadata)
+
+
+class PrecomputedEmbeddings(Embeddings):
+    """Serves vectors already computed for the snapshot, so a vector store fill does not embed twice."""
+
+    def __init__(self, texts: list[str], vectors, fallback: Embeddings):
+        self.vectors = dict(zip(texts, (list(map(float, v)) for v in vectors)))
+        self.fallback = fallback
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        missing = [t for t in texts if t not in self.vectors]
+        if missing:
+            self.vectors.update(zip(missing, self.fallback.embed_documents(missing)))
+        return [self.vectors[t] for t in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.fallback.embed_query(text)
@@ -1,35 +1,57 @@
 from typing import Annotated, Sequence, TypedDict, Literal
 from langchain_core.messages import BaseMessage, HumanMessage
-from langchain_core.prompts import ChatPromptTemplate, PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from langgraph.graph import StateGraph, START, END
 from langgraph.graph.message import add_messages
 
-from prompt_library.prompts import PROMPT_REGISTRY, PromptType
+from prompt_library.prompts import PromptType, get_prompt
 from retriever.retrieval import Retriever
 from utils.model_loader import ModelLoader
-from langgraph.checkpoint.memory import MemorySaver
+from utils.config_loader import load_config, get_config_store
+from utils.checkpointer import load_checkpointer, trim_history
+from workflow.routing import FastPathStats, IntentClassifier, ScoreGrader
+from workflow.budget import RequestBudget, count_tokens
+from logger import GLOBAL_LOGGER as log
+from observability.instrumentation import METRICS_CALLBACK, instrument_node, mcp_server_env
+from observability.tracing import call_mcp_tool
 import asyncio
-from evaluation.ragas_eval import evaluate_response_relevancy, evaluate_context_precision
-from langchain_mcp_adapters.client import MultiServerMCPClient
+
+WORKFLOW_NAME = "agentic_mcp_websearch"
+LLM_TASKS = ("assistant", "grader", "rewriter", "generator")
+BUDGET_EXHAUSTED_ANSWER = "Sorry, I couldn't finish this request in time. Please try again."
 
 class AgenticRAG:
     """Agentic RAG pipeline using LangGraph + MCP (Retriever + WebSearch)"""
 
     class AgentState(TypedDict):
         messages: Annotated[Sequence[BaseMessage], add_messages]
+        question: str
+        budget: dict
+        grade: str
+        best_context: str
+        best_score: float
 
     def __init__(self):
         self.retriever_obj = Retriever()
         self.model_loader = ModelLoader()
-        self.llm = self.model_loader.load_llm()
-        self.checkpointer = MemorySaver()
+        self.llms = self._load_llms()
+        self.checkpointer = load_checkpointer(self.config)
+        self.fast_path_stats = FastPathStats()
+        self.intent_classifier = IntentClassifier.from_config(self.config, stats=self.fast_path_stats)
+        self.score_grader = ScoreGrader.from_config(self.config, stats=self.fast_path_stats)
+        self.budget = RequestBudget.from_config(self.config)
+        # Hot reload swaps the LLMs in place; the compiled graph reads self.llms per call
+        store = get_config_store()
+        for section in ("llm", "llm_provider", "llm_router", "llm_tasks"):
+            store.subscribe(section, self._reload_llm)
 
         # MCP Client Init
+        from langchain_mcp_adapters.client import MultiServerMCPClient
         self.mcp_client = MultiServerMCPClient({
             "hybrid_search": {
                 "command": "python",
                 "args": ["prod_assistant/mcp_servers/product_search_server.py"],  #server with retriever+websearch
+                "env": mcp_server_env(),  # metrics recorded by the server reach /metrics
                 "transport": "stdio"
             }
         })
@@ -40,73 +62,123 @@ class AgenticRAG:
         self.workflow = self._build_workflow()
         self.app = self.workflow.compile(checkpointer=self.checkpointer)
 
+    @property
+    def config(self) -> dict:
+        return load_config()
+
+    @property
+    def filter_calls_per_retrieval(self) -> int:
+        # LLMChainFilter grades every fetched doc with one LLM call (none when the filter is off)
+        params = get_config_store().typed.retriever
+        return params.top_k if params.llm_filter else 0
+
+    def _load_llms(self) -> dict:
+        # Per-task clients: small/cheap models for the classification hops (see llm_tasks in config.yaml)
+        return {task: self.model_loader.load_llm(task) for task in LLM_TASKS}
+
+    def _reload_llm(self, old, new):
+        self.llms = self._load_llms()
+        log.info("LLM reloaded from config", workflow=WORKFLOW_NAME)
+
     # ----- Nodes -------------------
+    @instrument_node(WORKFLOW_NAME, "Assistant")
     def _ai_assistant(self, state:AgentState):
         print("------ CALL ASSISTANT -------")
         messages = state["messages"]
         last_message = messages[-1].content
 
-        if any(word in last_message.lower() for word in ["price", "review", "product"]):
+        if self.intent_classifier.predict(last_message) == IntentClassifier.RETRIEVE:
             return {"messages": [HumanMessage(content="TOOL: retriever")]}
         else:
-            prompt = ChatPromptTemplate.from_template(
-                "You are a helpful assistant. Answer the user directly. \n\nQuestion: {question}\nAnswer:"
-            )
-            chain = prompt | self.llm | StrOutputParser()
-            response = chain.invoke({"question": last_message})
-            return {"messages": [HumanMessage(content=response)]}
+            usage = state["budget"]
+            reason = self.budget.exhausted_reason(usage)
+            if reason:
+                log.warning("Budget exhausted before direct answer", reason=reason)
+                return {"messages": [HumanMessage(content=BUDGET_EXHAUSTED_ANSWER)],
+                        "budget": self.budget.charge(usage, degraded=True, degraded_reason=reason)}
+            chain = get_prompt(PromptType.ASSISTANT) | self.llms["assistant"]
+            message = chain.invoke({"question": last_message})
+            usage = self.budget.charge(usage, llm_calls=1, tokens=count_tokens(message, last_message))
+            return {"messages": [HumanMessage(content=message.content)], "budget": usage}
         
+    @instrument_node(WORKFLOW_NAME, "Retriever")
     def _vector_retriever(self, state:AgentState):
         print("------ RETRIEVER (MCP) ----------")
         query = state["messages"][-1].content
+        if self.budget.exhausted_reason(state["budget"]) and state.get("best_context"):
+            # No budget left for another filtered retrieval; the grader will degrade
+            return {"messages": [HumanMessage(content=state["best_context"])]}
         tool = next(t for t in self.mcp_tools if t.name == "get_product_info")
-        result = asyncio.run(tool.ainvoke({"query": query}))
+        result = asyncio.run(call_mcp_tool(tool, {"query": query}))
         context = result if result else "No data"
-        return {"messages": [HumanMessage(content=context)]}
+        update = {
+            "messages": [HumanMessage(content=context)],
+            "budget": self.budget.charge(state["budget"], llm_calls=self.filter_calls_per_retrieval),
+        }
+        # Keep the best context seen so far to fall back on when the budget runs out
+        score = self.score_grader.score(state["question"], context)
+        if score > state.get("best_score", -1.0):
+            update.update(best_context=context, best_score=score)
+        return update
     
+    @instrument_node(WORKFLOW_NAME, "WebSearch")
     def _web_search(self, state:AgentState):
         print("----- WEB SEARCH (MCP) -------")
         query = state["messages"][-1].content
         tool = next(t for t in self.mcp_tools if t.name == "web_search")
-        result = asyncio.run(tool.ainvoke({"query":query}))
+        result = asyncio.run(call_mcp_tool(tool, {"query": query}))
         context = result if result else "No data from web"
         return {"messages": [HumanMessage(content=context)]}
     
-    def _grade_documents(self, state:AgentState) -> Literal["generator", "rewriter"]:
+    @instrument_node(WORKFLOW_NAME, "Grader")
+    def _grade_documents(self, state: AgentState):
         print("------ GRADER --------")
-        question = state["messages"][0].content
+        question = state["question"]
         docs = state["messages"][-1].content
-
-        prompt = PromptTemplate(
-            template= """You are a grader. Question: {question}\nDocs: {docs}\n
-            Are docs relevant to the question? Answer yes or no.""",
-            input_variables=["question", "docs"],
-        )
-        chain = prompt | self.llm | StrOutputParser()
-        score = chain.invoke({"question": question, "docs": docs})
-        return "generator" if "yes" in score.lower() else "rewriter"
+        usage = state["budget"]
+
+        # Skip the LLM grade when query-term coverage is clearly high or low
+        verdict = self.score_grader.grade(question, docs)
+        if verdict is None and self.budget.allows_rewrite(usage):
+            chain = get_prompt(PromptType.GRADER) | self.llms["grader"]
+            message = chain.invoke({"question": question, "docs": docs})
+            usage = self.budget.charge(usage, llm_calls=1, tokens=count_tokens(message, question, docs))
+            verdict = "yes" in message.content.lower()
+
+        if verdict:
+            return {"grade": "generator", "budget": usage}
+        if self.budget.allows_rewrite(usage):
+            return {"grade": "rewriter", "budget": usage}
+
+        # Out of rewrites or budget: degrade to the best context seen so far
+        reason = self.budget.exhausted_reason(usage) or "max_rewrites"
+        log.warning("Budget exhausted, answering from best context", reason=reason,
+                    best_score=state.get("best_score"))
+        return {
+            "grade": "generator",
+            "budget": self.budget.charge(usage, degraded=True, degraded_reason=reason),
+            "messages": [HumanMessage(content=state.get("best_context") or docs)],
+        }
     
+    @instrument_node(WORKFLOW_NAME, "Generator")
     def _generate(self, state:AgentState):
         print("----- GENERATE ------")
-        question = state["messages"][0].content
+        question = state["question"]
         docs = state["messages"][-1].content
-        prompt = ChatPromptTemplate.from_template(
-            PROMPT_REGISTRY[PromptType.PRODUCT_BOT].template
-        )
-        chain = prompt | self.llm | StrOutputParser()
-        response = chain.invoke({"context": docs, "question": question})
-        return {"messages": [HumanMessage(content=response)]}
+        chain = get_prompt(PromptType.PRODUCT_BOT) | self.llms["generator"]
+        message = chain.invoke({"context": docs, "question": question})
+        usage = self.budget.charge(state["budget"], llm_calls=1, tokens=count_tokens(message, docs, question))
+        return {"messages": [HumanMessage(content=message.content)], "budget": usage}
     
+    @instrument_node(WORKFLOW_NAME, "Rewriter")
     def _rewrite(self, state: AgentState):
         print("-------- REWRITE --------")
-        question = state["messages"][0].content
-        prompt = ChatPromptTemplate.from_template(
-            "Rewrite this user query to make it more clear and specific for a search engine. "
-            "Do NOT answer the query. Only rewrite it. \n\nQuery: {question}\nRewritten Query:"
-        )
-        chain = prompt | self.llm | StrOutputParser()
-        new_q = chain.invoke({"question": question})
-        return {"messages": [HumanMessage(content=new_q.strip())]}
+        question = state["question"]
+        chain = get_prompt(PromptType.REWRITER) | self.llms["rewriter"]
+        message = chain.invoke({"question": question})
+        usage = self.budget.charge(state["budget"], llm_calls=1, rewrites=1,
+                                   tokens=count_tokens(message, question))
+        return {"messages": [HumanMessage(content=message.content.strip())], "budget": usage}
     
     # ----------- BUILD WORKFLOW ------------------------
     def _build_workflow(self):
@@ -115,6 +187,7 @@ class AgenticRAG:
         workflow.add_node("Retriever", self._vector_retriever)
         workflow.add_node("Generator", self._generate)
         workflow.add_node("Rewriter", self._rewrite)
+        workflow.add_node("Grader", self._grade_documents)
         workflow.add_node("WebSearch", self._web_search)
 
         workflow.add_edge(START, "Assistant")
@@ -128,9 +201,10 @@ class AgenticRAG:
             },
         )
 
+        workflow.add_edge("Retriever", "Grader")
         workflow.add_conditional_edges(
-            "Retriever",
-            self._grade_documents,
+            "Grader",
+            lambda state: state["grade"],
             {
                 "generator": "Generator",
                 "rewriter": "Rewriter"
@@ -148,9 +222,25 @@ class AgenticRAG:
     # ------- Public Run ------------------
     def run(self, query: str, thread_id: str = "default_thread") -> str:
         """Run the workflow for a given query and return the final answer."""
-        result = self.app.invoke({"messages": [HumanMessage(content=query)]},
-                                 config={"configurable": {"thread_id": thread_id}})
-        return result["messages"][-1].content
+        return self.run_with_metadata(query, thread_id)["answer"]
+
+    def run_with_metadata(self, query: str, thread_id: str = "default_thread") -> dict:
+        """Run the workflow and return the answer plus the request's budget consumption."""
+        thread_config = {"configurable": {"thread_id": thread_id}, "callbacks": [METRICS_CALLBACK]}
+        max_messages = self.config.get("checkpointer", {}).get("max_messages_per_thread", 20)
+        removals = trim_history(self.app, thread_config, max_messages)
+        result = self.app.invoke(
+            {
+                "messages": removals + [HumanMessage(content=query)],
+                "question": query,
+                "budget": self.budget.start(),
+                "best_context": "",
+                "best_score": -1.0,
+            },
+            config=thread_config,
+        )
+        budget = self.budget.log_summary(result["budget"], thread_id=thread_id)
+        return {"answer": result["messages"][-1].content, "budget": budget}
 
 if __name__ == "__main__":
     rag_agent = AgenticRAG()
@@ -0,0 +1,85 @@
+import time
+
+from logger import GLOBAL_LOGGER as log
+
+
+def count_tokens(message, *prompt_texts: str) -> int:
+    """
+    Tokens used by one LLM call: provider usage metadata when present,
+    otherwise a ~4 chars/token estimate over prompt and completion.
+    """
+    usage = getattr(message, "usage_metadata", None) or {}
+    if usage.get("total_tokens"):
+        return int(usage["total_tokens"])
+    content = getattr(message, "content", message)
+    chars = sum(len(t or "") for t in prompt_texts) + len(str(content or ""))
+    return max(1, chars // 4)
+
+
+class RequestBudget:
+    """
+    Per-request limits for the agentic loop. Usage is kept in AgentState["budget"] as a
+    plain dict so it checkpoints like any other state value; nodes charge it and
+    check it before spending more LLM calls.
+    """
+
+    def __init__(self, max_rewrites: int = 2, max_llm_calls: int = 16, max_seconds: float = 45.0, max_tokens: int = 20000):
+        self.max_rewrites = max_rewrites
+        self.max_llm_calls = max_llm_calls
+        self.max_seconds = max_seconds
+        self.max_tokens = max_tokens
+
+    @classmethod
+    def from_config(cls, config: dict) -> "RequestBudget":
+        # Limits missing from the `budget` block keep the constructor defaults (the config.yaml values)
+        block = config.get("budget", {})
+        limits = ("max_rewrites", "max_llm_calls", "max_seconds", "max_tokens")
+        return cls(**{name: block[name] for name in limits if name in block})
+
+    def start(self) -> dict:
+        return {"rewrites": 0, "llm_calls": 0, "tokens": 0, "started_at": time.time(), "degraded": False}
+
+    def charge(self, usage: dict, llm_calls: int = 0, tokens: int = 0, rewrites: int = 0, **flags) -> dict:
+        """Return a new usage dict with the given consumption added."""
+        return {
+            **usage,
+            "llm_calls": usage["llm_calls"] + llm_calls,
+            "tokens": usage["tokens"] + tokens,
+            "rewrites": usage["rewrites"] + rewrites,
+            **flags,
+        }
+
+    def exhausted_reason(self, usage: dict) -> str | None:
+        """Why no further optional LLM work may run; one call stays reserved for the generator."""
+        if time.time() - usage["started_at"] >= self.max_seconds:
+            return "wall_clock"
+        if usage["llm_calls"] >= self.max_llm_calls - 1:
+            return "llm_calls"
+        if usage["tokens"] >= self.max_tokens:
+            return "tokens"
+        return None
+
+    def allows_rewrite(self, usage: dict) -> bool:
+        return usage["rewrites"] < self.max_rewrites and self.exhausted_reason(usage) is None
+
+    def summary(self, usage: dict) -> dict:
+        return {
+            "rewrites": usage["rewrites"],
+            "llm_calls": usage["llm_calls"],
+            "tokens": usage["tokens"],
+            "elapsed_s": round(time.time() - usage["started_at"], 3),
+            "degraded": usage.get("degraded", False),
+            "degraded_reason": usage.get("degraded_reason"),
+            "catalog_answer": usage.get("catalog_answer", False),
+            "limits": {
+                "max_rewrites": self.max_rewrites,
+                "max_llm_calls": self.max_llm_calls,
+                "max_seconds": self.max_seconds,
+                "max_tokens": self.max_tokens,
+            },
+        }
+
+    def log_summary(self, usage: dict, **fields) -> dict:
+        summary = self.summary(usage)
+        log.info("Request budget consumed", **fields, **summary)
+        return summary
@@ -0,0 +1,61 @@
+import re
+import threading
+from typing import Any, Callable
+
+_SPACE_RE = re.compile(r"\s+")
+_TRAILING_PUNCT_RE = re.compile(r"[\s?!.]+$")
+
+
+def normalize_query(query: str) -> str:
+    """Coalescing key: case, whitespace and trailing punctuation do not change the answer."""
+    return _TRAILING_PUNCT_RE.sub("", _SPACE_RE.sub(" ", (query or "").strip().lower()))
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+        self.followers = 0
+
+
+class SingleFlight:
+    """
+    Deduplicates concurrent calls by key: the first caller (the leader) runs `fn`, callers
+    arriving while it is in flight block and receive the same result or exception.
+    Nothing is cached; the key is forgotten as soon as the leader finishes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: dict[str, _Call] = {}
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+    def do(self, key: str, fn: Callable[[], Any]) -> tuple[Any, bool]:
+        """Return (result, shared); `shared` is True for followers that did not run `fn`."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.followers += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
@@ -1,72 +1,97 @@
-from langchain_core.runnables import RunnablePassthrough
+from langchain_core.runnables import RunnableLambda, RunnableParallel, RunnablePassthrough
 from langchain_core.output_parsers import StrOutputParser
-from langchain_core.prompts import ChatPromptTemplate
 
-from prompt_library.prompts import PROMPT_REGISTRY, PromptType
+from prompt_library.prompts import PromptType, get_prompt
 from retriever.retrieval import Retriever
 from utils.model_loader import ModelLoader
+from utils.config_loader import get_config_store, load_config
+from utils.context_builder import ContextBuilder
 from evaluation.ragas_eval import evaluate_context_precision, evaluate_response_relevancy
+from observability.instrumentation import METRICS_CALLBACK, instrument_node
 
 retriever_obj = Retriever()
 model_loader = ModelLoader()
 
+WORKFLOW_NAME = "normal_generation"
+RUN_CONFIG = {"callbacks": [METRICS_CALLBACK]}
 
-def format_docs(docs) -> str:
-    """Format retrieved documents into a structured text block for the prompt."""
-    if not docs:
-        return "No relevant documents found."
 
-    formatted_chunks = []
-    for d in docs:
-        meta = d.metadata or {}
-        formatted = (
-            f"Title: {meta.get('product_title', 'N/A')}\n"
-            f"Price: {meta.get('price', 'N/A')}\n"
-            f"Rating: {meta.get('rating', 'N/A')}\n"
-            f"Reviews:\n{d.page_content.strip()}"
+def format_docs(docs, query: str = "") -> str:
+    """Format retrieved documents into a compact, token-budgeted context block for the prompt."""
+    return ContextBuilder.from_config(load_config()).build(query, docs)
+
+
+_chain = None
+
+
+def _retrieve(question: str, config):
+    return retriever_obj.load_retriever().invoke(question, config=config)
+
+
+async def _aretrieve(question: str, config):
+    return await retriever_obj.load_retriever().ainvoke(question, config=config)
+
+
+def build_chain():
+    """
+    Build (once) the RAG chain. The retriever runs a single time per query and its docs
+    feed both the prompt and the returned contexts: {"question", "docs", "answer"}. The live
+    retriever is looked up per query, so an index version switch applies without a rebuild.
+    """
+    global _chain
+    if _chain is None:
+        retriever = RunnableLambda(_retrieve, afunc=_aretrieve, name="retriever")
+        llm = model_loader.load_llm("generator")
+        prompt = get_prompt(PromptType.PRODUCT_BOT)
+        answer_chain = (
+            RunnableLambda(lambda x: {"context": format_docs(x["docs"], x["question"]), "question": x["question"]})
+            | prompt
+            | llm
+            | StrOutputParser()
         )
-        formatted_chunks.append(formatted)
+        _chain = (
+            RunnableParallel(docs=retriever, question=RunnablePassthrough())
+            | RunnablePassthrough.assign(answer=answer_chain)
+        )
+    return _chain
 
-    return "\n\n---\n\n".join(formatted_chunks)
 
+def reset_chain():
+    """Drop the built chain; the next build_chain() picks up the current retriever_obj, model_loader and config."""
+    global _chain
+    _chain = None
 
-def build_chain(query):
-    """Build the RAG pipeline chain with retriever, prompt, LLM, and parser."""
-    retriever = retriever_obj.load_retriever()
-    retrieved_docs=retriever.invoke(query)
-    
-    #retrieved_contexts = [format_docs(doc) for doc in retrieved_docs]
-    
-    retrieved_contexts = [format_docs(retrieved_docs)]
-    
-    llm = model_loader.load_llm()
-    prompt = ChatPromptTemplate.from_template(
-        PROMPT_REGISTRY[PromptType.PRODUCT_BOT].template
-    )
 
-    chain = (
-        {"context": retriever | format_docs, "question": RunnablePassthrough()}
-        | prompt
-        | llm
-        | StrOutputParser()
-    )
-    return chain,retrieved_contexts
+def _on_config_change(old, new):
+    """Config reload touched the retriever or LLM: rebuild the chain on next use."""
+    reset_chain()
+
 
+for _section in ("retriever", "llm", "llm_provider", "llm_router", "llm_tasks"):
+    get_config_store().subscribe(_section, _on_config_change)
 
+
+@instrument_node(WORKFLOW_NAME, "invoke_chain")
 def invoke_chain(query: str, debug: bool = False):
     """Run the chain with a user query."""
-    chain,retrieved_contexts = build_chain(query)
+    result = build_chain().invoke(query, config=RUN_CONFIG)
 
     if debug:
-        # For debugging: show docs retrieved before passing to LLM
-        docs = retriever_obj.load_retriever().invoke(query)
+        # For debugging: show the docs that were passed to the LLM
         print("\nRetrieved Documents:")
-        print(format_docs(docs))
+        print(format_docs(result["docs"], query))
         print("\n---\n")
 
-    response = chain.invoke(query)
-    
-    return retrieved_contexts,response
+    retrieved_contexts = [format_docs(result["docs"], query)]
+    return retrieved_contexts, result["answer"]
+
+
+async def abatch_chain(queries: list[str], max_concurrency: int = 4):
+    """Run many queries through the same chain with at most `max_concurrency` in flight."""
+    results = await build_chain().abatch(
+        queries, config={**RUN_CONFIG, "max_concurrency": max_concurrency}
+    )
+    return [([format_docs(r["docs"], r["question"])], r["answer"]) for r in results]
 
 
 if __name__=='__main__':
@@ -55,7 +55,7 @@ def build_chain():
     retriever = retriever_obj.load_retriever()
     llm = model_loader.load_llm()
     prompt = ChatPromptTemplate.from_template(
-        PROMPT_REGISTRY[PromptType.PRODUCT_BOT].template
+        PROMPT_REGISTRY[PromptType.PRODUCT_BOT].full_template
     )
 
     chain = (
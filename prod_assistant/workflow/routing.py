@@ -0,0 +1,201 @@
+import csv
+import math
+import re
+from collections import Counter
+from pathlib import Path
+
+from logger import GLOBAL_LOGGER as log
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = {
+    "a", "an", "the", "is", "are", "was", "of", "for", "to", "in", "on", "and", "or", "me", "my",
+    "i", "you", "can", "could", "please", "tell", "what", "which", "how", "do", "does", "it",
+    "this", "that", "with", "about", "any", "some", "under", "show", "give", "find", "get",
+}
+# Keyword heuristic the workflows used before the classifier; kept as the fallback
+RETRIEVAL_KEYWORDS = ("price", "review", "product")
+
+
+def _tokens(text: str) -> list[str]:
+    return _TOKEN_RE.findall((text or "").lower())
+
+
+def _featurize(text: str) -> dict[str, float]:
+    """Sparse, L2-normalised bag of words + character trigrams."""
+    counts: Counter = Counter()
+    for tok in _tokens(text):
+        counts["w:" + tok] += 1.0
+        padded = f"#{tok}#"
+        for i in range(len(padded) - 2):
+            counts["c:" + padded[i:i + 3]] += 0.5
+    norm = math.sqrt(sum(v * v for v in counts.values())) or 1.0
+    return {k: v / norm for k, v in counts.items()}
+
+
+def _dot(a: dict[str, float], b: dict[str, float]) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(v * b.get(k, 0.0) for k, v in a.items())
+
+
+class FastPathStats:
+    """Counters for routing decisions and LLM calls avoided by the fast paths."""
+
+    def __init__(self):
+        self.counts: Counter = Counter()
+
+    def incr(self, key: str, n: int = 1):
+        self.counts[key] += n
+
+    @property
+    def llm_calls_saved(self) -> int:
+        # A "retrieve" intent routes straight to the retriever instead of asking the assistant LLM
+        return self.counts["intent_retrieve"] + self.counts["grader_fast_yes"] + self.counts["grader_fast_no"]
+
+    def as_dict(self) -> dict:
+        return {**self.counts, "llm_calls_saved": self.llm_calls_saved}
+
+
+class IntentClassifier:
+    """
+    Nearest-centroid intent classifier trained from a labeled query file.
+    Labels: "retrieve" (needs product retrieval) or "direct" (answer without retrieval).
+    """
+
+    RETRIEVE = "retrieve"
+    DIRECT = "direct"
+
+    def __init__(self, examples: list[tuple[str, str]], min_margin: float = 0.02, stats: FastPathStats | None = None):
+        self.min_margin = min_margin
+        self.stats = stats or FastPathStats()
+        self.centroids: dict[str, dict[str, float]] = {}
+
+        grouped: dict[str, list[dict[str, float]]] = {}
+        for query, label in examples:
+            grouped.setdefault(label, []).append(_featurize(query))
+        for label, vectors in grouped.items():
+            centroid: Counter = Counter()
+            for vec in vectors:
+                centroid.update(vec)
+            norm = math.sqrt(sum(v * v for v in centroid.values())) or 1.0
+            self.centroids[label] = {k: v / norm for k, v in centroid.items()}
+
+    @classmethod
+    def from_file(cls, path: str | Path, **kwargs) -> "IntentClassifier":
+        """Load `query,intent` rows from a CSV file."""
+        path = Path(path)
+        if not path.exists():
+            log.warning("Intent examples not found, using keyword routing only", path=str(path))
+            return cls([], **kwargs)
+        with open(path, newline="", encoding="utf-8") as f:
+            examples = [(row["query"], row["intent"]) for row in csv.DictReader(f) if row.get("query")]
+        log.info("Intent classifier trained", examples=len(examples), path=str(path))
+        return cls(examples, **kwargs)
+
+    @classmethod
+    def from_config(cls, config: dict, stats: FastPathStats | None = None) -> "IntentClassifier":
+        routing = config.get("routing", {})
+        path = Path(routing.get("intent_examples", "config/intent_examples.csv"))
+        if not path.is_absolute():
+            path = Path(__file__).resolve().parents[1] / path
+        return cls.from_file(path, min_margin=routing.get("intent_min_margin", 0.02), stats=stats)
+
+    def scores(self, query: str) -> dict[str, float]:
+        vec = _featurize(query)
+        return {label: _dot(vec, centroid) for label, centroid in self.centroids.items()}
+
+    def predict(self, query: str) -> str:
+        """Return the intent label; falls back to the keyword heuristic when undecided."""
+        scores = self.scores(query)
+        ranked = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)
+        if len(ranked) >= 2 and ranked[0][1] - ranked[1][1] >= self.min_margin:
+            label = ranked[0][0]
+        else:
+            self.stats.incr("intent_keyword_fallback")
+            label = self.RETRIEVE if any(w in (query or "").lower() for w in RETRIEVAL_KEYWORDS) else self.DIRECT
+        self.stats.incr(f"intent_{label}")
+        return label
+
+
+class ScoreGrader:
+    """
+    Grades retrieved context by query-term coverage so the LLM grader only runs for the
+    ambiguous middle band. Returns True (relevant), False (irrelevant) or None (ask the LLM).
+    """
+
+    EMPTY_MARKERS = ("No relevant documents found.", "No local results found.", "No data")
+
+    def __init__(self, high: float = 0.75, low: float = 0.2, stats: FastPathStats | None = None):
+        self.high = high
+        self.low = low
+        self.stats = stats or FastPathStats()
+
+    @classmethod
+    def from_config(cls, config: dict, stats: FastPathStats | None = None) -> "ScoreGrader":
+        routing = config.get("routing", {})
+        return cls(
+            high=routing.get("grader_high", 0.75),
+            low=routing.get("grader_low", 0.2),
+            stats=stats,
+        )
+
+    def score(self, question: str, context: str) -> float:
+        """Best fraction of the question's content words found in any one context chunk."""
+        terms = {t for t in _tokens(question) if t not in _STOPWORDS}
+        if not terms or not context or context.strip() in self.EMPTY_MARKERS:
+            return 0.0
+        best = 0.0
+        for chunk in context.split("\n\n---\n\n"):
+            chunk_terms = set(_tokens(chunk))
+            best = max(best, len(terms & chunk_terms) / len(terms))
+        return best
+
+    def grade(self, question: str, context: str) -> bool | None:
+        score = self.score(question, context)
+        if score >= self.high:
+            self.stats.incr("grader_fast_yes")
+            return True
+        if score <= self.low:
+            self.stats.incr("grader_fast_no")
+            return False
+        self.stats.incr("grader_llm")
+        return None
+
+
+if __name__ == "__main__":
+    # Replay a JSONL query log (one {"query": ...} per line) through the fast paths, grading
+    # against the local catalog CSV, and report routing latency and LLM calls saved.
+    import json
+    import sys
+    import time
+    import pandas as pd
+    from utils.config_loader import load_config
+
+    log_path = sys.argv[1] if len(sys.argv) > 1 else "requests.jsonl"
+    config = load_config()
+    stats = FastPathStats()
+    classifier = IntentClassifier.from_config(config, stats=stats)
+    grader = ScoreGrader.from_config(config, stats=stats)
+
+    catalog = pd.read_csv("data/product_reviews.csv")
+    chunks = [
+        f"Title: {r.product_title}\nPrice: {r.price}\nRating: {r.rating}\nReviews:\n{r.top_reviews}"
+        for r in catalog.itertuples()
+    ]
+
+    with open(log_path, encoding="utf-8") as f:
+        queries = [json.loads(line).get("query", "") for line in f if line.strip()]
+    queries = [q for q in queries if q]
+    if not queries:
+        raise SystemExit(f"No queries found in {log_path}")
+
+    start = time.perf_counter()
+    for q in queries:
+        if classifier.predict(q) == IntentClassifier.RETRIEVE:
+            ranked = sorted(chunks, key=lambda c: grader.score(q, c), reverse=True)
+            grader.grade(q, "\n\n---\n\n".join(ranked[:4]))
+    elapsed = time.perf_counter() - start
+
+    print(f"queries={len(queries)} routing+grading avg={elapsed / len(queries) * 1e6:.0f}us/query")
+    print(json.dumps(stats.as_dict(), indent=2))
+    print(f"LLM calls saved per query: {stats.llm_calls_saved / len(queries):.2f}")
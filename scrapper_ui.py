@@ -2,9 +2,17 @@
 import streamlit as st
 from prod_assistant.etl.data_scrapper import FlipkartScraper
 from prod_assistant.etl.data_ingestion import DataIngestion
+from prod_assistant.etl.change_queue import ChangeQueue
+from prod_assistant.utils.config_loader import load_config
 import os
 
-flipkart_scraper = FlipkartScraper()
+# Scraped products go to the change queue as they are scraped; the ingestion worker
+# (python -m prod_assistant.etl.ingestion_worker) makes them searchable
+@st.cache_resource
+def change_queue():
+    return ChangeQueue.from_config(load_config())
+
+flipkart_scraper = FlipkartScraper(queue=change_queue())
 output_path = "data/product_reviews.csv"
 st.title("📦 Product Review Scraper")
 
@@ -52,16 +60,17 @@ if st.button("🚀 Start Scraping"):
         st.session_state["scraped_data"] = final_data  # store in session
         flipkart_scraper.save_to_csv(final_data, output_path)
         st.success("✅ Data saved to `data/product_reviews.csv`")
+        st.info(f"📬 {len(final_data)} products queued; the ingestion worker upserts the ones that changed")
         st.download_button("📥 Download CSV", data=open(output_path, "rb"), file_name="product_reviews.csv")
 
 # This stays OUTSIDE "if st.button('Start Scraping')"
-if "scraped_data" in st.session_state and st.button("🧠 Store in Vector DB (AstraDB)"):
+if "scraped_data" in st.session_state and st.button("🧠 Full re-index (new index version)"):
     with st.spinner("📡 Initializing ingestion pipeline..."):
         try:
             ingestion = DataIngestion()
             st.info("🚀 Running ingestion pipeline...")
             ingestion.run_pipeline()
-            st.success("✅ Data successfully ingested to AstraDB!")
+            st.success("✅ New index version built and promoted!")
         except Exception as e:
             st.error("❌ Ingestion failed!")
             st.exception(e)
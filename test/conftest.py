@@ -0,0 +1,15 @@
+"""Tests run on the offline fakes in prod_assistant/benchmarks: no API keys, network or AstraDB."""
+import pytest
+
+import prod_assistant  # noqa: F401  (puts the package modules on sys.path)
+from benchmarks.offline_env import use_offline_environment
+
+use_offline_environment()
+
+
+@pytest.fixture
+def agent():
+    """AgenticRAG over a 50-product in-memory catalog with the fake per-task LLMs."""
+    from benchmarks.replay import build_agents
+
+    return build_agents(1, "fake", 50, 0.0, 0.0)[0]
@@ -0,0 +1,129 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+import router.main as api
+from router.admission import AdmissionController, AdmissionRejected
+
+
+async def hold(admission: AdmissionController, client_id: str, order: list, gate: asyncio.Event):
+    async with admission.slot(client_id):
+        order.append(client_id)
+        await gate.wait()
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_freed_slots_go_round_robin_across_clients():
+    async def main():
+        admission = AdmissionController(max_concurrency=1, max_queue=10, max_queued_per_client=5)
+        order, gate = [], asyncio.Event()
+        first = asyncio.create_task(hold(admission, "busy", order, gate))
+        await settle()
+        tasks = [asyncio.create_task(hold(admission, client, order, gate))
+                 for client in ("busy", "busy", "busy", "a", "b")]
+        await settle()
+        assert admission.queue_depth == 5
+        gate.set()
+        await asyncio.gather(first, *tasks)
+        return order, admission
+
+    order, admission = asyncio.run(main())
+    assert order == ["busy", "busy", "a", "b", "busy", "busy"]
+    assert admission.in_flight == 0 and admission.queue_depth == 0
+
+
+def test_per_client_queue_cap():
+    async def main():
+        admission = AdmissionController(max_concurrency=1, max_queue=10, max_queued_per_client=2)
+        gate = asyncio.Event()
+        tasks = [asyncio.create_task(hold(admission, "hog", [], gate)) for _ in range(3)]
+        await settle()
+        with pytest.raises(AdmissionRejected) as rejected:
+            await admission.acquire("hog")
+        other = asyncio.create_task(hold(admission, "other", [], gate))  # other clients still queue
+        await settle()
+        assert admission.queue_depth == 3
+        gate.set()
+        await asyncio.gather(*tasks, other)
+        return rejected.value
+
+    rejected = asyncio.run(main())
+    assert rejected.reason == "client_queue_full"
+
+
+def test_queue_full():
+    async def main():
+        admission = AdmissionController(max_concurrency=1, max_queue=1)
+        gate = asyncio.Event()
+        tasks = [asyncio.create_task(hold(admission, client, [], gate)) for client in ("a", "b")]
+        await settle()
+        with pytest.raises(AdmissionRejected) as rejected:
+            await admission.acquire("c")
+        gate.set()
+        await asyncio.gather(*tasks)
+        return rejected.value
+
+    assert asyncio.run(main()).reason == "queue_full"
+
+
+def test_queue_timeout_rejects_and_leaves_the_queue():
+    async def main():
+        admission = AdmissionController(max_concurrency=1, queue_timeout_seconds=0.05, retry_after_seconds=3)
+        gate = asyncio.Event()
+        holder = asyncio.create_task(hold(admission, "a", [], gate))
+        await settle()
+        with pytest.raises(AdmissionRejected) as rejected:
+            await admission.acquire("b")
+        depth = admission.queue_depth
+        gate.set()
+        await holder
+        return rejected.value, depth, admission
+
+    rejected, depth, admission = asyncio.run(main())
+    assert (rejected.reason, rejected.retry_after) == ("timeout", 3)
+    assert depth == 0 and admission.in_flight == 0
+
+
+def test_slot_is_released_on_exception():
+    async def main():
+        admission = AdmissionController(max_concurrency=1)
+        with pytest.raises(RuntimeError):
+            async with admission.slot("a"):
+                raise RuntimeError("agent failed")
+        async with admission.slot("b"):  # would queue forever if the slot had leaked
+            assert admission.in_flight == 1
+        return admission
+
+    assert asyncio.run(main()).in_flight == 0
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def main():
+        admission = AdmissionController(max_concurrency=1)
+        gate = asyncio.Event()
+        holder = asyncio.create_task(hold(admission, "a", [], gate))
+        await settle()
+        waiter = asyncio.create_task(admission.acquire("b"))
+        await settle()
+        waiter.cancel()
+        await settle()
+        depth = admission.queue_depth
+        gate.set()
+        await holder
+        return depth, admission
+
+    depth, admission = asyncio.run(main())
+    assert depth == 0 and admission.in_flight == 0
+
+
+def test_api_answers_429_with_retry_after(monkeypatch):
+    monkeypatch.setattr(api, "admission", AdmissionController(max_concurrency=0, max_queue=0, retry_after_seconds=1.5))
+    response = TestClient(api.app).post("/get", data={"msg": "price of iphone 15"})
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "2"
@@ -0,0 +1,98 @@
+import time
+
+import pytest
+from langchain_core.messages import HumanMessage
+
+from utils.config_loader import load_config
+from utils.fake_llm import FakeProviderChatModel
+from workflow.budget import RequestBudget
+
+QUESTION = "price of apple iphone 15 pro"
+AMBIGUOUS_DOCS = "Title: Apple iPhone 13\nPrice: ₹49,999"  # coverage 0.6: the score grader asks the LLM
+BEST_CONTEXT = "Title: Apple iPhone 15 Pro\nPrice: ₹1,19,900"
+
+
+def limits(budget: RequestBudget) -> dict:
+    return budget.summary(budget.start())["limits"]
+
+
+def test_one_set_of_defaults():
+    configured = load_config()["budget"]
+
+    assert limits(RequestBudget()) == limits(RequestBudget.from_config({})) == {
+        name: configured[name] for name in ("max_rewrites", "max_llm_calls", "max_seconds", "max_tokens")
+    }
+    assert limits(RequestBudget.from_config({"budget": {"max_rewrites": 0}})) == {
+        **limits(RequestBudget()), "max_rewrites": 0,
+    }
+
+
+def test_charge_returns_a_new_usage():
+    budget = RequestBudget()
+    usage = budget.start()
+    charged = budget.charge(usage, llm_calls=2, tokens=100, rewrites=1, degraded=True)
+
+    assert usage["llm_calls"] == usage["tokens"] == usage["rewrites"] == 0
+    assert (charged["llm_calls"], charged["tokens"], charged["rewrites"], charged["degraded"]) == (2, 100, 1, True)
+
+
+@pytest.mark.parametrize("spent, reason", [
+    ({}, None),
+    ({"llm_calls": 3}, "llm_calls"),  # the last of 4 calls stays reserved for the generator
+    ({"tokens": 1000}, "tokens"),
+    ({"started_at": time.time() - 11}, "wall_clock"),
+])
+def test_exhausted_reason(spent, reason):
+    budget = RequestBudget(max_rewrites=2, max_llm_calls=4, max_seconds=10, max_tokens=1000)
+    usage = {**budget.start(), **spent}
+
+    assert budget.exhausted_reason(usage) == reason
+    assert budget.allows_rewrite(usage) is (reason is None)
+
+
+def test_rewrites_are_capped():
+    budget = RequestBudget(max_rewrites=1)
+
+    assert budget.allows_rewrite(budget.start())
+    assert not budget.allows_rewrite(budget.charge(budget.start(), rewrites=1))
+
+
+def grade(agent, usage: dict, grader_says: str) -> dict:
+    agent.llms["grader"] = FakeProviderChatModel(response=grader_says)
+    state = {"question": QUESTION, "messages": [HumanMessage(content=AMBIGUOUS_DOCS)], "budget": usage,
+             "best_context": BEST_CONTEXT, "best_score": 0.8}
+    return agent._grade_documents(state)
+
+
+def test_grader_llm_decides_the_ambiguous_band(agent):
+    update = grade(agent, agent.budget.start(), "yes")
+
+    assert update["grade"] == "generator"
+    assert update["budget"]["llm_calls"] == 1 and not update["budget"]["degraded"]
+
+
+def test_grader_rejection_rewrites_while_budget_allows(agent):
+    update = grade(agent, agent.budget.start(), "no")
+
+    assert update["grade"] == "rewriter"
+    assert "messages" not in update
+
+
+def test_out_of_rewrites_degrades_to_best_context(agent):
+    usage = {**agent.budget.start(), "rewrites": agent.budget.max_rewrites}
+    update = grade(agent, usage, "no")
+
+    assert update["grade"] == "generator"
+    assert update["messages"][0].content == BEST_CONTEXT
+    assert update["budget"]["degraded"] and update["budget"]["degraded_reason"] == "max_rewrites"
+    assert update["budget"]["llm_calls"] == 0  # no rewrite left, so the LLM grade was not worth a call
+
+
+def test_exhausted_budget_skips_the_grader_llm(agent):
+    usage = {**agent.budget.start(), "llm_calls": agent.budget.max_llm_calls - 1}
+    update = grade(agent, usage, "yes")
+
+    assert update["grade"] == "generator"
+    assert update["messages"][0].content == BEST_CONTEXT
+    assert update["budget"]["degraded_reason"] == "llm_calls"
+    assert update["budget"]["llm_calls"] == agent.budget.max_llm_calls - 1
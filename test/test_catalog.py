@@ -0,0 +1,111 @@
+import pytest
+from langchain_core.documents import Document
+
+import workflow.agentic_rag_workflow as agentic_rag_workflow
+from retriever.catalog import ProductCatalog
+from utils.config_loader import load_config
+from utils.snapshot import write_snapshot
+
+
+def record(product_id: str, title: str, price: str, rating: str = "4.6", total_reviews: str = "1,200") -> dict:
+    return {"product_id": product_id, "product_title": title, "price": price, "rating": rating,
+            "total_reviews": total_reviews}
+
+
+RECORDS = [
+    record("P1", "Apple iPhone 15 (Black, 128 GB)", "₹69,999", total_reviews="2,581"),
+    record("P2", "Apple iPhone 15 (Blue, 256 GB)", "₹79,999", total_reviews="2,581"),
+    record("P3", "Apple iPhone 15 Pro (Black Titanium, 128 GB)", "₹1,19,900", rating="4.7"),
+    record("P4", "Apple iPhone 15 Pro Max (Natural Titanium, 256 GB)", "₹1,48,900", rating="4.7"),
+    record("P5", "Apple iPhone 15 Pro Max (Blue Titanium, 512 GB)", "₹1,68,900", rating="4.7"),
+    *(record(f"S{n}", f"Samsung Galaxy S24 Ultra (Titanium {colour}, 256 GB)", f"₹{1_20_000 + n * 1000}")
+      for n, colour in enumerate(("Black", "Gray", "Violet", "Yellow", "Blue"))),
+]
+
+
+@pytest.fixture(scope="module")
+def catalog():
+    return ProductCatalog.from_records(RECORDS, max_variants=4)
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("price of iphone 15", ["P1", "P2"]),
+    ("price of iphone 15 pro", ["P3"]),
+    ("price of iphone 15 pro max", ["P4", "P5"]),
+    ("iphone 15 pro max 512gb", ["P5"]),
+    ("iphone 15 256 GB", ["P2"]),
+    ("iphone 15 pro max natural titanium", ["P4"]),
+    ("iphone 15 blue", ["P2"]),
+    ("iphone 15 1tb", []),
+    ("iphone 14", []),
+    ("price of galaxy s24", []),  # the tier word is part of the model: no S24 Ultra for "s24"
+    ("iphone 15 and galaxy s24 ultra", []),
+    ("wireless earbuds", []),
+])
+def test_resolve(catalog, query, expected):
+    assert [catalog.ids[row] for row in catalog.resolve(query)] == expected
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("What is the price of iPhone 15 Pro?", ["price"]),
+    ("how much does the iphone 15 cost", ["price"]),
+    ("iphone 15 rating and price", ["price", "rating"]),
+    ("how many reviews does the iphone 15 have", ["reviews"]),
+    ("is the iphone 15 worth the price", []),
+    ("iphone 15 vs iphone 15 pro price", []),
+    ("best phone under 70000", []),
+    ("iphone 15 camera rating", []),
+    ("tell me about the iphone 15", []),
+])
+def test_lookup_attributes(query, expected):
+    assert ProductCatalog.lookup_attributes(query) == expected
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("What is the price of iPhone 15 Pro?", "The Apple iPhone 15 Pro (Black Titanium, 128 GB) costs ₹1,19,900."),
+    ("price of iphone 15", "- Apple iPhone 15 (Black, 128 GB) costs ₹69,999.\n"
+                           "- Apple iPhone 15 (Blue, 256 GB) costs ₹79,999."),
+    ("rating of iphone 15 pro max", "The Apple iPhone 15 Pro Max is rated 4.7/5."),  # variants agree: one line
+    ("how many reviews does the iphone 15 have", "The Apple iPhone 15 has 2,581 ratings and reviews."),
+    ("price of galaxy s24 ultra black", "The Samsung Galaxy S24 Ultra (Titanium Black, 256 GB) costs ₹1,20,000."),
+    ("price of galaxy s24 ultra", None),  # five prices differ, more than max_variants
+    ("is the iphone 15 worth the price", None),
+    ("iphone 15 vs iphone 15 pro price", None),
+    ("price of iphone 14", None),
+    ("tell me about the iphone 15", None),
+])
+def test_answer(catalog, query, expected):
+    assert catalog.answer(query) == expected
+
+
+def test_max_variants_lists_when_within_the_limit():
+    catalog = ProductCatalog.from_records(RECORDS, max_variants=5)
+
+    assert catalog.answer("price of galaxy s24 ultra").count("\n- ") == 4
+
+
+def test_empty_catalog_answers_nothing():
+    assert ProductCatalog().answer("price of iphone 15") is None
+
+
+def snapshot_of(records: list[dict], root) -> str:
+    docs = [Document(page_content=r["product_title"], metadata=r) for r in records]
+    return write_snapshot(docs, [[1.0, 0.0]] * len(docs), root).name
+
+
+def test_agent_follows_a_promoted_snapshot(agent, monkeypatch, tmp_path):
+    config = {**load_config(), "snapshot": {"dir": str(tmp_path)}, "catalog": {"source": "snapshot", "max_variants": 4}}
+    monkeypatch.setattr(agentic_rag_workflow, "load_config", lambda: config)
+    query = "price of iphone 15 pro"
+
+    first = snapshot_of(RECORDS, tmp_path)
+    assert agent.refresh_catalog()
+    assert agent.catalog.version == first
+    assert agent.catalog.answer(query).endswith("costs ₹1,19,900.")
+    assert not agent.refresh_catalog()  # CURRENT did not move
+
+    repriced = [{**r, "price": "₹1,09,900"} if r["product_id"] == "P3" else r for r in RECORDS]
+    second = snapshot_of(repriced, tmp_path)
+    assert agent.refresh_catalog()
+    assert agent.catalog.version == second
+    assert agent.catalog.answer(query).endswith("costs ₹1,09,900.")
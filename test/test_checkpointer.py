@@ -0,0 +1,136 @@
+from typing import Annotated, Sequence, TypedDict
+
+import pytest
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langgraph.graph import END, START, StateGraph
+from langgraph.graph.message import add_messages
+
+import utils.checkpointer as checkpointer
+from utils.checkpointer import BoundedCheckpointer, trim_history
+
+
+class State(TypedDict):
+    messages: Annotated[Sequence[BaseMessage], add_messages]
+
+
+def answer(state: State):
+    return {"messages": [AIMessage(content=f"answer {len(state['messages'])}")]}
+
+
+def compile_graph(saver):
+    graph = StateGraph(State)
+    graph.add_node("Answer", answer)
+    graph.add_edge(START, "Answer")
+    graph.add_edge("Answer", END)
+    return graph.compile(checkpointer=saver)
+
+
+def thread(name: str) -> dict:
+    return {"configurable": {"thread_id": name}}
+
+
+def chat(app, name: str, text: str = "price of iphone 15?"):
+    return app.invoke({"messages": [HumanMessage(content=text)]}, config=thread(name))
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(checkpointer.time, "time", lambda: now[0])
+    return now
+
+
+def test_evicts_least_recently_used_past_max_threads():
+    saver = BoundedCheckpointer(max_threads=2)
+    app = compile_graph(saver)
+    for name in ("a", "b"):
+        chat(app, name)
+    app.get_state(thread("a"))  # a is now more recent than b
+    chat(app, "c")
+
+    assert saver.active_threads == 2
+    assert set(saver.storage) == {"a", "c"}
+    assert not saver.get_tuple(thread("b"))
+
+
+def test_expires_idle_threads(clock):
+    saver = BoundedCheckpointer(ttl_seconds=60)
+    app = compile_graph(saver)
+    chat(app, "idle")
+    clock[0] += 61
+    chat(app, "active")
+
+    assert set(saver.storage) == {"active"}
+    assert not any(key[0] == "idle" for key in saver.blobs)
+
+
+def test_keeps_newest_checkpoints_per_thread():
+    saver = BoundedCheckpointer(max_checkpoints_per_thread=2)
+    app = compile_graph(saver)
+    for turn in range(4):
+        chat(app, "s", f"turn {turn}")
+
+    assert len(saver.storage["s"][""]) == 2
+    messages = app.get_state(thread("s")).values["messages"]
+    assert [m.content for m in messages if isinstance(m, HumanMessage)] == [f"turn {t}" for t in range(4)]
+
+
+def test_restores_from_sqlite_after_restart(tmp_path, clock):
+    path = tmp_path / "checkpoints.sqlite"
+    saver = BoundedCheckpointer(ttl_seconds=60, sqlite_path=str(path))
+    app = compile_graph(saver)
+    chat(app, "kept")
+    clock[0] += 40
+    chat(app, "stale")
+    clock[0] += 30  # "kept" is now idle for 70s, "stale" for 30s
+    before = app.get_state(thread("stale")).values["messages"]
+    saver.close()
+
+    restarted = BoundedCheckpointer(ttl_seconds=60, sqlite_path=str(path))
+    after = compile_graph(restarted).get_state(thread("stale")).values["messages"]
+
+    assert [m.content for m in after] == [m.content for m in before]
+    assert set(restarted.storage) == {"stale"}
+    restarted.close()
+
+
+def test_trim_history_removes_the_oldest_messages():
+    app = compile_graph(BoundedCheckpointer())
+    for turn in range(3):
+        chat(app, "s", f"turn {turn}")
+
+    removals = trim_history(app, thread("s"), max_messages=4)
+    messages = app.get_state(thread("s")).values["messages"]
+    assert [r.id for r in removals] == [m.id for m in messages[:2]]
+    assert trim_history(app, thread("s"), max_messages=6) == []
+
+
+def test_workers_sharing_the_sqlite_file_share_history(tmp_path, clock):
+    path = str(tmp_path / "checkpoints.sqlite")
+    worker_a = compile_graph(BoundedCheckpointer(ttl_seconds=60, sqlite_path=path))
+    worker_b = compile_graph(BoundedCheckpointer(ttl_seconds=60, sqlite_path=path))
+    chat(worker_a, "s", "turn 0")
+    chat(worker_b, "s", "turn 1")  # the next turn of the session lands on another worker
+    chat(worker_a, "s", "turn 2")
+
+    for app in (worker_a, worker_b):
+        messages = app.get_state(thread("s")).values["messages"]
+        assert [m.content for m in messages if isinstance(m, HumanMessage)] == ["turn 0", "turn 1", "turn 2"]
+
+
+def test_idle_worker_does_not_expire_a_thread_another_worker_serves(tmp_path, clock):
+    path = str(tmp_path / "checkpoints.sqlite")
+    idle = BoundedCheckpointer(ttl_seconds=60, sqlite_path=path)
+    busy = BoundedCheckpointer(ttl_seconds=60, sqlite_path=path)
+    idle_app, busy_app = compile_graph(idle), compile_graph(busy)
+    chat(idle_app, "s")
+    for _ in range(3):
+        clock[0] += 30
+        chat(busy_app, "s")
+    chat(idle_app, "other")  # "s" is 90s idle here: evicted from memory and swept, but not expired
+
+    assert "s" not in idle.storage
+    assert len(idle_app.get_state(thread("s")).values["messages"]) == 8
+    clock[0] += 61
+    chat(idle_app, "other")  # now nobody touched "s" for the TTL
+    assert not busy.get_tuple(thread("s"))
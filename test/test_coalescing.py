@@ -0,0 +1,123 @@
+import threading
+import time
+
+import pytest
+
+from workflow.coalescing import SingleFlight, normalize_query
+
+
+def wait_for_followers(flight: SingleFlight, key: str, count: int = 1, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with flight._lock:
+            call = flight._calls.get(key)
+            if call is not None and call.followers >= count:
+                return
+        time.sleep(0.005)
+    raise TimeoutError(f"no follower joined {key!r}")
+
+
+def run_concurrently(flight: SingleFlight, key: str, fn, release: threading.Event):
+    """Leader runs `fn` in a thread and finishes only after a second caller joined; returns both outcomes."""
+    outcomes = {}
+
+    def call(name):
+        try:
+            outcomes[name] = flight.do(key, fn)
+        except Exception as e:
+            outcomes[name] = e
+
+    leader = threading.Thread(target=call, args=("leader",))
+    leader.start()
+    while not flight.in_flight():
+        time.sleep(0.005)
+    follower = threading.Thread(target=call, args=("follower",))
+    follower.start()
+    wait_for_followers(flight, key)
+    release.set()
+    leader.join()
+    follower.join()
+    return outcomes
+
+
+@pytest.fixture
+def release():
+    """Set once a follower joined; the leader's call blocks on it."""
+    event = threading.Event()
+    yield event
+    event.set()
+
+
+def test_concurrent_identical_calls_run_once(release):
+    flight, calls = SingleFlight(), []
+
+    def fn():
+        calls.append(1)
+        release.wait(5)
+        return "answer"
+
+    outcomes = run_concurrently(flight, "q", fn, release)
+
+    assert calls == [1]
+    assert outcomes == {"leader": ("answer", False), "follower": ("answer", True)}
+    assert flight.in_flight() == 0
+
+
+def test_leader_exception_reaches_the_follower(release):
+    flight = SingleFlight()
+
+    def fn():
+        release.wait(5)
+        raise ValueError("provider down")
+
+    outcomes = run_concurrently(flight, "q", fn, release)
+
+    assert isinstance(outcomes["leader"], ValueError)
+    assert outcomes["follower"] is outcomes["leader"]
+    assert flight.in_flight() == 0
+
+
+def test_key_is_forgotten_after_completion():
+    flight, calls = SingleFlight(), []
+    for _ in range(2):
+        assert flight.do("q", lambda: calls.append(1) or len(calls)) == (len(calls), False)
+
+    assert calls == [1, 1]
+    assert flight.in_flight() == 0
+
+
+@pytest.mark.parametrize("a, b", [("Price of iPhone 15?", "price of  iphone 15"), ("hi!", "HI")])
+def test_normalize_query(a, b):
+    assert normalize_query(a) == normalize_query(b)
+
+
+def test_agent_coalesces_identical_questions(agent, monkeypatch, release):
+    query = "What is the price of iPhone 15?"
+    execute, executed = agent._execute, []
+
+    def slow_execute(q, thread_id):
+        executed.append(thread_id)
+        release.wait(5)
+        return execute(q, thread_id)
+
+    monkeypatch.setattr(agent, "_execute", slow_execute)
+    results = {}
+    leader = threading.Thread(target=lambda: results.update(leader=agent.run_with_metadata(query, "leader")))
+    leader.start()
+    while not agent.single_flight.in_flight():
+        time.sleep(0.005)
+    follower = threading.Thread(target=lambda: results.update(follower=agent.run_with_metadata(query + "  ", "follower")))
+    follower.start()
+    wait_for_followers(agent.single_flight, normalize_query(query))
+    release.set()
+    leader.join()
+    follower.join()
+
+    assert executed == ["leader"]
+    assert results["follower"]["answer"] == results["leader"]["answer"]
+    assert results["follower"]["budget"]["coalesced"] and results["follower"]["budget"]["llm_calls"] == 0
+    assert results["follower"]["budget"]["llm_calls_saved"] == results["leader"]["budget"]["llm_calls"]
+
+    # The follower's own thread records the turn, so its next question has the history
+    messages = agent.app.get_state({"configurable": {"thread_id": "follower"}}).values["messages"]
+    assert [m.content for m in messages] == [query + "  ", results["leader"]["answer"]]
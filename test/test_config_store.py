@@ -0,0 +1,68 @@
+import gc
+from pathlib import Path
+
+import yaml
+
+from retriever.retrieval import Retriever
+from utils.config_loader import ConfigStore, get_config_store
+
+CONFIG = Path(__file__).resolve().parents[1] / "prod_assistant" / "config" / "config.yaml"
+
+
+def _store(tmp_path) -> ConfigStore:
+    path = tmp_path / "config.yaml"
+    path.write_text(CONFIG.read_text(encoding="utf-8"), encoding="utf-8")
+    return ConfigStore(path)
+
+
+def _change(store: ConfigStore, section: str, **values):
+    raw = yaml.safe_load(store.path.read_text(encoding="utf-8"))
+    raw[section] = {**raw[section], **values}
+    store.path.write_text(yaml.safe_dump(raw, allow_unicode=True), encoding="utf-8")
+    return store.reload()
+
+
+class Client:
+    def __init__(self):
+        self.calls = []
+
+    def on_change(self, old, new):
+        self.calls.append(new)
+
+
+def test_unsubscribe_stops_notifications(tmp_path):
+    store = _store(tmp_path)
+    seen = []
+    unsubscribe = store.subscribe("retriever", lambda old, new: seen.append(new["top_k"]))
+
+    _change(store, "retriever", top_k=7)
+    unsubscribe()
+    _change(store, "retriever", top_k=8)
+
+    assert seen == [7]
+
+
+def test_discarded_client_is_not_notified(tmp_path):
+    store = _store(tmp_path)
+    kept, dropped = Client(), Client()
+    store.subscribe("retriever", kept.on_change)
+    store.subscribe("retriever", dropped.on_change)
+    del dropped
+    gc.collect()
+
+    _change(store, "retriever", top_k=7)
+
+    assert len(kept.calls) == 1
+    assert len(store._subscribers["retriever"]) == 1
+
+
+def test_retriever_keeps_injected_vstore_on_reload():
+    store = get_config_store()
+    vstore = object()
+    retriever = Retriever(vstore=vstore)
+    try:
+        retriever._reset_vstore(store.data.get("index"), store.data.get("index"))
+        assert retriever.load_vstore() is vstore
+    finally:
+        retriever.close()
+    assert retriever._unsubscribe == []
@@ -0,0 +1,73 @@
+import pytest
+from langchain_core.documents import Document
+
+from utils.context_builder import NO_DOCS, ContextBuilder, clean_review_text, clean_reviews, estimate_tokens
+
+SCRAPED = (
+    "5 Awesome camera and display READ MORE Rahul Sharma Certified Buyer , Mumbai 3 months ago 120 14 "
+    "Permalink Report Abuse || 4 Battery lasts a full day... READ MORE Priya Certified Buyer , Pune "
+    "Jan, 2024 88 9 Permalink Report Abuse || Heats up while gaming READ MORE"
+)
+
+
+def phone(title: str, reviews: str, price: str = "₹69,999", **metadata) -> Document:
+    return Document(page_content=reviews, metadata={"product_title": title, "price": price, "rating": "4.6",
+                                                    **metadata})
+
+
+@pytest.mark.parametrize("raw, expected", [
+    (SCRAPED, ["5/5 Awesome camera and display", "4/5 Battery lasts a full day", "Heats up while gaming"]),
+    ("No reviews found", []),
+    ("", []),
+    ("Just okay   phone\n\nfor the price", ["Just okay phone for the price"]),
+])
+def test_clean_reviews_strips_boilerplate(raw, expected):
+    assert clean_reviews(raw) == expected
+
+
+def test_clean_review_text_is_idempotent():
+    once = clean_review_text(SCRAPED)
+
+    assert clean_review_text(once) == once
+    assert "Certified Buyer" not in once and "Permalink" not in once
+
+
+def test_variants_sharing_a_reviews_hash_are_merged():
+    docs = [
+        phone("Apple iPhone 15 (Black, 128 GB)", SCRAPED, reviews_hash="abc"),
+        phone("Apple iPhone 15 (Blue, 128 GB)", SCRAPED, reviews_hash="abc"),
+        phone("Samsung Galaxy S24", "5 Compact flagship", price="₹74,999", reviews_hash="def"),
+    ]
+    blocks = ContextBuilder().build("iphone 15 camera", docs).split("\n\n---\n\n")
+
+    assert len(blocks) == 2
+    assert "Title: Apple iPhone 15 (Black, 128 GB)" in blocks[0] and "Title: Apple iPhone 15 (Blue, 128 GB)" in blocks[0]
+    assert blocks[0].count("Awesome camera") == 1
+    assert blocks[1].startswith("Title: Samsung Galaxy S24")
+
+
+def test_identical_reviews_merge_without_a_stored_hash():
+    docs = [phone("Apple iPhone 15 (Black)", SCRAPED), phone("Apple iPhone 15 (Blue)", clean_review_text(SCRAPED))]
+
+    assert len(ContextBuilder().build("iphone", docs).split("\n\n---\n\n")) == 1
+
+
+def test_query_relevant_reviews_come_first():
+    context = ContextBuilder(max_reviews_per_product=1).build("battery life", [phone("Apple iPhone 15", SCRAPED)])
+
+    assert "Reviews:\n- 4/5 Battery lasts a full day" in context
+    assert "camera" not in context
+
+
+@pytest.mark.parametrize("max_tokens", [40, 80, 200])
+def test_context_stays_within_max_tokens(max_tokens):
+    docs = [phone(f"Phone {n}", " || ".join(f"{n} review number {i} " + "words " * 20 for i in range(5)),
+                  reviews_hash=str(n)) for n in range(10)]
+    context = ContextBuilder(max_tokens=max_tokens).build("phone review", docs)
+
+    assert context.startswith("Title: Phone 0")  # the first product always gets its block
+    assert estimate_tokens(context) <= max_tokens
+
+
+def test_no_docs():
+    assert ContextBuilder().build("iphone", []) == NO_DOCS
@@ -0,0 +1,10 @@
+import pytest
+
+from utils import import_profile
+
+
+@pytest.mark.parametrize("name", sorted(import_profile.ENTRYPOINTS))
+def test_cold_import_within_budget(name, capsys):
+    ok = import_profile.check(name, import_profile.ENTRYPOINTS[name], import_profile.BUDGET_MS, runs=3)
+
+    assert ok, capsys.readouterr().out
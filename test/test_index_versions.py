@@ -0,0 +1,91 @@
+import pytest
+from langchain_core.documents import Document
+
+from benchmarks.fakes import HashingEmbeddings
+from utils.index_versions import IndexValidationError, LocalIndex, Reindexer
+from utils.snapshot import list_versions
+
+EMBEDDING = HashingEmbeddings(dims=64)
+GOLDEN = [{"query": "iphone 15 battery life", "relevant": ["P1"]}]
+
+
+def product(product_id: str, text: str) -> Document:
+    return Document(page_content=text, metadata={"product_id": product_id, "product_title": text})
+
+
+CATALOG = [
+    product("P1", "Apple iPhone 15 battery life lasts all day"),
+    product("P2", "Samsung Galaxy S24 camera zoom"),
+    product("P3", "Google Pixel 8 software updates"),
+]
+
+
+class ShortIndex(LocalIndex):
+    """A backend whose bulk load lost a document."""
+
+    def count(self, version: str) -> int:
+        return super().count(version) - 1
+
+
+def reindexer(index: LocalIndex, **kwargs) -> Reindexer:
+    return Reindexer(index, index.root, EMBEDDING, golden=GOLDEN, k=1, warm_seconds=0, **kwargs)
+
+
+def run(reindexer: Reindexer, documents: list[Document] = CATALOG) -> str:
+    return reindexer.run(documents, EMBEDDING.embed_documents([d.page_content for d in documents]))
+
+
+def test_run_validates_and_promotes(tmp_path):
+    index = LocalIndex(tmp_path)
+    version = run(reindexer(index))
+
+    assert index.pointer() == {"current": version, "candidate": None}
+    assert reindexer(index).validate(version, CATALOG)["golden_hit_rate"] == 1.0
+
+
+def test_count_mismatch_drops_the_version(tmp_path):
+    live = run(reindexer(LocalIndex(tmp_path)))
+    index = ShortIndex(tmp_path)
+
+    with pytest.raises(IndexValidationError, match="holds 2 documents, expected 3"):
+        run(reindexer(index))
+    assert index.pointer() == {"current": live, "candidate": None}
+    assert list_versions(tmp_path) == [live]
+
+
+def test_count_tolerance_admits_a_small_mismatch(tmp_path):
+    index = ShortIndex(tmp_path)
+
+    assert index.pointer()["current"] is None
+    assert run(reindexer(index, count_tolerance=0.5)) == index.pointer()["current"]
+
+
+def test_golden_regression_blocks_promotion(tmp_path):
+    index = LocalIndex(tmp_path)
+    live = run(reindexer(index))
+    regressed = [product("P1", "Apple iPhone 15 colours"), product("P2", "iphone 15 battery life rivals"), CATALOG[2]]
+
+    with pytest.raises(IndexValidationError, match="golden hit rate 0.00 vs live 1.00"):
+        run(reindexer(index), regressed)
+    assert index.pointer()["current"] == live
+    assert list_versions(tmp_path) == [live]
+
+
+def test_rollback_picks_the_previous_version(tmp_path):
+    index = LocalIndex(tmp_path)
+    first, _ = run(reindexer(index)), run(reindexer(index))
+
+    assert reindexer(index).rollback() == first
+    assert index.pointer()["current"] == first
+    with pytest.raises(IndexValidationError, match="No version older"):
+        reindexer(index).rollback()
+
+
+def test_prune_keeps_live_plus_keep(tmp_path):
+    index = LocalIndex(tmp_path)
+    versions = [run(reindexer(index, keep=1)) for _ in range(4)]
+
+    assert list_versions(tmp_path) == versions[-2:]
+    assert reindexer(index, keep=1).rollback() == versions[-2]
+    assert reindexer(index, keep=1).prune() == []  # the version rolled back from is newer than live: kept
+    assert list_versions(tmp_path) == versions[-2:]
@@ -0,0 +1,118 @@
+import pytest
+from langchain_core.documents import Document
+
+from benchmarks.cdc import AckFailsOnce
+from benchmarks.fakes import HashingEmbeddings
+from prod_assistant.etl.change_queue import ChangeQueue
+from prod_assistant.etl.ingestion_worker import IngestionWorker
+from utils.index_versions import LocalIndex, document_id
+from utils.snapshot import list_versions, write_snapshot
+
+EMBEDDING = HashingEmbeddings(dims=16)
+
+
+def scraped(product_id: str, price: str = "₹69,999") -> dict:
+    return {"product_id": product_id, "product_title": f"Phone {product_id}", "rating": "4.5",
+            "total_reviews": "1,024", "price": price, "top_reviews": "5 Great phone READ MORE"}
+
+
+class FailingIndex(LocalIndex):
+    """Upserts raise `failures` times (an embedding or backend outage), then succeed."""
+
+    def __init__(self, root, failures: int):
+        super().__init__(root)
+        self.failures = failures
+
+    def upsert(self, *args, **kwargs):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("backend unavailable")
+        return super().upsert(*args, **kwargs)
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = ChangeQueue(tmp_path / "changes.sqlite")
+    yield queue
+    queue.close()
+
+
+def worker(queue, index) -> IngestionWorker:
+    return IngestionWorker(queue, index, EMBEDDING, batch_size=10, lease_seconds=60, max_attempts=3, poll_seconds=0)
+
+
+def live_documents(index: LocalIndex) -> dict:
+    return {document_id(d): d for d in index.documents(index.pointer()["current"])}
+
+
+def apply_queued(worker: IngestionWorker) -> dict:
+    return worker.apply(worker.queue.lease(worker.batch_size, worker.lease_seconds, worker.max_attempts))
+
+
+def test_failed_upsert_is_released_and_redelivered(queue, tmp_path):
+    index = FailingIndex(tmp_path / "snapshots", failures=1)
+    queue.put([scraped("P1"), scraped("P2")])
+
+    assert worker(queue, index).run_once() == 2
+    assert index.pointer()["current"] is None
+    assert queue.stats(3)["pending"] == 2
+    assert worker(queue, index).run_once() == 2
+    assert sorted(live_documents(index)) == ["P1", "P2"]
+    assert queue.stats(3)["pending"] == 0
+
+
+def test_redelivery_after_a_lost_ack_does_not_duplicate_rows(queue, tmp_path):
+    index = LocalIndex(tmp_path / "snapshots")
+    queue.put([scraped("P1"), scraped("P2")])
+
+    assert worker(AckFailsOnce(queue), index).run_once() == 2  # upserted, then died before the ack
+    assert worker(queue, index).run_once() == 2
+
+    assert len(index.documents(index.pointer()["current"])) == 2
+    assert len(list_versions(index.root)) == 1  # the redelivery matched the live hashes: no second upsert
+    assert queue.stats(3)["pending"] == 0
+
+
+def test_unchanged_rescrape_is_skipped(queue, tmp_path):
+    index = LocalIndex(tmp_path / "snapshots")
+    queue.put([scraped("P1")])
+    apply_queued(worker(queue, index))
+    live = index.pointer()["current"]
+
+    queue.put([scraped("P1")])
+    assert apply_queued(worker(queue, index)) == {"upserted": 0, "unchanged": 1, "superseded": 0}
+    assert index.pointer()["current"] == live
+
+
+def test_newest_record_in_a_batch_wins(queue, tmp_path):
+    index = LocalIndex(tmp_path / "snapshots")
+    queue.put([scraped("P1", price="₹69,999"), scraped("P2"), scraped("P1", price="₹64,999")])
+
+    assert apply_queued(worker(queue, index)) == {"upserted": 2, "unchanged": 0, "superseded": 1}
+    assert live_documents(index)["P1"].metadata["price"] == "₹64,999"
+
+
+def test_live_version_change_resets_change_detection(queue, tmp_path):
+    index = LocalIndex(tmp_path / "snapshots")
+    queue.put([scraped("P1")])
+    apply_queued(worker(queue, index))
+
+    # A full re-index from an older scrape goes live behind the worker's back
+    rebuilt = [Document(page_content="Stale review", metadata={"product_id": "P1", "product_title": "Phone P1"})]
+    live = write_snapshot(rebuilt, EMBEDDING.embed_documents(["Stale review"]), index.root).name
+    queue.put([scraped("P1")])  # identical to what the worker upserted before the re-index
+
+    assert apply_queued(worker(queue, index)) == {"upserted": 1, "unchanged": 0, "superseded": 0}
+    assert live_documents(index)["P1"].page_content == "5/5 Great phone"
+    assert queue.indexed_version() == index.pointer()["current"] != live
+
+
+def test_records_past_max_attempts_stay_as_dead_letters(queue, tmp_path):
+    index = FailingIndex(tmp_path / "snapshots", failures=10)
+    queue.put([scraped("P1")])
+
+    worker(queue, index).run(drain=True)
+
+    assert index.failures == 7  # three deliveries, then no longer leased
+    assert queue.stats(3)["pending"] == 0 and queue.stats(3)["dead"] == 1
+    assert worker(queue, index).run_once() == 0
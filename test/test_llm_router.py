@@ -0,0 +1,33 @@
+import asyncio
+
+from utils.fake_llm import FakeProviderChatModel
+from utils.llm_router import LLMRouter
+
+
+def _providers(prefix: str) -> dict:
+    return {
+        f"{prefix}-slow": FakeProviderChatModel(response="slow", latency_s=0.5),
+        f"{prefix}-fast": FakeProviderChatModel(response="fast", latency_s=0.01),
+    }
+
+
+def test_lost_hedge_is_counted_as_cancelled_not_as_a_success():
+    router = LLMRouter(providers=_providers("hedge"), hedge_after_seconds=0.05)
+
+    answer = asyncio.run(router.ainvoke("hello"))
+
+    assert answer.content == "fast"
+    health = router.health()
+    assert health["hedge-slow"] == {**health["hedge-slow"], "calls": 0, "cancelled": 1, "p50_latency_s": None}
+    assert health["hedge-fast"]["calls"] == 1
+
+
+def test_routers_share_provider_health():
+    generator = LLMRouter(providers=_providers("shared"), hedge_after_seconds=None)
+    grader = LLMRouter(providers=_providers("shared"), hedge_after_seconds=None)
+
+    generator.invoke("hello")
+
+    assert grader.health() == generator.health()
+    assert grader.health()["shared-slow"]["calls"] == 1
+    assert grader._pool is generator._pool
@@ -0,0 +1,45 @@
+import os
+import time
+from pathlib import Path
+
+import logger.custom_logger as custom_logger
+from logger import GLOBAL_LOGGER as log
+
+
+def test_forked_child_writes_its_own_records():
+    marker = f"forked child record {time.time()}"
+    pid = os.fork()
+    if pid == 0:  # pragma: no cover - runs in the child
+        code = 1
+        try:
+            log.warning(marker)  # tests log at WARNING (offline_env)
+            custom_logger._stop_listener()  # flush the child's queue through its handlers
+            code = 0
+        finally:
+            os._exit(code)
+    _, status = os.waitpid(pid, 0)
+
+    base, ext = os.path.splitext(custom_logger._configured.log_file_path)
+    child_file = Path(f"{base}.{pid}{ext}")
+    try:
+        assert os.waitstatus_to_exitcode(status) == 0
+        assert marker in child_file.read_text()
+        assert marker not in Path(custom_logger._configured.log_file_path).read_text()
+    finally:
+        child_file.unlink(missing_ok=True)
+
+
+def test_parent_keeps_logging_after_a_fork():
+    pid = os.fork()
+    if pid == 0:  # pragma: no cover
+        os._exit(0)
+    os.waitpid(pid, 0)
+    marker = f"parent record {time.time()}"
+    log.warning(marker)  # tests log at WARNING (offline_env)
+
+    deadline = time.time() + 5
+    path = Path(custom_logger._configured.log_file_path)
+    while marker not in path.read_text() and time.time() < deadline:
+        time.sleep(0.05)
+    assert marker in path.read_text()
+    Path(f"{os.path.splitext(path)[0]}.{pid}.log").unlink(missing_ok=True)
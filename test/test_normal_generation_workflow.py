@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+import workflow.normal_generation_workflow as normal_generation
+from benchmarks.fakes import OfflineModelLoader
+
+
+class CountingRetriever(BaseRetriever):
+    """Returns one fixed document and records every query it is asked."""
+
+    queries: list[str] = []
+
+    def _get_relevant_documents(self, query, *, run_manager=None):
+        self.queries.append(query)
+        return [Document(page_content=f"Great phone for {query}",
+                         metadata={"product_title": "Apple iPhone 15", "price": "₹69,999", "rating": 4.6})]
+
+
+class FakeRetrieverLoader:
+    def __init__(self, retriever):
+        self.retriever = retriever
+
+    def load_retriever(self):
+        return self.retriever
+
+
+@pytest.fixture
+def retriever(monkeypatch):
+    retriever = CountingRetriever(queries=[])
+    monkeypatch.setattr(normal_generation, "retriever_obj", FakeRetrieverLoader(retriever))
+    monkeypatch.setattr(normal_generation, "model_loader", OfflineModelLoader())
+    normal_generation.reset_chain()
+    yield retriever
+    normal_generation.reset_chain()
+
+
+def test_build_chain_returns_the_docs_it_answered_from(retriever):
+    result = normal_generation.build_chain().invoke("iphone 15")
+
+    assert retriever.queries == ["iphone 15"]
+    assert [d.page_content for d in result["docs"]] == ["Great phone for iphone 15"]
+    assert result["question"] == "iphone 15" and result["answer"]
+
+
+def test_invoke_chain_retrieves_once(retriever):
+    contexts, answer = normal_generation.invoke_chain("iphone 15")
+
+    assert retriever.queries == ["iphone 15"]
+    assert "Apple iPhone 15" in contexts[0]
+    assert answer
+
+
+def test_abatch_chain_retrieves_once_per_query(retriever):
+    queries = ["iphone 15", "budget phone", "best camera"]
+    results = asyncio.run(normal_generation.abatch_chain(queries, max_concurrency=2))
+
+    assert sorted(retriever.queries) == sorted(queries)
+    assert len(results) == len(queries)
+    for query, (contexts, _) in zip(queries, results):
+        assert f"Great phone for {query}" in contexts[0]
+
+
+def test_chain_follows_index_switch(retriever):
+    normal_generation.build_chain().invoke("iphone 15")
+    switched = CountingRetriever(queries=[])
+    normal_generation.retriever_obj.retriever = switched  # Retriever.refresh_index swapped the live version
+    normal_generation.build_chain().invoke("budget phone")
+
+    assert retriever.queries == ["iphone 15"]
+    assert switched.queries == ["budget phone"]
@@ -0,0 +1,20 @@
+import asyncio
+
+import mcp_servers.product_search_server as server
+from test.test_normal_generation_workflow import CountingRetriever, FakeRetrieverLoader
+
+
+def test_get_product_info_follows_index_switch(monkeypatch):
+    live = FakeRetrieverLoader(CountingRetriever(queries=[]))
+    monkeypatch.setattr(server, "Retriever", lambda: live)
+    server.get_retriever.cache_clear()
+    try:
+        first = asyncio.run(server.get_product_info("iphone 15"))
+        previous, live.retriever = live.retriever, CountingRetriever(queries=[])  # refresh_index switched
+        second = asyncio.run(server.get_product_info("iphone 15 pro"))
+    finally:
+        server.get_retriever.cache_clear()
+
+    assert "Apple iPhone 15" in first and "Apple iPhone 15" in second
+    assert previous.queries == ["iphone 15"]
+    assert live.retriever.queries == ["iphone 15 pro"]
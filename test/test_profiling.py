@@ -0,0 +1,35 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import router.main as api
+from observability.profiling import ProfilingForbidden, RequestProfiler
+
+
+@pytest.fixture
+def profiler(monkeypatch, tmp_path):
+    monkeypatch.setenv("PROFILING_TOKEN", "s3cret")
+    profiler = RequestProfiler(enabled=True, output_dir=str(tmp_path))
+    monkeypatch.setattr(api, "profiler", profiler)
+    return profiler
+
+
+def test_token_is_compared_as_bytes(profiler):
+    assert profiler.authorized("s3cret")
+    for wrong in ("nope", "s3crét", "\ud800"):
+        with pytest.raises(ProfilingForbidden):
+            profiler.authorized(wrong)
+
+
+def test_flag_without_token(profiler, monkeypatch):
+    monkeypatch.delenv("PROFILING_TOKEN")
+    assert profiler.authorized("true")
+    assert not profiler.authorized("é")
+
+
+def test_wrong_token_is_forbidden(profiler):
+    client = TestClient(api.app)
+
+    assert client.get("/profiles/x.json", headers={"X-Profile": "wrong"}).status_code == 403
+    assert client.get("/profiles/x.json", params={"profile": "s3crét"}).status_code == 403
+    assert client.post("/get", data={"msg": "hi"}, headers={"X-Profile": "wrong"}).status_code == 403
+    assert client.get("/profiles/x.json", headers={"X-Profile": "s3cret"}).status_code == 404
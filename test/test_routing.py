@@ -0,0 +1,70 @@
+import csv
+from pathlib import Path
+
+import pytest
+
+from workflow.routing import FastPathStats, IntentClassifier, ScoreGrader
+
+EXAMPLES = Path(__file__).resolve().parents[1] / "prod_assistant" / "config" / "intent_examples.csv"
+
+
+@pytest.fixture(scope="module")
+def classifier():
+    return IntentClassifier.from_file(EXAMPLES)
+
+
+def test_classifier_fits_the_bundled_examples(classifier):
+    with open(EXAMPLES, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    correct = sum(classifier.predict(row["query"]) == row["intent"] for row in rows)
+
+    assert correct / len(rows) >= 0.95
+
+
+@pytest.mark.parametrize("query, intent", [
+    ("price of samsung s23", IntentClassifier.RETRIEVE),
+    ("best phone under 20000 with good camera reviews", IntentClassifier.RETRIEVE),
+    ("hello there", IntentClassifier.DIRECT),
+    ("who are you", IntentClassifier.DIRECT),
+])
+def test_classifier_on_unseen_queries(classifier, query, intent):
+    assert classifier.predict(query) == intent
+
+
+def test_keyword_fallback_without_examples():
+    classifier = IntentClassifier([])
+
+    assert classifier.predict("product reviews please") == IntentClassifier.RETRIEVE
+    assert classifier.predict("good morning") == IntentClassifier.DIRECT
+    assert classifier.stats.counts["intent_keyword_fallback"] == 2
+
+
+def test_retrieve_intents_count_as_saved_llm_calls():
+    stats = FastPathStats()
+    classifier = IntentClassifier.from_file(EXAMPLES, stats=stats)
+    classifier.predict("price of samsung s23")
+    classifier.predict("hello there")
+
+    assert stats.llm_calls_saved == 1
+    assert stats.as_dict()["llm_calls_saved"] == 1
+
+
+@pytest.mark.parametrize("context, expected, counter", [
+    ("Title: Apple iPhone 15\nPrice: ₹69,999", True, "grader_fast_yes"),      # coverage 1.0 >= high
+    ("Title: Samsung Galaxy S24\nPrice: ₹74,999", False, "grader_fast_no"),   # coverage 0.2 <= low
+    ("Title: Apple iPhone 13\nPrice: ₹49,999", None, "grader_llm"),          # 0.6: ask the LLM
+    ("No relevant documents found.", False, "grader_fast_no"),
+])
+def test_score_grader_thresholds(context, expected, counter):
+    grader = ScoreGrader(high=0.75, low=0.2)
+
+    assert grader.grade("price of apple iphone 15 pro", context) is expected
+    assert grader.stats.counts == {counter: 1}
+    assert grader.stats.llm_calls_saved == (counter != "grader_llm")
+
+
+def test_score_grader_takes_the_best_chunk():
+    grader = ScoreGrader()
+    context = "Title: Samsung Galaxy S24\n\n---\n\nTitle: Apple iPhone 15\nPrice: ₹69,999"
+
+    assert grader.score("price of iphone 15", context) == 1.0
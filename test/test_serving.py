@@ -0,0 +1,105 @@
+import copy
+import importlib.util
+import multiprocessing
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+import urllib.request
+
+import pytest
+import yaml
+
+from benchmarks.serving import GUNICORN_CONF, PROJECT_ROOT, _children, wait_ready
+from utils.config_loader import load_config
+
+
+def load_conf(monkeypatch, tmp_path, **env):
+    monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+    monkeypatch.setenv("CHECKPOINTER_BACKEND", "")
+    monkeypatch.delenv("CHECKPOINTER_BACKEND")  # restored after the test if gunicorn_conf sets it
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+    spec = importlib.util.spec_from_file_location("gunicorn_conf", GUNICORN_CONF)
+    conf = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(conf)
+    return conf
+
+
+@pytest.mark.parametrize("preload", [False, True])
+def test_preload_only_when_enabled(monkeypatch, tmp_path, preload):
+    import router.serving
+
+    conf = load_conf(monkeypatch, tmp_path, PRELOAD=str(preload).lower())
+    calls = []
+    monkeypatch.setattr(router.serving, "preload_shared_state", lambda: calls.append(1))
+    conf.when_ready(None)
+
+    assert conf.preload_app is preload
+    assert len(calls) == int(preload)
+
+
+def test_one_worker_per_core_by_default(monkeypatch, tmp_path):
+    conf = load_conf(monkeypatch, tmp_path)
+
+    assert conf.workers == multiprocessing.cpu_count()
+
+
+@pytest.mark.parametrize("web_concurrency, backend", [("1", None), ("2", "sqlite")])
+def test_several_workers_share_the_sqlite_checkpointer(monkeypatch, tmp_path, web_concurrency, backend):
+    load_conf(monkeypatch, tmp_path, WEB_CONCURRENCY=web_concurrency)
+
+    assert os.environ.get("CHECKPOINTER_BACKEND") == backend
+
+
+def test_explicit_checkpointer_backend_wins(monkeypatch, tmp_path):
+    load_conf(monkeypatch, tmp_path, WEB_CONCURRENCY="2", CHECKPOINTER_BACKEND="memory")
+
+    assert os.environ["CHECKPOINTER_BACKEND"] == "memory"
+
+
+def test_sigterm_drains_in_flight_chat(tmp_path):
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    config = copy.deepcopy(load_config())
+    config["checkpointer"] = {**config["checkpointer"], "sqlite_path": str(tmp_path / "checkpoints.sqlite")}
+    (tmp_path / "config.yaml").write_text(yaml.safe_dump(config, allow_unicode=True))
+    env = {**os.environ, "BIND": f"127.0.0.1:{port}", "PROMETHEUS_MULTIPROC_DIR": str(tmp_path / "metrics"),
+           "CONFIG_PATH": str(tmp_path / "config.yaml"), "WEB_CONCURRENCY": "2",
+           "BENCH_CATALOG_SIZE": "50", "BENCH_LLM_LATENCY": "1.0"}
+    env.pop("CHECKPOINTER_BACKEND", None)
+    url = f"http://127.0.0.1:{port}"
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", str(GUNICORN_CONF), "--access-logfile", "/dev/null",
+         "benchmarks.serving_app:app"],
+        cwd=PROJECT_ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_ready(proc, url, 2, timeout=120)
+        result = {}
+
+        def chat():
+            body = urllib.parse.urlencode({"msg": "best budget phone"}).encode()
+            with urllib.request.urlopen(f"{url}/get", data=body, timeout=60) as resp:
+                result["status"] = resp.status
+
+        client = threading.Thread(target=chat)
+        client.start()
+        time.sleep(0.5)  # the chat is waiting on the fake LLM
+        proc.send_signal(signal.SIGTERM)
+        client.join(timeout=60)
+        assert proc.wait(timeout=60) == 0
+        assert result == {"status": 200}
+        assert (tmp_path / "checkpoints.sqlite").exists()  # two workers: history went to the shared file
+    finally:
+        if proc.poll() is None:
+            for pid in _children(proc.pid):
+                os.kill(pid, signal.SIGKILL)
+            proc.kill()
+            proc.wait()
@@ -0,0 +1,67 @@
+import multiprocessing
+import threading
+
+from langchain_core.documents import Document
+
+from benchmarks.fakes import HashingEmbeddings
+from utils.index_versions import LocalIndex, document_id
+from utils.snapshot import current_version, is_incremental, list_versions, write_snapshot
+
+
+def product(n: int, review: str = "good") -> Document:
+    return Document(page_content=f"Phone {n}: {review}", metadata={"product_id": f"P{n}", "product_title": f"Phone {n}"})
+
+
+def write_full(root, n: int = 1):
+    docs = [product(n)]
+    write_snapshot(docs, HashingEmbeddings(dims=8).embed_documents([d.page_content for d in docs]), root, keep=3)
+
+
+def test_concurrent_writers_get_distinct_versions(tmp_path):
+    writers = [threading.Thread(target=write_full, args=(tmp_path, n)) for n in range(4)]
+    for w in writers:
+        w.start()
+    for w in writers:
+        w.join()
+
+    assert list_versions(tmp_path) == ["v0002", "v0003", "v0004"]  # v0001 pruned by keep=3
+    assert not list(tmp_path.glob(".staging-*"))
+
+
+def test_concurrent_processes_get_distinct_versions(tmp_path):
+    ctx = multiprocessing.get_context("fork")
+    writers = [ctx.Process(target=write_full, args=(tmp_path, n)) for n in range(3)]
+    for w in writers:
+        w.start()
+    for w in writers:
+        w.join()
+
+    assert [w.exitcode for w in writers] == [0, 0, 0]
+    assert list_versions(tmp_path) == ["v0001", "v0002", "v0003"]
+
+
+def test_concurrent_upserts_keep_every_product(tmp_path):
+    index = LocalIndex(tmp_path)
+    write_full(tmp_path, 0)
+    upserts = [threading.Thread(target=index.upsert, args=([product(n)], HashingEmbeddings(dims=8)))
+               for n in range(1, 6)]
+    for u in upserts:
+        u.start()
+    for u in upserts:
+        u.join()
+
+    ids = {document_id(d) for d in index.documents(current_version(tmp_path))}
+    assert ids == {f"P{n}" for n in range(6)}
+
+
+def test_worker_upserts_do_not_prune_full_builds(tmp_path):
+    index = LocalIndex(tmp_path)
+    write_full(tmp_path, 0)
+    write_full(tmp_path, 0)  # blue/green rollback target
+    for n in range(5):
+        index.upsert([product(n, f"review {n}")], HashingEmbeddings(dims=8), keep=2)
+
+    versions = list_versions(tmp_path)
+    assert [v for v in versions if not is_incremental(tmp_path, v)] == ["v0001", "v0002"]
+    assert [v for v in versions if is_incremental(tmp_path, v)] == ["v0006", "v0007"]
+    assert current_version(tmp_path) == "v0007"
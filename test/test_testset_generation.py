@@ -0,0 +1,58 @@
+import asyncio
+import json
+
+from langchain_core.documents import Document
+
+from benchmarks.fakes import TASK_RESPONSES
+import evaluation.testset_generation as testset_generation
+from utils.fake_llm import FakeProviderChatModel
+
+
+def _docs(n: int) -> list[Document]:
+    return [
+        Document(page_content=f"Battery lasts two days, camera is sharp ({i})",
+                 metadata={"product_id": f"P{i}", "product_title": f"Phone {i}", "price": "₹9,999", "rating": 4.2})
+        for i in range(n)
+    ]
+
+
+def _lines(path) -> list[dict]:
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def _generate(docs, output):
+    generator = testset_generation.TestsetGenerator(FakeProviderChatModel(response=TASK_RESPONSES["testset_generator"]),
+                                                    questions_per_product=2)
+    return asyncio.run(generator.generate(docs, output))
+
+
+def test_rerun_after_interrupted_rerun_does_not_duplicate_items(tmp_path):
+    output = tmp_path / "testset.jsonl"
+    docs = _docs(3)
+    _generate(docs, output)
+    first = _lines(output)
+    # A re-run copies the cached items into .partial first; interrupted, it leaves them (and a torn line)
+    partial = output.with_suffix(".jsonl.partial")
+    partial.write_text(output.read_text(encoding="utf-8") + '{"id": "P0:', encoding="utf-8")
+
+    stats = _generate(docs, output)
+
+    assert stats["cached_products"] == 3 and stats["generated_products"] == 0
+    assert len(first) == 6
+    assert sorted(item["id"] for item in _lines(output)) == sorted(item["id"] for item in first)
+    assert not partial.exists()
+
+
+def test_resume_generates_only_products_missing_from_the_partial(tmp_path):
+    output = tmp_path / "testset.jsonl"
+    docs = _docs(4)
+    _generate(docs[:2], tmp_path / "done.jsonl")
+    # Interrupted first run: two products made it into .partial, there is no output yet
+    output.with_suffix(".jsonl.partial").write_text((tmp_path / "done.jsonl").read_text(encoding="utf-8"),
+                                                    encoding="utf-8")
+
+    stats = _generate(docs, output)
+
+    assert stats["cached_products"] == 2 and stats["generated_products"] == 2
+    ids = [item["id"] for item in _lines(output)]
+    assert sorted(ids) == sorted(f"P{i}:{q}" for i in range(4) for q in range(2))